@@ -11,8 +11,13 @@ while ! /usr/local/bin/healthcheck.sh > /dev/null 2>&1; do
   sleep 2
 done
 
-echo "API Gateway is healthy, starting tickler..."
-/app/tickler.sh &
+# The MCP server's session keeper tickles the gateway itself; set TICKLER_ENABLED=false to rely on it.
+if [ "${TICKLER_ENABLED:-true}" = "true" ]; then
+  echo "API Gateway is healthy, starting tickler..."
+  /app/tickler.sh &
+else
+  echo "API Gateway is healthy, tickler disabled (TICKLER_ENABLED=false)."
+fi
 
 # Wait for the API Gateway process to keep container alive
 wait
\ No newline at end of file
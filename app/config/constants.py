@@ -8,7 +8,7 @@ VERTEX_AI_RAG_INSTRUCTION = instructions_manager.get_instructions("vertex_ai_rag
 PORTEFOLIO_MANAGER_AGENT_DESCRIPTION = "Agent principal orchestrant séquentiellement le workflow autonome de gestion de portefeuille."
 
 IBKR_READER_AGENT_DESCRIPTION = "Agent spécialisé dans la lecture des données de portefeuille IBKR: positions, cash, PnL."
-IBKR_READER_AGENT_INSTRUCTION = instructions_manager.get_instructions("ibkr_reader_agent/ibkr_reader_agent_instruction_v2")
+IBKR_READER_AGENT_INSTRUCTION = instructions_manager.get_instructions("ibkr_reader_agent/ibkr_reader_agent_instruction_v3")
 
 MARKET_READER_AGENT_DESCRIPTION = "Agent spécialisé dans la lecture des conditions de marché: prix, volatilité, tendances."
 MARKET_READER_AGENT_INSTRUCTION = instructions_manager.get_instructions("market_reader_agent/market_reader_agent_instruction_v2")
@@ -0,0 +1,422 @@
+# load_benchmark.py
+"""
+Throughput and latency of the MCP server per endpoint family, through FastAPI and through the MCP
+streamable-HTTP transport, against the local gateway simulator (simulator/gateway.py).
+
+The benchmark starts the simulator. For each transport it then starts the MCP server in its own
+process, either as the FastAPI app under uvicorn or as `python fastapi_server.py` with
+MCP_TRANSPORT_PROTOCOL=streamable-http. Each family runs at each concurrency level: `--concurrency`
+workers share `--requests` calls. In the MCP runs every worker is its own MCP session, i.e. its own
+agent. The server caches are kept in a temporary MCP_CACHE_DIR and are warmed by `--warmup` calls
+per family, so the numbers include the effect of the caches. The server's pacing budgets apply as
+configured (PACING_ENABLED, PACING_BUDGETS), which caps families such as portfolio and history;
+set them in the environment to measure without them.
+
+Reported per transport, concurrency and family:
+  rps            completed requests per second
+  p50/p95/p99    client-side latency in milliseconds
+  errors         HTTP errors, error bodies and MCP tool errors
+  cpu_ms_per_req server process CPU time (user + system) per request
+  peak_rss_mb    server memory high-water mark during the run (reset before each run where the
+                 kernel allows it, otherwise the process lifetime peak)
+Server CPU and memory are read from /proc, so they are only reported on Linux.
+
+Usage (from mcp_server/, without the gateway environment variables, which the benchmark sets):
+    python benchmarks/load_benchmark.py [--transports fastapi,mcp] [--concurrency 1,10,50] [--requests 500]
+        [--families portfolio,market_data] [--sim-args "--latency 0.05 --jitter 0.02"]
+        [--json results.json] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+MCP_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(MCP_SERVER_DIR)
+
+# Simulator defaults (seed 42): the first account and a few of its well-known conids.
+ACCOUNT = "DU1000001"
+CONIDS = ["265598", "272093", "3691937", "4815747", "8314"]
+
+# family -> GET requests as (path template, arguments); path parameters are filled from the arguments
+# and the rest is sent as the query string (FastAPI) or passed as tool arguments (MCP).
+FAMILIES: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    "portfolio": [
+        ("/portfolio/{accountId}/summary", {"accountId": ACCOUNT}),
+        ("/portfolio/{accountId}/ledger", {"accountId": ACCOUNT}),
+        ("/portfolio/{accountId}/positions/{pageId}", {"accountId": ACCOUNT, "pageId": 0}),
+    ],
+    "market_data": [
+        ("/iserver/marketdata/snapshot", {"conids": ",".join(CONIDS[:3]), "fields": "31,84,86"}),
+        ("/iserver/marketdata/snapshot", {"conids": ",".join(CONIDS[2:]), "fields": "31,84,86"}),
+    ],
+    "history": [
+        ("/iserver/marketdata/history", {"conid": conid, "period": "1d", "bar": "5min"}) for conid in CONIDS
+    ],
+    "contract": [
+        ("/iserver/secdef/search", {"symbol": "AAPL"}),
+        ("/iserver/contract/{conid}/info", {"conid": CONIDS[1]}),
+    ],
+    "orders": [
+        ("/iserver/account/orders", {}),
+    ],
+    "session": [
+        ("/iserver/auth/status", {}),
+    ],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProcessProbe:
+    """CPU time and memory high-water mark of a server process, from /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def cpu_seconds(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        # utime and stime are fields 14 and 15 of the line, 12 and 13 after the command name.
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def reset_peak(self) -> None:
+        try:
+            with open(f"/proc/{self.pid}/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+    def peak_rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+
+
+def start_process(args: List[str], env: Dict[str, str], log_path: str, cwd: str = MCP_SERVER_DIR) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_for_port(port: int, process: subprocess.Popen, log_path: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(log_path) as f:
+                raise RuntimeError(f"Server exited with {process.returncode}:\n{f.read()[-3000:]}")
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not listen on port {port} within {timeout}s (log: {log_path}).")
+
+
+def split_request(template: str, arguments: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    path, query = template, {}
+    for key, value in arguments.items():
+        if "{" + key + "}" in path:
+            path = path.replace("{" + key + "}", str(value))
+        else:
+            query[key] = value
+    return path, query
+
+
+def is_error_payload(payload: Any) -> bool:
+    # Routers report gateway failures as a 200 with an "error" object.
+    return isinstance(payload, dict) and "error" in payload
+
+
+class FastApiDriver:
+    name = "fastapi"
+
+    def __init__(self, port: int):
+        self.base_url = f"http://127.0.0.1:{port}"
+        self._clients: List[httpx.AsyncClient] = []
+
+    async def open(self, workers: int) -> None:
+        self._clients = [httpx.AsyncClient(base_url=self.base_url, timeout=60) for _ in range(workers)]
+
+    async def close(self) -> None:
+        for client in self._clients:
+            await client.aclose()
+
+    async def call(self, worker: int, template: str, arguments: Dict[str, Any]) -> bool:
+        path, query = split_request(template, arguments)
+        response = await self._clients[worker].get(path, params=query)
+        if response.status_code >= 400:
+            return False
+        try:
+            return not is_error_payload(response.json())
+        except ValueError:
+            return True
+
+
+class McpDriver:
+    name = "mcp"
+
+    def __init__(self, port: int, tools: Dict[str, str]):
+        self.url = f"http://127.0.0.1:{port}/mcp"
+        self.tools = tools
+        self._clients: List[Any] = []
+
+    async def open(self, workers: int) -> None:
+        from fastmcp import Client
+
+        self._clients = [Client(self.url, timeout=60) for _ in range(workers)]
+        for client in self._clients:
+            await client.__aenter__()
+
+    async def close(self) -> None:
+        for client in self._clients:
+            await client.__aexit__(None, None, None)
+
+    async def call(self, worker: int, template: str, arguments: Dict[str, Any]) -> bool:
+        result = await self._clients[worker].call_tool(self.tools[template], arguments, raise_on_error=False)
+        if result.is_error:
+            return False
+        text = "".join(getattr(block, "text", "") for block in result.content)
+        try:
+            return not is_error_payload(json.loads(text))
+        except ValueError:
+            return True
+
+
+def export_openapi(env: Dict[str, str]) -> Dict[str, Any]:
+    """The app's OpenAPI document (operationIds included), as the MCP server built its tools from it."""
+    probe = "import json, fastapi_server; print('OPENAPI ' + json.dumps(fastapi_server.app.openapi()))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=MCP_SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("OPENAPI "):
+            return json.loads(line[len("OPENAPI "):])
+    raise RuntimeError(f"Could not export the OpenAPI document:\n{result.stderr[-2000:]}")
+
+
+def resolve_tools(openapi: Dict[str, Any], tool_names: List[str]) -> Dict[str, str]:
+    """
+    Maps each benchmarked GET path to its MCP tool. FastMCP names a tool after the operationId,
+    shortened, so the tool is the longest name the operationId starts with.
+    """
+    tools = {}
+    for template in {template for requests in FAMILIES.values() for template, _ in requests}:
+        operation_id = openapi["paths"][template]["get"]["operationId"]
+        matches = [name for name in tool_names if operation_id.startswith(name)]
+        if not matches:
+            raise RuntimeError(f"No MCP tool for GET {template} ({operation_id}); is its tag excluded?")
+        tools[template] = max(matches, key=len)
+    return tools
+
+
+async def run_family(driver, probe: ProcessProbe, family: str, concurrency: int, total: int, warmup: int) -> Dict[str, Any]:
+    requests = FAMILIES[family]
+    await driver.open(concurrency)
+    try:
+        for i in range(warmup):
+            await driver.call(0, *requests[i % len(requests)])
+        probe.reset_peak()
+        cpu_before = probe.cpu_seconds()
+        latencies: List[float] = []
+        errors = 0
+        next_index = 0
+
+        async def worker(worker_id: int) -> None:
+            nonlocal next_index, errors
+            while next_index < total:
+                index = next_index
+                next_index += 1
+                started = time.perf_counter()
+                try:
+                    ok = await driver.call(worker_id, *requests[index % len(requests)])
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        cpu_after = probe.cpu_seconds()
+    finally:
+        await driver.close()
+
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    peak_rss = probe.peak_rss_mb()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "cpu_ms_per_req": round(cpu * 1000 / len(latencies), 3) if cpu is not None else None,
+        "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+    }
+
+
+async def benchmark_transport(transport: str, args: argparse.Namespace, env: Dict[str, str], log_dir: str) -> Dict[str, Any]:
+    port = free_port()
+    log_path = os.path.join(log_dir, f"{transport}.log")
+    server_env = dict(env, MCP_SERVER_PORT=str(port), MCP_SERVER_HOST="127.0.0.1")
+    if transport == "fastapi":
+        command = [sys.executable, "-m", "uvicorn", "fastapi_server:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning", "--no-access-log"]
+    else:
+        server_env["MCP_TRANSPORT_PROTOCOL"] = "streamable-http"
+        command = [sys.executable, "fastapi_server.py"]
+    process = start_process(command, server_env, log_path)
+    try:
+        await wait_for_port(port, process, log_path)
+        if transport == "fastapi":
+            driver = FastApiDriver(port)
+        else:
+            from fastmcp import Client
+
+            async with Client(f"http://127.0.0.1:{port}/mcp", timeout=60) as client:
+                tool_names = [tool.name for tool in await client.list_tools()]
+            driver = McpDriver(port, resolve_tools(export_openapi(server_env), tool_names))
+        probe = ProcessProbe(process.pid)
+        results: Dict[str, Any] = {}
+        for concurrency in args.concurrency:
+            results[str(concurrency)] = {}
+            for family in args.families:
+                result = await run_family(driver, probe, family, concurrency, args.requests, args.warmup)
+                results[str(concurrency)][family] = result
+                print(f"{transport:<8} c={concurrency:<4} {family:<12} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.2f}  "
+                      f"p95 {result['p95_ms']:>7.2f}  p99 {result['p99_ms']:>7.2f} ms  cpu {result['cpu_ms_per_req']} ms/req  "
+                      f"rss {result['peak_rss_mb']} MB  errors {result['errors']}")
+        return results
+    finally:
+        stop_process(process)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    print(f"\nChange against {previous.get('commit') or 'previous run'} (rps / p95 / cpu per request):")
+    for transport, levels in current["results"].items():
+        for concurrency, families in levels.items():
+            for family, result in families.items():
+                before = previous.get("results", {}).get(transport, {}).get(concurrency, {}).get(family)
+                if not before:
+                    continue
+                deltas = []
+                for metric in ("rps", "p95_ms", "cpu_ms_per_req"):
+                    if result.get(metric) is not None and before.get(metric):
+                        deltas.append(f"{metric} {(result[metric] / before[metric] - 1) * 100:+.1f}%")
+                print(f"{transport:<8} c={concurrency:<4} {family:<12} " + "  ".join(deltas))
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    sim_port = free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ)
+        env.update(
+            GATEWAY_INTERNAL_BASE_URL="http://127.0.0.1",
+            GATEWAY_PORT=str(sim_port),
+            GATEWAY_ENDPOINT="/v1/api",
+            MCP_CACHE_DIR=work_dir,
+            ROUTERS_PATH=os.path.join(MCP_SERVER_DIR, "routers"),
+            PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, MCP_SERVER_DIR, env.get("PYTHONPATH")])),
+        )
+        sim_log = os.path.join(work_dir, "simulator.log")
+        simulator = start_process([sys.executable, "-m", "mcp_server.simulator.gateway", "--port", str(sim_port),
+                                   *shlex.split(args.sim_args)], env, sim_log, cwd=REPO_DIR)
+        try:
+            await wait_for_port(sim_port, simulator, sim_log)
+            results = {}
+            for transport in args.transports:
+                results[transport] = await benchmark_transport(transport, args, env, work_dir)
+            async with httpx.AsyncClient() as client:
+                simulator_stats = (await client.get(f"http://127.0.0.1:{sim_port}/simulator/stats")).json()
+        finally:
+            stop_process(simulator)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "config": {
+            "transports": args.transports,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "families": args.families,
+            "sim_args": args.sim_args,
+        },
+        "results": results,
+        "simulator": simulator_stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transports", default="fastapi,mcp", help="Comma-separated: fastapi, mcp.")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma-separated numbers of concurrent clients.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per family and concurrency level.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per family before each run.")
+    parser.add_argument("--families", default=",".join(FAMILIES), help="Comma-separated endpoint families.")
+    parser.add_argument("--sim-args", default="--latency 0.02 --jitter 0.01", help="Extra arguments for the gateway simulator.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Print the change against the results in this file.")
+    args = parser.parse_args()
+    args.transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    args.families = [f.strip() for f in args.families.split(",") if f.strip()]
+    unknown = set(args.families) - set(FAMILIES) or set(args.transports) - {"fastapi", "mcp"}
+    if unknown:
+        parser.error(f"Unknown families or transports: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
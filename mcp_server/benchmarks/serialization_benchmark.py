@@ -0,0 +1,151 @@
+# serialization_benchmark.py
+"""
+Measures the server-side CPU cost of returning large gateway payloads (positions, trades) through the
+four response paths the MCP server can take:
+
+  json-decode   decode the upstream body and let FastAPI re-encode it with the stdlib JSONResponse
+  orjson        same, with ORJSONResponse as the response class (the app default)
+  orjson-direct decode with orjson and return the encoded response directly, skipping FastAPI's
+                jsonable_encoder (services.responses.decode / json_response, used for projected payloads)
+  passthrough   forward the upstream bytes untouched (services.responses.passthrough)
+
+The gateway is replaced by an in-memory httpx.MockTransport, so only the MCP server's own work is timed.
+
+Usage (from mcp_server/):
+    python benchmarks/serialization_benchmark.py [--requests 200] [--rows 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from mcp_server.services.responses import decode, json_response, passthrough  # noqa: E402
+
+
+def make_positions(rows: int) -> list:
+    rng = random.Random(1)
+    return [
+        {
+            "acctId": "U1234567", "conid": 265598 + i, "contractDesc": f"SYM{i}", "position": rng.randint(1, 500),
+            "mktPrice": rng.uniform(1, 500), "mktValue": rng.uniform(100, 1e5), "currency": "USD",
+            "avgCost": rng.uniform(1, 500), "avgPrice": rng.uniform(1, 500), "realizedPnl": 0.0,
+            "unrealizedPnl": rng.uniform(-1e4, 1e4), "exchs": None, "expiry": None, "putOrCall": None,
+            "multiplier": None, "strike": 0.0, "exerciseStyle": None, "conExchMap": [], "assetClass": "STK",
+            "undConid": 0, "model": "", "time": 0, "chineseName": "", "allExchanges": "SMART,NYSE,ARCA",
+            "listingExchange": "NASDAQ", "countryCode": "US", "name": f"COMPANY {i} INC", "sector": "Technology",
+            "group": "Computers", "sectorGroup": "Computer Services", "isUS": True, "hasOptions": True,
+        }
+        for i in range(rows)
+    ]
+
+
+def make_trades(rows: int) -> list:
+    rng = random.Random(2)
+    return [
+        {
+            "execution_id": f"0000e0d5.{i:08x}.01.01", "symbol": f"SYM{i % 50}", "supports_tax_opt": "1",
+            "side": rng.choice(["B", "S"]), "order_description": "Bot 100 @ 150.00 on ISLAND",
+            "trade_time": "20241018-14:30:00", "trade_time_r": 1729261800000 + i, "size": rng.randint(1, 500),
+            "price": f"{rng.uniform(1, 500):.2f}", "order_ref": f"ref-{i}", "submitter": "user",
+            "exchange": "ISLAND", "commission": f"{rng.uniform(0.3, 5):.2f}", "net_amount": rng.uniform(100, 1e5),
+            "account": "U1234567", "accountCode": "U1234567", "company_name": f"COMPANY {i % 50} INC",
+            "contract_description_1": f"SYM{i % 50}", "sec_type": "STK", "listing_exchange": "NASDAQ",
+            "conid": 265598 + i % 50, "conidEx": str(265598 + i % 50), "clearing_id": "IB",
+            "clearing_name": "IB", "liquidation_trade": "0", "is_event_trading": "0",
+        }
+        for i in range(rows)
+    ]
+
+
+def build_app(upstream: httpx.AsyncClient) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/json-decode/{name}", response_class=JSONResponse)
+    async def json_decode(name: str):
+        response = await upstream.get(f"/{name}")
+        return response.json()
+
+    @app.get("/orjson/{name}", response_class=ORJSONResponse)
+    async def orjson_encode(name: str):
+        response = await upstream.get(f"/{name}")
+        return response.json()
+
+    @app.get("/orjson-direct/{name}")
+    async def orjson_direct(name: str):
+        response = await upstream.get(f"/{name}")
+        return json_response(decode(response))
+
+    @app.get("/passthrough/{name}")
+    async def raw(name: str):
+        response = await upstream.get(f"/{name}")
+        return passthrough(response)
+
+    return app
+
+
+async def run(requests: int, rows: int) -> list:
+    bodies = {
+        "positions": json.dumps(make_positions(rows)).encode(),
+        "trades": json.dumps(make_trades(rows)).encode(),
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=bodies[request.url.path.strip("/")], headers={"content-type": "application/json"})
+
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://gateway")
+    app = build_app(upstream)
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://mcp") as client:
+        for name, body in bodies.items():
+            for variant in ("json-decode", "orjson", "orjson-direct", "passthrough"):
+                url = f"/{variant}/{name}"
+                for _ in range(5):
+                    await client.get(url)
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+                for _ in range(requests):
+                    response = await client.get(url)
+                    response.raise_for_status()
+                cpu = time.process_time() - cpu_start
+                wall = time.perf_counter() - wall_start
+                results.append({
+                    "payload": name,
+                    "payload_kb": round(len(body) / 1024, 1),
+                    "variant": variant,
+                    "cpu_ms_per_request": round(cpu / requests * 1000, 3),
+                    "wall_ms_per_request": round(wall / requests * 1000, 3),
+                })
+    await upstream.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per payload and variant.")
+    parser.add_argument("--rows", type=int, default=2000, help="Positions / trades per payload.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.rows))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = {r["payload"]: r["cpu_ms_per_request"] for r in results if r["variant"] == "json-decode"}
+    print(f"{'payload':<10} {'size KB':>8} {'variant':<14} {'CPU ms/req':>11} {'wall ms/req':>12} {'CPU saved':>10}")
+    for r in results:
+        saved = baseline[r["payload"]] - r["cpu_ms_per_request"]
+        print(f"{r['payload']:<10} {r['payload_kb']:>8} {r['variant']:<14} {r['cpu_ms_per_request']:>11} "
+              f"{r['wall_ms_per_request']:>12} {saved:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# startup_benchmark.py
+"""
+Compares MCP server startup with and without the cached tool manifest (services.tool_manifest).
+
+Each run starts a fresh Python process that imports fastapi_server, which builds the FastAPI app and
+the FastMCP server exactly as `python fastapi_server.py` does before it starts serving. Cold runs
+delete the manifest first so the OpenAPI document is generated; warm runs reuse the file written by
+the previous run. The caches are kept in a temporary MCP_CACHE_DIR so the real ones are not touched.
+
+Reported per mode (median over the runs):
+  import_s      wall time of `import fastapi_server` (interpreter and library imports included)
+  manifest_s    time spent loading or generating the OpenAPI document
+  mcp_build_s   manifest plus FastMCP.from_fastapi
+
+Usage (from mcp_server/, with the server's environment variables set):
+    python benchmarks/startup_benchmark.py [--runs 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MCP_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import fastapi_server
+elapsed = time.perf_counter() - started
+from mcp_server.services.tool_manifest import tool_manifest
+print("STARTUP " + json.dumps({"import_s": elapsed, **tool_manifest.status()}))
+"""
+
+
+def run_once(cache_dir: str) -> dict:
+    env = dict(os.environ, MCP_CACHE_DIR=cache_dir)
+    env.pop("TOOL_MANIFEST_PATH", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(MCP_SERVER_DIR), MCP_SERVER_DIR, env.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=MCP_SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Startup probe printed no result:\n{result.stderr[-2000:]}")
+
+
+def summarise(samples: list) -> dict:
+    return {
+        "sources": sorted({s["source"] for s in samples}),
+        **{metric: round(statistics.median(s[metric] for s in samples), 4) for metric in ("import_s", "manifest_s", "mcp_build_s")},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manifest = os.path.join(cache_dir, "tool_manifest.json")
+        samples = {"cold": [], "warm": []}
+        for _ in range(args.runs):
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            samples["cold"].append(run_once(cache_dir))
+            samples["warm"].append(run_once(cache_dir))
+        for mode, runs in samples.items():
+            for run in runs:
+                run["manifest_s"] = run.pop("manifest_seconds")
+                run["mcp_build_s"] = run.pop("mcp_build_seconds")
+            results[mode] = summarise(runs)
+
+    saved = results["cold"]["mcp_build_s"] - results["warm"]["mcp_build_s"]
+    results["saved_s"] = round(saved, 4)
+    print(f"{'mode':<6} {'import_s':>9} {'manifest_s':>11} {'mcp_build_s':>12}  source")
+    for mode in ("cold", "warm"):
+        r = results[mode]
+        print(f"{mode:<6} {r['import_s']:>9.3f} {r['manifest_s']:>11.3f} {r['mcp_build_s']:>12.3f}  {','.join(r['sources'])}")
+    print(f"Cached manifest saves {saved * 1000:.0f} ms of MCP server build time per start ({args.runs} runs each).")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
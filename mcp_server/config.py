@@ -1,4 +1,5 @@
 import os
+import json
 import sys
 import logging
 
@@ -47,6 +48,207 @@ except ValueError:
 BASE_URL = f"{GATEWAY_INTERNAL_BASE_URL}:{GATEWAY_PORT}{GATEWAY_ENDPOINT}"
 logger.info(f"BASE_URL configured: {BASE_URL}")
 
+# Shared gateway HTTP client (connection pooling, HTTP/2, timeouts)
+GATEWAY_HTTP2 = os.getenv("GATEWAY_HTTP2", "false").lower() == "true"
+GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "20"))
+GATEWAY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", "10"))
+GATEWAY_KEEPALIVE_EXPIRY = float(os.getenv("GATEWAY_KEEPALIVE_EXPIRY", "30"))
+GATEWAY_CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "5"))
+
+# Per-endpoint timeout overrides as a JSON object mapping a path glob to seconds,
+# e.g. '{"/hmds/*": 45, "/iserver/scanner/run": 60}'. Unmatched paths keep the router default.
+try:
+    GATEWAY_TIMEOUTS = json.loads(os.getenv("GATEWAY_TIMEOUTS") or "{}")
+except json.JSONDecodeError:
+    logger.error("GATEWAY_TIMEOUTS must be a valid JSON object.")
+    sys.exit(1)
+
+# Market data snapshot cache: how long quotes are served from memory, and how long a
+# conid is considered subscribed on the gateway before it is primed again.
+SNAPSHOT_CACHE_TTL = float(os.getenv("SNAPSHOT_CACHE_TTL", "2"))
+SNAPSHOT_SUBSCRIPTION_TTL = float(os.getenv("SNAPSHOT_SUBSCRIPTION_TTL", "600"))
+
+# Snapshot micro-batching: concurrent requests within the window are merged into one
+# upstream call (0 disables batching). Batches are flushed early at the conid limit.
+SNAPSHOT_BATCH_WINDOW_MS = float(os.getenv("SNAPSHOT_BATCH_WINDOW_MS", "10"))
+SNAPSHOT_BATCH_MAX_CONIDS = int(os.getenv("SNAPSHOT_BATCH_MAX_CONIDS", "100"))
+
+# Local on-disk caches (historical bars, ...). Defaults to mcp_server/.cache.
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+BAR_CACHE_DIR = os.path.join(CACHE_DIR, "bars")
+BAR_CACHE_ENABLED = os.getenv("BAR_CACHE_ENABLED", "true").lower() == "true"
+
+# Parsed iServer scanner parameters, cached on disk and re-downloaded after SCANNER_PARAMS_REFRESH seconds.
+SCANNER_PARAMS_CACHE_PATH = os.path.join(CACHE_DIR, "scanner_params.json")
+SCANNER_PARAMS_REFRESH = float(os.getenv("SCANNER_PARAMS_REFRESH", "86400"))
+SCANNER_VALIDATION_ENABLED = os.getenv("SCANNER_VALIDATION_ENABLED", "true").lower() == "true"
+
+# Contract metadata cache (info, rules, algos), persisted under CACHE_DIR/contracts. Conids held in
+# CONTRACT_CACHE_PRELOAD_ACCOUNT (defaults to IBKR_ACCOUNT_ID) are loaded in the background at startup.
+CONTRACT_CACHE_ENABLED = os.getenv("CONTRACT_CACHE_ENABLED", "true").lower() == "true"
+CONTRACT_CACHE_DIR = os.path.join(CACHE_DIR, "contracts")
+CONTRACT_INFO_CACHE_TTL = float(os.getenv("CONTRACT_INFO_CACHE_TTL", str(7 * 86400)))
+CONTRACT_RULES_CACHE_TTL = float(os.getenv("CONTRACT_RULES_CACHE_TTL", "86400"))
+CONTRACT_CACHE_PRELOAD_ACCOUNT = os.getenv("CONTRACT_CACHE_PRELOAD_ACCOUNT") or os.getenv("IBKR_ACCOUNT_ID")
+CONTRACT_CACHE_PRELOAD_KINDS = [kind.strip() for kind in os.getenv("CONTRACT_CACHE_PRELOAD_KINDS", "info,info_and_rules,rules").split(",") if kind.strip()]
+CONTRACT_CACHE_PRELOAD_CONCURRENCY = int(os.getenv("CONTRACT_CACHE_PRELOAD_CONCURRENCY", "4"))
+
+# HMDS session: re-initialised only when a request fails with one of these statuses,
+# or optionally after a maximum age in seconds (0 keeps it until a failure).
+HMDS_SESSION_TTL = float(os.getenv("HMDS_SESSION_TTL", "0"))
+HMDS_REAUTH_STATUS_CODES = {int(code) for code in os.getenv("HMDS_REAUTH_STATUS_CODES", "401,403,404").split(",") if code.strip()}
+
+# Gateway pacing: token buckets as [requests per second, burst]. The global budget is shared by
+# every family; PACING_BUDGETS (JSON) overrides individual family budgets.
+PACING_ENABLED = os.getenv("PACING_ENABLED", "true").lower() == "true"
+PACING_GLOBAL_BUDGET = tuple(json.loads(os.getenv("PACING_GLOBAL_BUDGET") or "[10, 10]"))
+PACING_BUDGETS = {
+    "orders": (5, 5),
+    "portfolio": (5, 5),
+    "market_data": (10, 10),
+    "history": (5, 5),
+    "scanner": (1, 1),
+    "other": (10, 10),
+}
+PACING_BUDGETS.update({family: tuple(budget) for family, budget in json.loads(os.getenv("PACING_BUDGETS") or "{}").items()})
+
+# Circuit breaker per pacing family: opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures
+# (transport errors, timeouts or one of CIRCUIT_FAILURE_STATUS_CODES), fails fast while open and
+# lets one probe through after CIRCUIT_RESET_TIMEOUT seconds.
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "15"))
+CIRCUIT_FAILURE_STATUS_CODES = {int(code) for code in os.getenv("CIRCUIT_FAILURE_STATUS_CODES", "401,502,503,504").split(",") if code.strip()}
+
+# Adaptive timeouts: once a route has LATENCY_MIN_SAMPLES observations, GET requests time out after
+# ADAPTIVE_TIMEOUT_MULTIPLIER x its p99 latency (clamped between ADAPTIVE_TIMEOUT_MIN and the static timeout).
+# Endpoint families whose latency depends on the query (a 1-year history vs. a short tail fetch) keep
+# their static timeout: ADAPTIVE_TIMEOUT_EXEMPT_FAMILIES (comma-separated pacing family names).
+ADAPTIVE_TIMEOUTS_ENABLED = os.getenv("ADAPTIVE_TIMEOUTS_ENABLED", "true").lower() == "true"
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "4"))
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2"))
+ADAPTIVE_TIMEOUT_EXEMPT_FAMILIES = {family.strip() for family in os.getenv("ADAPTIVE_TIMEOUT_EXEMPT_FAMILIES", "history,scanner").split(",") if family.strip()}
+LATENCY_WINDOW_SIZE = int(os.getenv("LATENCY_WINDOW_SIZE", "200"))
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "20"))
+
+# Hedged requests for idempotent GETs matching HEDGE_PATHS (comma-separated globs): a duplicate is sent
+# once the route's p95 has passed without an answer. HEDGE_MAX_RATIO caps the share of hedged requests.
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_PATHS = [pattern.strip() for pattern in os.getenv(
+    "HEDGE_PATHS",
+    "/iserver/marketdata/snapshot,/md/snapshot,/iserver/contract/*/info,/iserver/contract/*/info-and-rules,"
+    "/iserver/contract/rules,/trsrv/secdef,/portfolio/*/positions/*,/portfolio/*/position/*"
+).split(",") if pattern.strip()]
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+
+# Number of positions pages fetched in parallel by /portfolio/{accountId}/positions/all.
+POSITIONS_PAGE_CONCURRENCY = int(os.getenv("POSITIONS_PAGE_CONCURRENCY", "4"))
+
+# Number of accounts read in parallel by /portfolio/accounts/batch (each account's summary, ledger
+# and positions pages are fetched concurrently on top of this).
+ACCOUNT_FANOUT_CONCURRENCY = int(os.getenv("ACCOUNT_FANOUT_CONCURRENCY", "4"))
+
+# Default response projections, keyed by router path template. Only these keys (dotted for nested
+# fields, applied to every item of a list) are returned unless the caller passes `projection`.
+# Off by default so that existing tools keep returning full payloads. The lists keep the fields that
+# identify a contract (expiry, strike, right, multiplier). PROJECTION_OVERRIDES (JSON, same shape)
+# replaces individual entries.
+PROJECTION_DEFAULTS_ENABLED = os.getenv("PROJECTION_DEFAULTS_ENABLED", "false").lower() == "true"
+DEFAULT_PROJECTIONS = {
+    "/portfolio/{accountId}/summary": [
+        f"{key}.{attr}"
+        for key in ("netliquidation", "totalcashvalue", "buyingpower", "grosspositionvalue", "availablefunds",
+                    "excessliquidity", "equitywithloanvalue", "initmarginreq", "maintmarginreq", "accruedcash")
+        for attr in ("amount", "currency")
+    ],
+    "/portfolio/{accountId}/positions/{pageId}": [
+        "acctId", "conid", "contractDesc", "name", "ticker", "assetClass", "expiry", "putOrCall", "strike",
+        "multiplier", "undConid", "position", "mktPrice", "mktValue", "currency", "avgPrice", "avgCost",
+        "unrealizedPnl", "realizedPnl", "sector", "group",
+    ],
+    "/iserver/account/orders": [
+        f"orders.{key}"
+        for key in ("acct", "orderId", "conid", "ticker", "secType", "description1", "side", "orderType", "status", "totalSize",
+                    "filledQuantity", "remainingQuantity", "price", "avgPrice", "timeInForce", "lastExecutionTime_r")
+    ] + ["snapshot"],
+    "/iserver/account/trades": [
+        "execution_id", "account", "conid", "symbol", "sec_type", "contract_description_1", "side", "size", "price", "commission",
+        "net_amount", "trade_time", "order_ref", "order_description",
+    ],
+    "/iserver/secdef/search": [
+        "conid", "symbol", "companyName", "companyHeader", "description", "sections.secType", "sections.conid",
+        "sections.exchange", "sections.months",
+    ],
+}
+DEFAULT_PROJECTIONS["/portfolio/{accountId}/positions/all"] = DEFAULT_PROJECTIONS["/portfolio/{accountId}/positions/{pageId}"]
+DEFAULT_PROJECTIONS.update(json.loads(os.getenv("PROJECTION_OVERRIDES") or "{}"))
+
+# Streaming market data: a WebSocket subscription to the gateway's smd topic for STREAMING_CONIDS.
+# Ticks are kept in per-conid ring buffers and snapshot requests for streamed conids are answered
+# from memory. STREAMING_WS_URL defaults to the gateway base URL with a ws(s) scheme and /ws path.
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "false").lower() == "true"
+STREAMING_WS_URL = os.getenv("STREAMING_WS_URL") or BASE_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/ws"
+STREAMING_CONIDS = [conid.strip() for conid in os.getenv("STREAMING_CONIDS", "").split(",") if conid.strip()]
+STREAMING_FIELDS = [field.strip() for field in os.getenv("STREAMING_FIELDS", "31,84,85,86,88,82,83,87,7295,7296").split(",") if field.strip()]
+STREAMING_BUFFER_SIZE = int(os.getenv("STREAMING_BUFFER_SIZE", "1024"))
+STREAMING_HEARTBEAT_INTERVAL = float(os.getenv("STREAMING_HEARTBEAT_INTERVAL", "10"))
+STREAMING_RECONNECT_MAX_DELAY = float(os.getenv("STREAMING_RECONNECT_MAX_DELAY", "30"))
+
+# Session keeper: tickles the gateway every SESSION_TICKLE_INTERVAL seconds, caches /iserver/auth/status
+# for SESSION_STATUS_CACHE_TTL seconds and re-authenticates with exponential backoff when the session
+# drops. During a re-authentication, requests matching SESSION_HOLD_PATHS wait up to SESSION_HOLD_TIMEOUT.
+SESSION_KEEPER_ENABLED = os.getenv("SESSION_KEEPER_ENABLED", "true").lower() == "true"
+SESSION_TICKLE_INTERVAL = float(os.getenv("SESSION_TICKLE_INTERVAL", "60"))
+SESSION_STATUS_CACHE_TTL = float(os.getenv("SESSION_STATUS_CACHE_TTL", "10"))
+SESSION_HOLD_PATHS = [pattern.strip() for pattern in os.getenv("SESSION_HOLD_PATHS", "/iserver/*,/hmds/*").split(",") if pattern.strip()]
+SESSION_HOLD_TIMEOUT = float(os.getenv("SESSION_HOLD_TIMEOUT", "15"))
+SESSION_REAUTH_BACKOFF_INITIAL = float(os.getenv("SESSION_REAUTH_BACKOFF_INITIAL", "2"))
+SESSION_REAUTH_BACKOFF_MAX = float(os.getenv("SESSION_REAUTH_BACKOFF_MAX", "120"))
+
+# Order confirmation: with auto_confirm, /iserver/reply prompts whose message ids are all in
+# ORDER_AUTO_CONFIRM_MESSAGE_IDS are confirmed server-side (at most ORDER_AUTO_CONFIRM_MAX_REPLIES per
+# order). Any other prompt is returned to the caller. o354: no market data subscription;
+# o10331: stop order type notice.
+ORDER_AUTO_CONFIRM_MESSAGE_IDS = {message_id.strip() for message_id in os.getenv("ORDER_AUTO_CONFIRM_MESSAGE_IDS", "o354,o10331").split(",") if message_id.strip()}
+ORDER_AUTO_CONFIRM_MAX_REPLIES = int(os.getenv("ORDER_AUTO_CONFIRM_MAX_REPLIES", "5"))
+
+# Order change feed: /iserver/account/orders is polled every ORDER_FEED_INTERVAL seconds while someone
+# reads /iserver/account/orders/changes (and for ORDER_FEED_IDLE_TIMEOUT seconds after), or always
+# when ORDER_FEED_ENABLED. ORDER_FEED_MAX_WAIT caps how long a changes request waits.
+ORDER_FEED_ENABLED = os.getenv("ORDER_FEED_ENABLED", "false").lower() == "true"
+ORDER_FEED_INTERVAL = float(os.getenv("ORDER_FEED_INTERVAL", "2"))
+ORDER_FEED_IDLE_TIMEOUT = float(os.getenv("ORDER_FEED_IDLE_TIMEOUT", "300"))
+ORDER_FEED_MAX_WAIT = float(os.getenv("ORDER_FEED_MAX_WAIT", "30"))
+
+# Generic gateway proxy (/proxy/{path}) for any endpoint of the IBKR OpenAPI specification. The spec is
+# read from OPENAPI_FILE_PATH when that file exists, otherwise downloaded from OPEN_API_SPEC_URL and kept
+# under CACHE_DIR. Responses are streamed to the caller as they arrive. Off by default; POST/PUT/DELETE
+# are only exposed with PROXY_WRITE_ENABLED, and even then PROXY_DENIED_WRITE_PATHS (comma-separated
+# globs: order placement, modification and cancellation, reply prompts) stay reserved to their routers.
+# Operations whose spec tags belong to an excluded or non-included module are refused, and while any
+# module is disabled so are operations whose tags match no module.
+PROXY_ENABLED = os.getenv("PROXY_ENABLED", "false").lower() == "true"
+PROXY_WRITE_ENABLED = os.getenv("PROXY_WRITE_ENABLED", "false").lower() == "true"
+PROXY_DENIED_WRITE_PATHS = [pattern.strip() for pattern in os.getenv(
+    "PROXY_DENIED_WRITE_PATHS",
+    "/iserver/reply/*,/iserver/notification,/iserver/account/*/order*,/iserver/account/orders/*",
+).split(",") if pattern.strip()]
+OPEN_API_SPEC_URL = os.getenv("OPEN_API_SPEC_URL", "https://api.ibkr.com/gw/api/v3/api-docs")
+OPENAPI_FILE_PATH = os.getenv("OPENAPI_FILE_PATH", "openapi.json")
+OPENAPI_SPEC_CACHE_PATH = os.path.join(CACHE_DIR, "openapi.json")
+PROXY_TIMEOUT = float(os.getenv("PROXY_TIMEOUT", "60"))
+
+# Cached MCP tool manifest: the OpenAPI document FastMCP builds its tools from, reused across starts
+# while the routes, models, tag filters and library versions are unchanged. The Dockerfile builds it
+# into the image at the default path.
+TOOL_MANIFEST_CACHE_ENABLED = os.getenv("TOOL_MANIFEST_CACHE_ENABLED", "true").lower() == "true"
+TOOL_MANIFEST_PATH = os.getenv("TOOL_MANIFEST_PATH") or os.path.join(CACHE_DIR, "tool_manifest.json")
+
+# Prometheus metrics on /metrics: gateway requests, latency, bytes, errors and retries by router tag and
+# route, pacing waits and cache hit ratios.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
 # Create FastAPI object description based on filters
 base_description = """
 A comprehensive FastAPI wrapper for the Interactive Brokers Web API. 
@@ -67,8 +269,10 @@ ALL_MODULES = {
     "Orders": "Place, preview, modify, and cancel trading orders.",
     "Portfolio": "Get detailed information about account portfolios, including positions, allocation, summaries, and performance.",
     "Portfolio Analyst": "Access performance data and transaction history for accounts.",
+    "Proxy": "Call any endpoint of the IBKR Web API OpenAPI specification directly; the gateway response is streamed back unchanged.",
     "Scanner": "Run market scanners on both iServer and the Historical Market Data Service (HMDS).",
     "Session": "Manage the user's authentication session, including status checks, re-authentication, and logout.",
+    "Server": "Inspect the MCP server itself: gateway pacing queues, circuit breakers, latency statistics, caches and other internal state.",
     "Watchlists": "Create, delete, and manage watchlists and the contracts within them."
 }
 
@@ -1,8 +1,18 @@
 import os
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from fastmcp import FastMCP
 from fastmcp.server.openapi import RouteMap, MCPType
 from mcp_server.config import MCP_SERVER_HOST, MCP_SERVER_PORT, MCP_TRANSPORT_PROTOCOL, FINAL_DESCRIPTION, EXCLUDED_TAGS_SET
+from mcp_server.services.contract_cache import contract_cache
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.market_stream import market_stream
+from mcp_server.services.metrics import gateway_metrics, track_route
+from mcp_server.services.order_feed import order_feed
+from mcp_server.services.session_keeper import session_keeper
+from mcp_server.services.tool_manifest import tool_manifest
 
 # Import Router Files
 from routers import alerts
@@ -15,15 +25,44 @@ from routers import options_chains
 from routers import order_monitoring
 from routers import orders
 from routers import portfolio
+from routers import proxy
 from routers import scanner
+from routers import server
 from routers import session
 from routers import watchlists
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Opens the shared gateway client, session keeper and market data stream and starts the contract
+    cache preload (and the order feed poller when always on) on startup; releases them on shutdown.
+    """
+    await gateway.start()
+    await session_keeper.start(gateway)
+    await market_stream.start()
+    contract_cache.start_preload()
+    await order_feed.start()
+    try:
+        yield
+    finally:
+        await order_feed.stop()
+        await contract_cache.stop()
+        await market_stream.stop()
+        await session_keeper.stop()
+        await gateway.close()
+
+
 app = FastAPI(
     title="IBKR API",
     description=FINAL_DESCRIPTION,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Labels the gateway calls each handler makes with its router tag (services.metrics).
+    dependencies=[Depends(track_route)],
+    # orjson encodes the payloads that routers build or transform; untouched upstream bodies are
+    # forwarded as raw bytes by services.responses.passthrough.
+    default_response_class=ORJSONResponse
 )
 
 app.include_router(alerts.router)
@@ -36,10 +75,15 @@ app.include_router(options_chains.router)
 app.include_router(order_monitoring.router)
 app.include_router(orders.router)
 app.include_router(portfolio.router)
+app.include_router(proxy.router)
 app.include_router(scanner.router)
+app.include_router(server.router)
 app.include_router(session.router)
 app.include_router(watchlists.router)
 
+# Gateway metrics are labelled with the route templates of these routers (they mirror the gateway paths).
+gateway_metrics.register_routes(app.routes)
+
 
 route_maps_list = []
 
@@ -48,10 +92,18 @@ if EXCLUDED_TAGS_SET:
         route_maps_list.append(RouteMap(tags={tag_}, mcp_type=MCPType.EXCLUDE))
 
 
+# The OpenAPI document behind the tool list is loaded from the cached manifest when it is current.
+mcp_build_started = time.perf_counter()
+app.openapi_schema = tool_manifest.openapi(app, EXCLUDED_TAGS_SET)
+
+# FastMCP reaches the app through an in-process ASGI transport that never emits lifespan
+# events, so the app lifespan is handed to the MCP server to run once per process.
 mcp = FastMCP.from_fastapi(
     app=app,
     route_maps = route_maps_list,
+    lifespan=lambda _server: lifespan(app),
     )
+tool_manifest.record_startup(time.perf_counter() - mcp_build_started)
 
 if __name__ == "__main__":
     mcp.run(
@@ -3,7 +3,8 @@ from fastapi import APIRouter, Query, Body, Path
 from typing import List, Optional, Any
 import httpx
 from pydantic import BaseModel, Field, ConfigDict
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
 
 router = APIRouter()
 
@@ -70,15 +71,14 @@ async def get_alerts(
     """
     Retrieves all alerts associated with a given account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/{accountId}/alerts", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/iserver/account/{accountId}/alerts", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -94,19 +94,18 @@ async def create_or_modify_alert(
     """
     Creates a new alert or modifies an existing one for the specified account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/{accountId}/alert",
-                json=body.dict(exclude_none=True),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/{accountId}/alert",
+            json=body.dict(exclude_none=True),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.delete(
@@ -122,18 +121,17 @@ async def delete_alert(
     """
     Deletes a specific alert by its ID.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.delete(
-                f"{BASE_URL}/iserver/account/{accountId}/alert/{alertId}",
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.delete(
+            f"/iserver/account/{accountId}/alert/{alertId}",
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -146,15 +144,14 @@ async def get_mta_alert():
     """
     Fetches the Mobile Trading Assistant (MTA) alert for the current user.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/mta", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/account/mta", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/account/alert/activate",
@@ -166,16 +163,15 @@ async def activate_deactivate_alert(body: AlertActivationRequest = Body(...)):
     """
     Toggles the active status of an alert.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/alert/activate",
-                json=body.dict(),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            "/iserver/account/alert/activate",
+            json=body.dict(),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -1,9 +1,13 @@
 # contract.py
 from fastapi import APIRouter, Query, Body, Path
-from typing import List, Optional
+from fastapi.responses import Response
+from typing import Any, List, Optional
 import httpx
 from pydantic import BaseModel, Field, ConfigDict
-from mcp_server.config import BASE_URL
+from mcp_server.services.contract_cache import ContractFetcher, contract_cache
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
+from mcp_server.services.projection import project_response, PROJECTION_DESCRIPTION
 
 router = APIRouter()
 
@@ -24,6 +28,12 @@ class ContractRulesRequest(BaseModel):
     )
 
 
+async def _cached_contract_data(kind: str, conid: Any, side: str, fetch: ContractFetcher, variant: str = "") -> Response:
+    """Serves contract metadata from the contract cache; the X-Cache header tells whether the gateway was called."""
+    content, from_cache = await contract_cache.get(kind, conid, side, fetch, variant)
+    return Response(content=content, media_type="application/json", headers={"X-Cache": "hit" if from_cache else "miss"})
+
+
 # --- Contract Router Endpoints ---
 
 @router.get(
@@ -39,7 +49,7 @@ async def get_contract_algos(
     addParams: Optional[str] = Query(None, description="Set to 1 to receive algorithm parameters.")
 ):
     """
-    Retrieves a list of supported IB Algos for a given instrument.
+    Retrieves a list of supported IB Algos for a given instrument. Served from the contract cache when possible.
     """
     params = {}
     if algos:
@@ -49,15 +59,16 @@ async def get_contract_algos(
     if addParams:
         params["addParams"] = addParams
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/contract/{conid}/algos", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        return await _cached_contract_data(
+            "algos", conid, "any",
+            lambda: gateway.get(f"/iserver/contract/{conid}/algos", params=params, timeout=10),
+            variant="".join(f"_{key}-{value}" for key, value in sorted(params.items()))
+        )
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/contract/{conid}/info-and-rules",
@@ -70,18 +81,18 @@ async def get_contract_info_and_rules(
     isBuy: bool = Query(..., description="Side of the market: true for Buy, false for Sell.")
 ):
     """
-    Retrieves a combination of contract details and associated trading rules in a single call.
+    Retrieves a combination of contract details and associated trading rules in a single call. Served from the contract cache when possible.
     """
     params = {"isBuy": isBuy}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/contract/{conid}/info-and-rules", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        return await _cached_contract_data(
+            "info_and_rules", conid, contract_cache.side(isBuy),
+            lambda: gateway.get(f"/iserver/contract/{conid}/info-and-rules", params=params, timeout=10)
+        )
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -94,17 +105,17 @@ async def get_contract_info(
     conid: int = Path(..., description="The contract ID.")
 ):
     """
-    Retrieves detailed information about a specific contract using its conid.
+    Retrieves detailed information about a specific contract using its conid. Served from the contract cache when possible.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/contract/{conid}/info", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        return await _cached_contract_data(
+            "info", conid, "any",
+            lambda: gateway.get(f"/iserver/contract/{conid}/info", timeout=10)
+        )
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/secdef/bond-filters",
@@ -122,15 +133,14 @@ async def get_bond_filters(
         "symbol": "BOND",
         "issuerId": issuerId
     }
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/secdef/bond-filters", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/secdef/bond-filters", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/secdef/currency",
@@ -145,15 +155,14 @@ async def search_currency_pairs(
     Retrieves information about a currency pair. Corresponds to the user's request for /iserver/currency/pairs.
     """
     params = {"symbol": symbol}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/secdef/currency", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/secdef/currency", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/secdef/info",
@@ -182,15 +191,14 @@ async def get_secdef_info(
     if right:
         params["right"] = right
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/secdef/info", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/secdef/info", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/secdef/search",
@@ -202,7 +210,8 @@ async def get_secdef_info(
 async def search_contract_by_symbol_or_name(
     symbol: str = Query(..., description="The symbol or company name to search for."),
     name: Optional[bool] = Query(False, description="Set to true to search by company name instead of symbol."),
-    secType: Optional[str] = Query(None, description="The security type to filter by (e.g., STK, OPT, FUT).")
+    secType: Optional[str] = Query(None, description="The security type to filter by (e.g., STK, OPT, FUT)."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
 ):
     """
     Searches for contracts based on a symbol or name. This is a primary method for finding a contract's conid.
@@ -213,15 +222,14 @@ async def search_contract_by_symbol_or_name(
     if secType:
         params["secType"] = secType
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/secdef/search", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/secdef/search", params=params, timeout=10)
+        response.raise_for_status()
+        return project_response(response, projection, "/iserver/secdef/search")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/contract/rules",
@@ -231,21 +239,17 @@ async def search_contract_by_symbol_or_name(
 )
 async def get_contract_rules(body: ContractRulesRequest = Body(...)):
     """
-    Fetches the trading rules for a given contract, such as order types and sizes.
+    Fetches the trading rules for a given contract, such as order types and sizes. Served from the contract cache when possible.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/contract/rules",
-                json=body.dict(),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        return await _cached_contract_data(
+            "rules", body.conid, contract_cache.side(body.isBuy),
+            lambda: gateway.post("/iserver/contract/rules", json=body.dict(), timeout=10)
+        )
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/secdef/strikes",
@@ -266,15 +270,14 @@ async def get_strikes(
     if exchange:
         params["exchange"] = exchange
         
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/secdef/strikes", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/secdef/strikes", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/trsrv/futures",
@@ -289,15 +292,14 @@ async def get_trsrv_futures_by_symbol(
     Get detailed information about futures contracts for given symbols.
     """
     params = {"symbols": symbols}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/trsrv/futures", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/trsrv/futures", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/trsrv/secdef",
@@ -312,15 +314,14 @@ async def get_secdef_by_conids(
     Retrieves security definitions for one or more contracts.
     """
     params = {"conids": conids}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/trsrv/secdef", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/trsrv/secdef", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/trsrv/stocks",
@@ -335,15 +336,14 @@ async def get_stocks_by_symbol(
     Fetches stock contracts for a list of symbols. This is more direct than a general search if you know you are looking for stocks.
     """
     params = {"symbols": symbols}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/trsrv/stocks", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/trsrv/stocks", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/trsrv/secdef/schedule",
@@ -366,12 +366,11 @@ async def get_trading_schedule(
     if exchangeFilter:
         params["exchangeFilter"] = exchangeFilter
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/trsrv/secdef/schedule", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/trsrv/secdef/schedule", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
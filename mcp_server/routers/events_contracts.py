@@ -1,7 +1,8 @@
 # events_contracts.py
 from fastapi import APIRouter, Query
 import httpx
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
 
 router = APIRouter()
 
@@ -20,15 +21,14 @@ async def get_events_contracts(
     Fetches event contracts for the specified conids. Event contracts are contracts that settle based on the outcome of a future event.
     """
     params = {"conids": conids}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/events/contracts", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/events/contracts", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/events/show",
@@ -43,12 +43,11 @@ async def show_event_contract(
     Retrieves the details for a specific event contract.
     """
     params = {"conid": conid}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/events/show", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/events/show", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
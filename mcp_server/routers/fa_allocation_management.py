@@ -3,7 +3,8 @@ from fastapi import APIRouter, Body
 from typing import List
 import httpx
 from pydantic import BaseModel, Field, ConfigDict
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
 
 router = APIRouter()
 
@@ -48,15 +49,14 @@ async def get_fa_groups():
     """
     Retrieves all FA groups for the advisor. These groups are used for trade allocation.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/fa/groups", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/fa/groups", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/fa/groups",
@@ -68,20 +68,19 @@ async def create_fa_group(body: FAGroup = Body(...)):
     """
     Creates a new FA group with a specified allocation method and accounts.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            # The API documentation implies the list of accounts is sent directly as the body.
-            # We'll structure it based on the Pydantic model, which aligns with common REST practices.
-            # The actual JSON sent will be the list of FAGroup models if the API expects a list.
-            # For a single group creation, sending the single object's dict is correct.
-            response = await client.post(
-                f"{BASE_URL}/fa/groups",
-                json=[body.dict()], # The doc example suggests sending a list containing one group object
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        # The API documentation implies the list of accounts is sent directly as the body.
+        # We'll structure it based on the Pydantic model, which aligns with common REST practices.
+        # The actual JSON sent will be the list of FAGroup models if the API expects a list.
+        # For a single group creation, sending the single object's dict is correct.
+        response = await gateway.post(
+            "/fa/groups",
+            json=[body.dict()], # The doc example suggests sending a list containing one group object
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -3,7 +3,8 @@ from fastapi import APIRouter, Body, Path, Query
 from typing import List, Optional
 import httpx
 from pydantic import BaseModel, Field, ConfigDict
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
 
 router = APIRouter()
 
@@ -44,15 +45,14 @@ async def get_fyi_unread_number():
     """
     Retrieves the count of unread notifications.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/fyi/unreadnumber", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/fyi/unreadnumber", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/fyi/deliveryoptions",
@@ -64,15 +64,14 @@ async def get_fyi_delivery_options():
     """
     Fetches the available FYI delivery options.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/fyi/deliveryoptions", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/fyi/deliveryoptions", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -85,15 +84,14 @@ async def configure_fyi_delivery_options(body: DeliveryOptionsRequest = Body(...
     """
     Enables or disables a specific FYI delivery option.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/fyi/deliveryoptions", json=body.dict(), timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/fyi/deliveryoptions", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.put(
@@ -106,15 +104,14 @@ async def configure_device_delivery_options(body: DeviceDeliveryOptionsRequest =
     """
     Configures FYI notifications for a specific device.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.put(f"{BASE_URL}/fyi/deliveryoptions/device", json=body.dict(), timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.put("/fyi/deliveryoptions/device", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -127,15 +124,14 @@ async def get_fyi_settings(body: FYISettingsGetRequest = Body(...)):
     """
     Retrieves the settings for a list of disclaimer type notifications.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/fyi/settings", json=body.dict(), timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/fyi/settings", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.put(
@@ -151,15 +147,14 @@ async def configure_fyi_setting(
     """
     Enables or disables a specific FYI setting by its type code.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.put(f"{BASE_URL}/fyi/settings/{typecode}", json=body.dict(), timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.put(f"/fyi/settings/{typecode}", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.delete(
@@ -173,17 +168,15 @@ async def mark_notifications_as_read(body: MarkReadRequest = Body(...)):
     Marks one or more notifications as read by their IDs.
     Note: The documentation specifies using a DELETE method with a request body.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            # Using request to handle DELETE with body, as httpx.delete doesn't directly support it.
-            request = client.build_request("DELETE", f"{BASE_URL}/fyi/notifications", json=body.dict())
-            response = await client.send(request, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        # gateway.delete goes through client.request, which (unlike httpx.delete) accepts a body.
+        response = await gateway.delete("/fyi/notifications", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -206,12 +199,11 @@ async def get_notifications(
     if include:
         params["include"] = include
         
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/fyi/notifications", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/fyi/notifications", params=params, timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -3,7 +3,14 @@ from fastapi import APIRouter, Query, Body, Path
 from typing import List, Dict, Any, Union, Optional
 import httpx
 from pydantic import BaseModel, Field
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
+from mcp_server.services.snapshot_cache import snapshot_service
+from mcp_server.services.request_batcher import md_snapshot_batcher
+from mcp_server.services.market_stream import market_stream
+from mcp_server.services.tick_store import tick_store
+from mcp_server.services.bar_store import bar_store
+from mcp_server.services.hmds_session import hmds_session
 
 router = APIRouter()
 
@@ -14,6 +21,12 @@ class UnsubscribeRequest(BaseModel):
     conid: str = Field(..., description="The contract ID to unsubscribe from.")
 
 
+class StreamSubscriptionRequest(BaseModel):
+    """Request model for adding conids to, or removing them from, the market data stream."""
+    conids: List[str] = Field(..., description="The contract IDs to stream.")
+    fields: Optional[List[str]] = Field(None, description="Field codes to stream. Defaults to STREAMING_FIELDS.")
+
+
 # --- Market Data Field and Availability Information ---
 
 MARKET_DATA_FIELDS = [
@@ -112,19 +125,15 @@ async def get_marketdata_snapshot(
 ) -> List[Dict[str, Any]]:
     """
     ### Get Market Data Snapshot
-    Fetches a snapshot of market data. This endpoint is called twice internally to ensure data retrieval.
+    Fetches a snapshot of market data. Conids that are not yet subscribed are primed with one extra call;
+    repeat requests within a short TTL are answered from memory. Each item's `_source` is "cache" or "gateway".
     """
-    params = {"conids": conids, "fields": fields}
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            await client.get(f"{BASE_URL}/iserver/marketdata/snapshot", params=params, timeout=10)
-            response = await client.get(f"{BASE_URL}/iserver/marketdata/snapshot", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        return await snapshot_service.get_snapshot(conids.split(","), fields.split(","))
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/md/snapshot",
@@ -136,18 +145,26 @@ async def get_md_snapshot(
     conids: str = Query(..., description="A comma-separated list of contract IDs."),
     fields: Optional[str] = Query(None, description="A comma-separated list of field codes.")
 ):
-    params = {"conids": conids}
-    if fields:
-        params["fields"] = fields
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/md/snapshot", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    """
+    Conids on the market data stream are answered from the tick store. The rest are fetched in one upstream
+    call shared with concurrent requests; each caller receives only its own conids and fields.
+    """
+    conid_list = [c.strip() for c in conids.split(",") if c.strip()]
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    streamed = {conid: tick_store.quote(conid, set(field_list) if field_list else None) for conid in conid_list}
+    to_fetch = [conid for conid, item in streamed.items() if item is None]
+    if not to_fetch:
+        return list(streamed.values())
+    try:
+        fetched = await md_snapshot_batcher.fetch(to_fetch, field_list)
+        if len(to_fetch) == len(conid_list) or not isinstance(fetched, list):
+            return fetched
+        by_conid = {str(item.get("conid", "")): item for item in fetched}
+        return [streamed[conid] or by_conid[conid] for conid in conid_list if streamed[conid] or conid in by_conid]
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -164,26 +181,31 @@ async def get_marketdata_history(
     outsideRth: Optional[bool] = Query(False, description="Set to true to include data outside regular trading hours."),
     barType: Optional[str] = Query("trades", description="The type of data to return, e.g., 'trades', 'midpoint'.")
 ):
-    params = {
-        "conid": conid,
-        "period": period,
-        "outsideRth": str(outsideRth).lower()
-    }
-    if bar:
-        params["bar"] = bar
-    if exchange:
-        params["exchange"] = exchange
-    if barType:
-        params["barType"] = barType
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/marketdata/history", params=params, timeout=20)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    """
+    Bars are served from the local bar store; only the missing recent tail is requested from the gateway.
+    """
+    async def fetch(fetch_period: str):
+        params = {
+            "conid": conid,
+            "period": fetch_period,
+            "outsideRth": str(outsideRth).lower()
+        }
+        if bar:
+            params["bar"] = bar
+        if exchange:
+            params["exchange"] = exchange
+        if barType:
+            params["barType"] = barType
+        response = await gateway.get("/iserver/marketdata/history", params=params, timeout=20)
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        return await bar_store.get_history("iserver", conid, period, bar, barType, outsideRth, fetch, exchange=exchange)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -201,29 +223,34 @@ async def get_hmds_history(
     startTime: Optional[str] = Query(None, description="Specify the start time of the query in 'YYYYMMDD-hh:mm:ss' format.")
 ):
     """
-    Fetches deeper historical market data using the HMDS. It first calls /hmds/auth/init to authenticate the session.
+    Fetches deeper historical market data using the HMDS. The HMDS session is initialised once and re-initialised only on auth failures.
+    Requests without a startTime are served from the local bar store, fetching only the missing recent tail.
     """
-    params = {
-        "conid": conid,
-        "period": period,
-        "outsideRth": str(outsideRth).lower()
-    }
-    if bar:
-        params["bar"] = bar
-    if barType:
-        params["barType"] = barType
-    if startTime:
-        params["startTime"] = startTime
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            await client.get(f"{BASE_URL}/hmds/auth/init", timeout=10)
-            response = await client.get(f"{BASE_URL}/hmds/history", params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    async def fetch(fetch_period: str):
+        params = {
+            "conid": conid,
+            "period": fetch_period,
+            "outsideRth": str(outsideRth).lower()
+        }
+        if bar:
+            params["bar"] = bar
+        if barType:
+            params["barType"] = barType
+        if startTime:
+            params["startTime"] = startTime
+        response = await hmds_session.get("/hmds/history", params=params, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        if startTime:
+            # Anchored to a past start time rather than "now": not a tail request, go straight to the gateway.
+            return await fetch(period)
+        return await bar_store.get_history("hmds", conid, period, bar, barType, outsideRth, fetch)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/marketdata/unsubscribe",
@@ -232,15 +259,15 @@ async def get_hmds_history(
     description="Unsubscribes from a specific market data feed."
 )
 async def unsubscribe_market_data(body: UnsubscribeRequest = Body(...)):
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/iserver/marketdata/unsubscribe", json=body.dict(), timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/iserver/marketdata/unsubscribe", json=body.dict(), timeout=10)
+        response.raise_for_status()
+        snapshot_service.forget(body.conid)
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -250,12 +277,60 @@ async def unsubscribe_market_data(body: UnsubscribeRequest = Body(...)):
     description="Unsubscribes from all current market data subscriptions."
 )
 async def unsubscribe_all_market_data():
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/iserver/marketdata/unsubscribeall", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/iserver/marketdata/unsubscribeall", timeout=10)
+        response.raise_for_status()
+        snapshot_service.reset()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+
+@router.get(
+    "/md/stream/status",
+    tags=["Market Data"],
+    summary="Market Data Stream Status",
+    description="Returns the WebSocket market data stream's connection state, subscribed conids and tick store statistics."
+)
+async def get_market_stream_status() -> Dict[str, Any]:
+    return market_stream.status()
+
+
+@router.post(
+    "/md/stream/subscribe",
+    tags=["Market Data"],
+    summary="Subscribe Conids to the Market Data Stream",
+    description="Adds conids to the WebSocket market data stream. Snapshots for streamed conids are then served from memory."
+)
+async def subscribe_market_stream(body: StreamSubscriptionRequest = Body(...)) -> Dict[str, Any]:
+    if not market_stream.enabled:
+        return {"error": "Streaming Disabled", "detail": "Set STREAMING_ENABLED=true to use the market data stream."}
+    subscriptions = await market_stream.subscribe(body.conids, body.fields)
+    return {"subscribed": subscriptions}
+
+
+@router.post(
+    "/md/stream/unsubscribe",
+    tags=["Market Data"],
+    summary="Unsubscribe Conids from the Market Data Stream",
+    description="Removes conids from the WebSocket market data stream and drops their buffered ticks."
+)
+async def unsubscribe_market_stream(body: StreamSubscriptionRequest = Body(...)) -> Dict[str, Any]:
+    subscriptions = await market_stream.unsubscribe(body.conids)
+    return {"subscribed": subscriptions}
+
+
+@router.get(
+    "/md/stream/ticks/{conid}",
+    tags=["Market Data"],
+    summary="Recent Streamed Ticks",
+    description="Returns the buffered numeric ticks for a streamed conid, oldest first."
+)
+async def get_stream_ticks(
+    conid: str = Path(..., description="The contract ID."),
+    field: Optional[int] = Query(None, description="Only return ticks for this field code (e.g. 31 for last price)."),
+    since: Optional[int] = Query(None, description="Only return ticks after this epoch time in milliseconds.")
+) -> List[Dict[str, Any]]:
+    return tick_store.ticks_for(conid, field, since)
@@ -1,11 +1,65 @@
 # options_chains.py
-from fastapi import APIRouter, Query
-from typing import Optional
+import time
+from datetime import date, datetime
+from fastapi import APIRouter, Body, Query
+from typing import Any, Dict, List, Optional
 import httpx
-from mcp_server.config import BASE_URL
+import numpy as np
+from pydantic import BaseModel, Field
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.option_analytics import analyse_chain
+from mcp_server.services.responses import json_response, passthrough
+from mcp_server.services.snapshot_cache import snapshot_service
+from mcp_server.services.tick_store import parse_value
 
 router = APIRouter()
 
+# --- Pydantic Models ---
+
+class OptionContract(BaseModel):
+    """A single option to analyse."""
+    conid: Optional[int] = Field(None, description="Contract ID, echoed back in the result.")
+    strike: float = Field(..., description="The strike price.")
+    expiry: str = Field(..., description="The expiration date in YYYYMMDD format.")
+    right: str = Field(..., description="'C' for Call or 'P' for Put.")
+    price: Optional[float] = Field(None, description="Market price used to solve implied volatility (e.g. last or mid).")
+    bid: Optional[float] = Field(None, description="Bid; with `ask`, the mid is used when `price` is not given.")
+    ask: Optional[float] = Field(None, description="Ask; with `bid`, the mid is used when `price` is not given.")
+
+class OptionChainGrid(BaseModel):
+    """Strikes per expiry as returned by /iserver/secdef/strikes, expanded to every expiry x strike x right."""
+    expiries: List[str] = Field(..., description="Expiration dates in YYYYMMDD format.")
+    call: List[float] = Field(default_factory=list, description="Call strikes.")
+    put: List[float] = Field(default_factory=list, description="Put strikes.")
+
+class OptionAnalyticsRequest(BaseModel):
+    """Request model for option chain analytics."""
+    underlying_price: Optional[float] = Field(None, description="Underlying price. If omitted, the last price of `underlying_conid` is fetched.")
+    underlying_conid: Optional[str] = Field(None, description="Underlying contract ID used to look up the last price.")
+    contracts: Optional[List[OptionContract]] = Field(None, description="Options with market prices, for implied volatility and Greeks.")
+    chain: Optional[OptionChainGrid] = Field(None, description="A strike grid to value at `volatility` (no market prices needed).")
+    volatility: Optional[float] = Field(None, description="Annualised volatility (0.25 = 25%) for contracts without a usable market price.")
+    rate: float = Field(0.0, description="Continuously compounded risk-free rate (0.05 = 5%).")
+    dividend_yield: float = Field(0.0, description="Continuous dividend yield (0.01 = 1%).")
+    valuation_date: Optional[str] = Field(None, description="Valuation date in YYYYMMDD format. Defaults to today.")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "underlying_price": 189.5,
+                "rate": 0.05,
+                "contracts": [
+                    {"strike": 185, "expiry": "20261120", "right": "C", "bid": 8.1, "ask": 8.3},
+                    {"strike": 185, "expiry": "20261120", "right": "P", "price": 3.05}
+                ]
+            }
+        }
+    }
+
+
+def _clean(values: np.ndarray, decimals: int = 6) -> List[Optional[float]]:
+    return [None if not np.isfinite(v) else v for v in np.round(values.astype(float), decimals).tolist()]
+
 # --- Options Chains Router Endpoints ---
 
 @router.get(
@@ -37,12 +91,82 @@ async def get_options_chains(
     if chainType:
         params["chainType"] = chainType
 
-    async with httpx.AsyncClient(verify=False) as client:
+    try:
+        response = await gateway.get("/trsrv/secdef/chains", params=params, timeout=30)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+
+@router.post(
+    "/options/analytics",
+    tags=["Options Chains"],
+    summary="Option Chain Analytics (Black-Scholes)",
+    description="Computes implied volatility, Black-Scholes theoretical prices and Greeks (delta, gamma, vega, theta, rho) for every contract of an option chain in a single vectorized pass."
+)
+async def get_option_analytics(body: OptionAnalyticsRequest = Body(...)):
+    """
+    Pass `contracts` with market prices (or bid/ask) to solve implied volatility, and/or a `chain` strike grid
+    with a `volatility` to value it. Vega is per 1 volatility point, theta per calendar day and rho per 1% rate move.
+    """
+    if not body.contracts and not body.chain:
+        return {"error": "Invalid Request", "detail": "Provide `contracts`, `chain`, or both."}
+
+    underlying_price = body.underlying_price
+    if underlying_price is None:
+        if not body.underlying_conid:
+            return {"error": "Invalid Request", "detail": "Provide `underlying_price` or `underlying_conid`."}
         try:
-            response = await client.get(f"{BASE_URL}/trsrv/secdef/chains", params=params, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            quotes = await snapshot_service.get_snapshot([body.underlying_conid], ["31"])
         except httpx.HTTPStatusError as exc:
             return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
         except httpx.RequestError as exc:
             return {"error": "Request Error", "detail": str(exc)}
+        last = parse_value(quotes[0].get("31")) if isinstance(quotes, list) and quotes else None
+        if not last:
+            return {"error": "No Underlying Price", "detail": f"No last price available for conid {body.underlying_conid}."}
+        underlying_price = last
+
+    rows: List[Dict[str, Any]] = []
+    for contract in body.contracts or []:
+        price = contract.price
+        if price is None and contract.bid is not None and contract.ask is not None:
+            price = (contract.bid + contract.ask) / 2
+        rows.append({"conid": contract.conid, "strike": contract.strike, "expiry": contract.expiry,
+                     "right": contract.right.upper()[:1], "market_price": price})
+    if body.chain:
+        for expiry in body.chain.expiries:
+            for right, strikes in (("C", body.chain.call), ("P", body.chain.put)):
+                rows.extend({"conid": None, "strike": k, "expiry": expiry, "right": right, "market_price": None} for k in strikes)
+
+    try:
+        valuation_date = datetime.strptime(body.valuation_date, "%Y%m%d").date() if body.valuation_date else date.today()
+        started = time.perf_counter()
+        analytics = analyse_chain(
+            underlying_price,
+            [row["strike"] for row in rows],
+            [row["expiry"] for row in rows],
+            [row["right"] for row in rows],
+            [row["market_price"] for row in rows],
+            volatility=body.volatility,
+            rate=body.rate,
+            dividend_yield=body.dividend_yield,
+            valuation_date=valuation_date,
+        )
+        compute_ms = (time.perf_counter() - started) * 1000
+    except ValueError as exc:
+        return {"error": "Invalid Request", "detail": str(exc)}
+
+    columns = {name: _clean(values) for name, values in analytics.items()}
+    results = [{**row, **{name: column[i] for name, column in columns.items()}} for i, row in enumerate(rows)]
+    return json_response({
+        "underlying_price": underlying_price,
+        "valuation_date": valuation_date.strftime("%Y%m%d"),
+        "contracts": len(rows),
+        "implied_volatility_solved": int(np.isfinite(analytics["implied_volatility"]).sum()),
+        "compute_ms": round(compute_ms, 3),
+        "results": results,
+    })
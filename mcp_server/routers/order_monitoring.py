@@ -2,7 +2,11 @@
 from fastapi import APIRouter, Query, Path
 from typing import Optional
 import httpx
-from mcp_server.config import BASE_URL
+from mcp_server.config import ORDER_FEED_MAX_WAIT
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.order_feed import order_feed
+from mcp_server.services.responses import json_response, passthrough
+from mcp_server.services.projection import apply_projection, project_response, PROJECTION_DESCRIPTION
 
 router = APIRouter()
 
@@ -22,7 +26,8 @@ async def get_live_orders(
     force: Optional[bool] = Query(
         default=False,
         description="Set to true to clear the cache of orders and fetch an updated list."
-    )
+    ),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
 ):
     """
     Fetches all live orders from the IBKR API. This endpoint provides a comprehensive view of order activity.
@@ -33,15 +38,35 @@ async def get_live_orders(
     if force:
         params["force"] = str(force).lower()
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/orders", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/account/orders", params=params, timeout=10)
+        response.raise_for_status()
+        return project_response(response, projection, "/iserver/account/orders")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+
+@router.get(
+    "/iserver/account/orders/changes",
+    tags=["Order Monitoring"],
+    summary="Live Order Changes",
+    description="Returns only the live orders that changed since a version number, waiting up to `timeout` seconds for a change when there is none yet. Start with since=0 to get the current order book, then pass the returned `version` on the next call. Orders that dropped off the list are listed in `removed`."
+)
+async def get_live_order_changes(
+    since: int = Query(0, ge=0, description="The `version` returned by the previous call; 0 for the full current order book."),
+    timeout: float = Query(20, ge=0, description="Seconds to wait for a change before returning an empty result."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
+):
+    """
+    Long-polls the server-side order book, which is refreshed in the background. If `reset` is true the
+    server restarted and the result is the full book: discard the local copy and resync from it.
+    """
+    feed = await order_feed.changes(since, min(timeout, ORDER_FEED_MAX_WAIT))
+    # Orders are trimmed with the same default projection as /iserver/account/orders.
+    feed["orders"] = apply_projection({"orders": feed["orders"]}, projection, "/iserver/account/orders").get("orders", [])
+    return json_response(feed)
 
 
 @router.get(
@@ -56,15 +81,14 @@ async def get_order_status(
     """
     Fetches the latest status for a specific order. This is useful for tracking the lifecycle of an individual order.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/order/status/{orderId}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/iserver/account/order/status/{orderId}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -74,7 +98,8 @@ async def get_order_status(
     description="Returns a list of trades for the currently selected account for the current and previous six days."
 )
 async def get_trades(
-    days: Optional[str] = Query(None, description="Number of days to retrieve trades for, up to a maximum of 7.")
+    days: Optional[str] = Query(None, description="Number of days to retrieve trades for, up to a maximum of 7."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
 ):
     """
     Retrieves a list of recent trades, providing a history of executed orders.
@@ -83,12 +108,11 @@ async def get_trades(
     if days:
         params["days"] = days
         
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/trades", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/account/trades", params=params, timeout=10)
+        response.raise_for_status()
+        return project_response(response, projection, "/iserver/account/trades")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
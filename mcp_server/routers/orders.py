@@ -3,7 +3,9 @@ from fastapi import APIRouter, Query, Body, Path
 from typing import Optional, List, Dict, Any
 import httpx
 from pydantic import BaseModel, Field
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.order_confirmation import resolve_replies
+from mcp_server.services.responses import decode, json_response, passthrough
 
 router = APIRouter()
 
@@ -43,6 +45,13 @@ class ReplyRequest(BaseModel):
     confirmed: bool = Field(..., description="Set to true to confirm and submit the order.")
 
 
+AUTO_CONFIRM_DESCRIPTION = (
+    "Set to true to answer the gateway's confirmation prompts server-side and return the final order ID in one call. "
+    "Only prompts whose message IDs are in the server's allow-list are confirmed; any other prompt is returned with "
+    "status 'confirmation_required' and its reply_id, to be answered with /iserver/reply/{replyId}."
+)
+
+
 # --- Orders Router Endpoints ---
 
 @router.post(
@@ -53,24 +62,29 @@ class ReplyRequest(BaseModel):
 )
 async def place_order(
     accountId: str = Path(..., description="The account ID to place the order for."),
-    body: OrdersRequest = Body(...)
+    body: OrdersRequest = Body(...),
+    auto_confirm: bool = Query(False, description=AUTO_CONFIRM_DESCRIPTION)
 ):
     """
     Places one or more orders for the specified account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/{accountId}/orders",
-                json=body.dict(exclude_none=True),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/{accountId}/orders",
+            json=body.dict(exclude_none=True),
+            timeout=10
+        )
+        response.raise_for_status()
+        if auto_confirm:
+            return json_response(await resolve_replies(decode(response)))
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+    except ValueError as exc:
+        # The order answer was not JSON, so no prompt has been answered yet.
+        return {"error": "Invalid Response", "detail": f"The gateway returned a non-JSON body: {exc}", "confirmed": []}
 
 
 @router.post(
@@ -86,19 +100,18 @@ async def preview_order(
     """
     Previews an order to see its potential impact on the account before placing it.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/{accountId}/orders/whatif",
-                json=body.dict(exclude_none=True),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/{accountId}/orders/whatif",
+            json=body.dict(exclude_none=True),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -110,24 +123,29 @@ async def preview_order(
 async def modify_order(
     accountId: str = Path(..., description="The account ID of the order."),
     orderId: str = Path(..., description="The order ID of the order to modify."),
-    body: OrderModel = Body(...)
+    body: OrderModel = Body(...),
+    auto_confirm: bool = Query(False, description=AUTO_CONFIRM_DESCRIPTION)
 ):
     """
     Modifies an existing active order. The request body should contain the updated order details.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/{accountId}/order/{orderId}",
-                json=body.dict(exclude_none=True),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/{accountId}/order/{orderId}",
+            json=body.dict(exclude_none=True),
+            timeout=10
+        )
+        response.raise_for_status()
+        if auto_confirm:
+            return json_response(await resolve_replies(decode(response)))
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+    except ValueError as exc:
+        # The order answer was not JSON, so no prompt has been answered yet.
+        return {"error": "Invalid Response", "detail": f"The gateway returned a non-JSON body: {exc}", "confirmed": []}
 
 
 @router.delete(
@@ -143,18 +161,17 @@ async def cancel_order(
     """
     Cancels an active order by its ID.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.delete(
-                f"{BASE_URL}/iserver/account/{accountId}/order/{orderId}",
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.delete(
+            f"/iserver/account/{accountId}/order/{orderId}",
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -170,16 +187,15 @@ async def place_order_reply(
     """
     Confirms an order that requires a secondary confirmation (e.g., due to price or size constraints).
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/reply/{replyId}",
-                json=body.dict(),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/reply/{replyId}",
+            json=body.dict(),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -1,9 +1,18 @@
 # portfolio.py
+import asyncio
+import time
+from datetime import datetime, timezone
 from fastapi import APIRouter, Body, Path, Query
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 import httpx
+import orjson
 from pydantic import BaseModel, Field
-from mcp_server.config import BASE_URL
+from mcp_server.config import ACCOUNT_FANOUT_CONCURRENCY, POSITIONS_PAGE_CONCURRENCY
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.positions import iter_position_pages
+from mcp_server.services.responses import decode, json_response, passthrough
+from mcp_server.services.projection import apply_projection, project_response, PROJECTION_DESCRIPTION
 
 router = APIRouter()
 
@@ -14,6 +23,165 @@ class AccountAllocationRequest(BaseModel):
     acctIds: List[str] = Field(..., description="List of account IDs to retrieve allocation for.")
 
 
+class AccountBatchRequest(BaseModel):
+    """Request model for reading several accounts in one call."""
+    acctIds: Optional[List[str]] = Field(None, description="Account IDs to read. Omit it (or pass [\"all\"]) to read every sub-account.")
+    sections: List[str] = Field(["summary", "ledger", "positions"], description="Data to fetch for each account: any of summary, ledger, positions.")
+
+
+# The two models below mirror Position / PortfolioSnapshot in app/models/agent_data.py so that the
+# ibkr_reader_agent can hand the composite snapshot over without reshaping it.
+
+class SnapshotPosition(BaseModel):
+    """Individual position in the portfolio snapshot."""
+    symbol: str = Field(..., description="Ticker symbol (e.g., AAPL).")
+    conid: Optional[int] = Field(None, description="IBKR contract ID.")
+    quantity: float = Field(..., description="Number of shares or contracts held.")
+    market_value: float = Field(..., description="Current market value.")
+    average_cost: Optional[float] = Field(None, description="Average cost per share.")
+    unrealized_pnl: Optional[float] = Field(None, description="Unrealized profit/loss.")
+    unrealized_pnl_percent: Optional[float] = Field(None, description="Unrealized PnL as a percentage of cost basis.")
+    sector: Optional[str] = Field(None, description="Sector classification.")
+
+
+class PortfolioSnapshotResponse(BaseModel):
+    """Composite portfolio snapshot built from accounts, summary, ledger, positions and allocation."""
+    account_id: str = Field(..., description="IBKR account ID.")
+    timestamp: datetime = Field(..., description="Snapshot timestamp (UTC).")
+    positions: List[SnapshotPosition] = Field(default_factory=list, description="All positions.")
+    total_market_value: float = Field(..., description="Net liquidation value of the account.")
+    cash: float = Field(..., description="Total cash value.")
+    buying_power: Optional[float] = Field(None, description="Available buying power.")
+    realized_pnl: Optional[float] = Field(None, description="Realized PnL (base currency).")
+    unrealized_pnl: Optional[float] = Field(None, description="Total unrealized PnL (base currency).")
+    allocation: Optional[Dict[str, Any]] = Field(None, description="Raw allocation by asset class, sector and group.")
+    errors: List[str] = Field(default_factory=list, description="Upstream calls that failed; their fields are left empty.")
+
+
+# --- Helpers ---
+
+# /portfolio/subaccounts lists at most this many accounts; larger structures are paged by /portfolio/subaccounts2.
+SUBACCOUNTS_LIMIT = 100
+
+# Section of /portfolio/accounts/batch -> route whose default projection applies to it.
+ACCOUNT_SECTIONS = {
+    "summary": "/portfolio/{accountId}/summary",
+    "ledger": "/portfolio/{accountId}/ledger",
+    "positions": "/portfolio/{accountId}/positions/all",
+}
+
+
+async def _get_json(path: str) -> Any:
+    response = await gateway.get(path, timeout=10)
+    response.raise_for_status()
+    return decode(response)
+
+
+async def _all_positions(accountId: str, concurrency: int = POSITIONS_PAGE_CONCURRENCY) -> List[Dict[str, Any]]:
+    positions = []
+    async for page in iter_position_pages(accountId, {}, concurrency):
+        positions.extend(page)
+    return positions
+
+
+def _error_line(name: str, exc: BaseException) -> str:
+    return f"{name}: {str(exc).splitlines()[0] if str(exc) else type(exc).__name__}"
+
+
+async def _list_account_ids() -> List[str]:
+    """
+    Every account the user can read: the sub-accounts of a tiered structure (paging through
+    /portfolio/subaccounts2 when there are more than /portfolio/subaccounts returns), otherwise
+    /portfolio/accounts. One of these calls must precede the other /portfolio endpoints anyway.
+    """
+    try:
+        accounts = await _get_json("/portfolio/subaccounts")
+    except httpx.HTTPStatusError:
+        accounts = None
+    if isinstance(accounts, list) and len(accounts) >= SUBACCOUNTS_LIMIT:
+        accounts, page = [], 0
+        while True:
+            response = await gateway.get("/portfolio/subaccounts2", params={"page": page}, timeout=30)
+            response.raise_for_status()
+            payload = decode(response)
+            rows = payload.get("subaccounts") or [] if isinstance(payload, dict) else []
+            accounts.extend(rows)
+            total = (payload.get("metadata") or {}).get("total", 0) if isinstance(payload, dict) else 0
+            if not rows or len(accounts) >= total:
+                break
+            page += 1
+    if not isinstance(accounts, list) or not accounts:
+        accounts = await _get_json("/portfolio/accounts")
+    account_ids = [account.get("accountId") or account.get("id") for account in accounts if isinstance(account, dict)]
+    return [str(accountId) for accountId in account_ids if accountId]
+
+
+async def _read_account(accountId: str, sections: List[str], projection: Optional[str]) -> Dict[str, Any]:
+    """Fetches the requested sections of one account concurrently; a failed section is reported in `errors`."""
+    started = time.perf_counter()
+    fetchers = {
+        "summary": lambda: _get_json(f"/portfolio/{accountId}/summary"),
+        "ledger": lambda: _get_json(f"/portfolio/{accountId}/ledger"),
+        "positions": lambda: _all_positions(accountId),
+    }
+    results = await asyncio.gather(*(fetchers[section]() for section in sections), return_exceptions=True)
+    entry: Dict[str, Any] = {"accountId": accountId}
+    errors = []
+    for section, result in zip(sections, results):
+        if isinstance(result, Exception):
+            errors.append(_error_line(section, result))
+            entry[section] = None
+        else:
+            # The caller's field list is meant for positions, as on /positions/all; "*" turns off every default.
+            section_projection = projection if section == "positions" or (projection or "").strip() == "*" else None
+            entry[section] = apply_projection(result, section_projection, ACCOUNT_SECTIONS[section])
+    entry["errors"] = errors
+    entry["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return entry
+
+
+async def _read_accounts(account_ids: List[str], sections: List[str], projection: Optional[str], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """Reads up to `concurrency` accounts at a time and yields each one as soon as it is complete."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def read(accountId: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _read_account(accountId, sections, projection)
+
+    tasks = [asyncio.create_task(read(accountId)) for accountId in account_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The client went away mid-stream: stop reading the remaining accounts.
+        for task in tasks:
+            task.cancel()
+
+
+def _summary_amount(summary: Dict[str, Any], key: str) -> Optional[float]:
+    value = summary.get(key)
+    if isinstance(value, dict):
+        value = value.get("amount")
+    return float(value) if value is not None else None
+
+
+def _normalise_position(item: Dict[str, Any]) -> SnapshotPosition:
+    quantity = float(item.get("position") or 0)
+    average_cost = item.get("avgPrice")
+    unrealized_pnl = item.get("unrealizedPnl")
+    cost_basis = abs(quantity * average_cost) if average_cost else 0
+    return SnapshotPosition(
+        symbol=item.get("ticker") or item.get("contractDesc") or str(item.get("conid")),
+        conid=item.get("conid"),
+        quantity=quantity,
+        market_value=float(item.get("mktValue") or 0),
+        average_cost=average_cost,
+        unrealized_pnl=unrealized_pnl,
+        unrealized_pnl_percent=round(unrealized_pnl / cost_basis * 100, 2) if cost_basis and unrealized_pnl is not None else None,
+        sector=item.get("sector"),
+    )
+
+
 # --- Router Endpoints ---
 
 @router.get(
@@ -26,15 +194,14 @@ async def get_portfolio_accounts():
     """
     Fetches the list of available portfolio accounts.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/accounts", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/portfolio/accounts", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/portfolio/subaccounts",
@@ -46,15 +213,14 @@ async def get_portfolio_subaccounts():
     """
     Retrieves a list of subaccounts for the portfolio, primarily for tiered account structures.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/subaccounts", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/portfolio/subaccounts", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/portfolio/subaccounts2",
@@ -66,17 +232,128 @@ async def get_portfolio_subaccounts_large():
     """
     Retrieves a list of subaccounts for large portfolio structures.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            # Note: The documentation suggests this might be a GET, but a POST with a body might be needed in practice for large lists.
-            # Assuming GET based on the doc for now.
-            response = await client.get(f"{BASE_URL}/portfolio/subaccounts2", timeout=30) # Longer timeout for potentially large responses
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        # Note: The documentation suggests this might be a GET, but a POST with a body might be needed in practice for large lists.
+        # Assuming GET based on the doc for now.
+        response = await gateway.get("/portfolio/subaccounts2", timeout=30) # Longer timeout for potentially large responses
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+
+@router.get(
+    "/portfolio/snapshot",
+    tags=["Portfolio"],
+    summary="Portfolio Snapshot",
+    description="Returns a complete portfolio snapshot in one call: positions, net liquidation value, cash, buying power and PnL. Summary, ledger, all positions pages and allocation are fetched concurrently and normalised to the PortfolioSnapshot schema. If accountId is omitted the first account from /portfolio/accounts is used. Returns an error if the positions, or both summary and ledger, cannot be read; other failed sections are listed in `errors`.",
+    operation_id="portfolio_snapshot_get",
+    response_model=Union[PortfolioSnapshotResponse, Dict[str, Any]]
+)
+async def get_portfolio_snapshot(
+    accountId: Optional[str] = Query(None, description="The account ID. Defaults to the first portfolio account.")
+):
+    """
+    Replaces the accounts -> summary -> ledger -> positions -> allocation chain of tool calls.
+    """
+    try:
+        # /portfolio/accounts must be called before other /portfolio endpoints, so it runs first.
+        accounts = await _get_json("/portfolio/accounts")
+        if not accountId:
+            first = accounts[0] if isinstance(accounts, list) and accounts else None
+            accountId = (first.get("accountId") or first.get("id")) if isinstance(first, dict) else None
+            if not accountId:
+                return {"error": "Request Error", "detail": f"No portfolio accounts available: {accounts}"}
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+    summary, ledger, positions, allocation = await asyncio.gather(
+        _get_json(f"/portfolio/{accountId}/summary"),
+        _get_json(f"/portfolio/{accountId}/ledger"),
+        _all_positions(accountId),
+        _get_json(f"/portfolio/{accountId}/allocation"),
+        return_exceptions=True,
+    )
+
+    errors = [
+        _error_line(name, result)
+        for name, result in (("summary", summary), ("ledger", ledger), ("positions", positions), ("allocation", allocation))
+        if isinstance(result, Exception)
+    ]
+    # Without positions, or without both summary and ledger, the snapshot would report an empty or
+    # unvalued portfolio as if it were real, so the caller gets an error instead.
+    if isinstance(positions, Exception) or (isinstance(summary, Exception) and isinstance(ledger, Exception)):
+        return {"error": "Request Error", "detail": "; ".join(errors)}
+
+    summary = summary if isinstance(summary, dict) else {}
+    base_ledger = ledger.get("BASE", {}) if isinstance(ledger, dict) else {}
+    positions = [_normalise_position(item) for item in positions] if isinstance(positions, list) else []
+
+    total_market_value = _summary_amount(summary, "netliquidation")
+    if total_market_value is None:
+        total_market_value = base_ledger.get("netliquidationvalue") or sum(p.market_value for p in positions)
+    cash = _summary_amount(summary, "totalcashvalue")
+    if cash is None:
+        cash = base_ledger.get("cashbalance") or 0.0
+
+    return PortfolioSnapshotResponse(
+        account_id=accountId,
+        timestamp=datetime.now(timezone.utc),
+        positions=positions,
+        total_market_value=total_market_value,
+        cash=cash,
+        buying_power=_summary_amount(summary, "buyingpower"),
+        realized_pnl=base_ledger.get("realizedpnl"),
+        unrealized_pnl=base_ledger.get("unrealizedpnl"),
+        allocation=allocation if isinstance(allocation, dict) else None,
+        errors=errors,
+    )
+
+
+@router.post(
+    "/portfolio/accounts/batch",
+    tags=["Portfolio"],
+    summary="Multi-Account Read",
+    description="Reads summary, ledger and positions for many accounts in one call, e.g. every sub-account of a Financial Advisor or tiered structure. Accounts are read concurrently (`concurrency` at a time) and, with `stream=true` (the default), each account is sent as one NDJSON line as soon as it is complete; otherwise a single list in request order is returned. Summary and positions use the same default projections as their single-account endpoints; `projection` applies to positions, and '*' returns every section in full. A failed section is left null and listed in the account's `errors`."
+)
+async def read_accounts_batch(
+    body: AccountBatchRequest = Body(...),
+    stream: bool = Query(True, description="Set to false to receive one JSON list once every account has been read."),
+    concurrency: int = Query(ACCOUNT_FANOUT_CONCURRENCY, ge=1, le=20, description="Number of accounts read in parallel."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
+):
+    """
+    Replaces one summary, ledger and positions tool call per account with a single bounded fan-out.
+    """
+    unknown = [section for section in body.sections if section not in ACCOUNT_SECTIONS]
+    if unknown or not body.sections:
+        return {"error": "Request Error", "detail": f"sections must be taken from {', '.join(ACCOUNT_SECTIONS)}; got {body.sections}."}
+    sections = list(dict.fromkeys(body.sections))
+    try:
+        # Listing the accounts is also the /portfolio prerequisite call, so it runs even for explicit IDs.
+        available = await _list_account_ids()
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+    requested = [accountId for accountId in body.acctIds or [] if accountId.lower() != "all"]
+    account_ids = list(dict.fromkeys(requested)) if requested else available
+    if not account_ids:
+        return {"error": "Request Error", "detail": "No portfolio accounts available."}
+
+    if stream:
+        async def ndjson_lines():
+            async for entry in _read_accounts(account_ids, sections, projection, concurrency):
+                yield orjson.dumps(entry) + b"\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    entries = {entry["accountId"]: entry async for entry in _read_accounts(account_ids, sections, projection, concurrency)}
+    return json_response([entries[accountId] for accountId in account_ids])
 
 
 @router.get(
@@ -91,15 +368,14 @@ async def get_account_meta(
     """
     Fetches metadata for a specific portfolio account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/meta", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/meta", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -114,15 +390,14 @@ async def get_account_allocation(
     """
     Fetches portfolio allocation for a single specified account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/allocation", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/allocation", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -137,15 +412,14 @@ async def get_combo_positions(
     """
     Retrieves combination positions (e.g., complex options strategies) for an account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/combo/positions", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/combo/positions", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -158,19 +432,71 @@ async def get_all_accounts_allocation(body: AccountAllocationRequest = Body(...)
     """
     Fetches combined portfolio allocation for a list of specified accounts.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/portfolio/allocation",
-                json=body.dict(),
-                timeout=20
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            "/portfolio/allocation",
+            json=body.dict(),
+            timeout=20
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+
+@router.get(
+    "/portfolio/{accountId}/positions/all",
+    tags=["Portfolio"],
+    summary="All Positions",
+    description="Returns every position for the given account in one call. Pages are fetched concurrently until an empty page is reached and merged into a single list. Set `stream=true` to receive the positions as NDJSON (one position per line) instead."
+)
+async def get_all_positions(
+    accountId: str = Path(..., description="The account ID."),
+    model: Optional[str] = Query(None, description="The model to query positions for."),
+    sort: Optional[str] = Query(None, description="The field to sort by."),
+    direction: Optional[str] = Query(None, description="The sort direction: 'a' for ascending, 'd' for descending."),
+    period: Optional[str] = Query(None, description="The period for which to retrieve positions."),
+    stream: bool = Query(False, description="Set to true to stream positions as NDJSON as pages arrive."),
+    concurrency: int = Query(POSITIONS_PAGE_CONCURRENCY, ge=1, le=10, description="Number of pages fetched in parallel."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
+):
+    """
+    Walks every positions page for an account without one tool call per page.
+    """
+    params = {}
+    if model:
+        params["model"] = model
+    if sort:
+        params["sort"] = sort
+    if direction:
+        params["direction"] = direction
+    if period:
+        params["period"] = period
+
+    if stream:
+        async def ndjson_lines():
+            try:
+                async for page in iter_position_pages(accountId, params, concurrency):
+                    for position in apply_projection(page, projection, "/portfolio/{accountId}/positions/all"):
+                        yield orjson.dumps(position) + b"\n"
+            except httpx.HTTPStatusError as exc:
+                yield orjson.dumps({"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}) + b"\n"
+            except (httpx.RequestError, ValueError) as exc:
+                yield orjson.dumps({"error": "Request Error", "detail": str(exc)}) + b"\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    try:
+        positions = []
+        async for page in iter_position_pages(accountId, params, concurrency):
+            positions.extend(apply_projection(page, projection, "/portfolio/{accountId}/positions/all"))
+        return json_response(positions)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except (httpx.RequestError, ValueError) as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -185,7 +511,8 @@ async def get_positions(
     model: Optional[str] = Query(None, description="The model to query positions for."),
     sort: Optional[str] = Query(None, description="The field to sort by."),
     direction: Optional[str] = Query(None, description="The sort direction: 'a' for ascending, 'd' for descending."),
-    period: Optional[str] = Query(None, description="The period for which to retrieve positions.")
+    period: Optional[str] = Query(None, description="The period for which to retrieve positions."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
 ):
     """
     Fetches paginated positions for a specific account.
@@ -200,15 +527,14 @@ async def get_positions(
     if period:
         params["period"] = period
         
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/positions/{pageId}", params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/positions/{pageId}", params=params, timeout=10)
+        response.raise_for_status()
+        return project_response(response, projection, "/portfolio/{accountId}/positions/{pageId}")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -224,15 +550,14 @@ async def get_position_by_conid(
     """
     Retrieves all positions for a specific contract within a given account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{acctId}/position/{conid}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{acctId}/position/{conid}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.post(
@@ -247,15 +572,14 @@ async def invalidate_portfolio_cache(
     """
     Clears the cached portfolio data on the server side for the specified account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/portfolio/{accountId}/positions/invalidate", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(f"/portfolio/{accountId}/positions/invalidate", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -265,20 +589,20 @@ async def invalidate_portfolio_cache(
     description="Returns a summary of account information and portfolio positions."
 )
 async def get_account_summary(
-    accountId: str = Path(..., description="The account ID.")
+    accountId: str = Path(..., description="The account ID."),
+    projection: Optional[str] = Query(None, description=PROJECTION_DESCRIPTION)
 ):
     """
     Fetches a summary of the specified account's portfolio.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/summary", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/summary", timeout=10)
+        response.raise_for_status()
+        return project_response(response, projection, "/portfolio/{accountId}/summary")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -293,15 +617,14 @@ async def get_account_ledger(
     """
     Retrieves the ledger for a specific account, showing cash balances and other financial details.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/{accountId}/ledger", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/portfolio/{accountId}/ledger", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 
 @router.get(
@@ -316,12 +639,11 @@ async def get_all_positions_by_conid(
     """
     Fetches all positions for a given contract ID across all portfolio accounts.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/portfolio/positions/{conid}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
\ No newline at end of file
+    try:
+        response = await gateway.get(f"/portfolio/positions/{conid}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
\ No newline at end of file
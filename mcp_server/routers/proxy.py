@@ -0,0 +1,140 @@
+# proxy.py
+import re
+from fnmatch import fnmatch
+from fastapi import APIRouter, Body, Query, Request
+from typing import Any, Optional
+from urllib.parse import parse_qsl, unquote
+import httpx
+from mcp_server.config import (
+    ALL_MODULES, EXCLUDED_TAGS_SET, PROXY_DENIED_WRITE_PATHS, PROXY_ENABLED, PROXY_TIMEOUT, PROXY_WRITE_ENABLED,
+    display_modules,
+)
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.openapi_spec import Operation, openapi_spec
+from mcp_server.services.responses import json_response, stream_response
+
+router = APIRouter()
+
+
+def _tag_key(tag: str) -> str:
+    # The spec's tags differ from the module names in prefix and punctuation ("Trading Orders",
+    # "FYIs and Notifications" vs. "Orders", "FYIs & Notifications").
+    tag = re.sub(r"^trading\s+", "", tag.strip().lower()).replace("&", "and")
+    return re.sub(r"[^a-z0-9]", "", tag)
+
+
+# Spec tags that name a module differently than the prefix and punctuation rules of _tag_key cover.
+_TAG_ALIASES = {"contracts": "Contract"}
+
+_MODULES_BY_TAG_KEY = {**{_tag_key(module): module for module in ALL_MODULES}, **_TAG_ALIASES}
+
+# With any module disabled, an endpoint that cannot be mapped to a module might belong to a disabled one.
+_MODULES_RESTRICTED = bool(EXCLUDED_TAGS_SET) or set(display_modules) != set(ALL_MODULES)
+
+
+def _refusal(operation: Operation, path: str) -> Optional[str]:
+    """Why the proxy must not forward `operation`, or None when it may."""
+    if operation.method != "GET" and any(fnmatch(path, pattern) for pattern in PROXY_DENIED_WRITE_PATHS):
+        return f"{operation.method} {operation.template} is reserved to the server's own routers."
+    modules = [_MODULES_BY_TAG_KEY.get(_tag_key(tag)) for tag in operation.tags]
+    for module in modules:
+        if module is not None and (module in EXCLUDED_TAGS_SET or module not in display_modules):
+            return f"{operation.method} {operation.template} belongs to the disabled '{module}' module."
+    if _MODULES_RESTRICTED and (not modules or None in modules):
+        return f"{operation.method} {operation.template} (tags: {', '.join(operation.tags) or 'none'}) does not map to an enabled module."
+    return None
+
+
+async def _forward(method: str, path: str, request: Request, body: Any = None):
+    """Checks `method path` against the OpenAPI spec and streams the gateway's answer back unchanged."""
+    if not PROXY_ENABLED:
+        return json_response({"error": "Proxy Disabled", "detail": "Set PROXY_ENABLED=true to enable /proxy."}, status_code=404)
+    # MCP clients cannot send arbitrary query parameters, so a query string may also arrive inside `path`.
+    path, _, inline_query = path.partition("?")
+    path = "/" + path.lstrip("/")
+    # The spec's path parameters match any segment, and httpx would resolve "." and ".." to another endpoint.
+    if any(unquote(segment) in (".", "..") for segment in path.split("/")):
+        return json_response({"error": "Invalid Path", "detail": f"{path} contains '.' or '..' segments."}, status_code=400)
+    try:
+        operation, allowed = await openapi_spec.match(method, path)
+    except (httpx.HTTPError, ValueError, OSError) as exc:
+        return json_response({"error": "OpenAPI Spec Unavailable", "detail": str(exc)}, status_code=503)
+    if operation is None:
+        if allowed:
+            return json_response({"error": "Method Not Allowed", "detail": f"{path} supports {', '.join(allowed)}."}, status_code=405)
+        return json_response({
+            "error": "Unknown Endpoint",
+            "detail": f"{method} {path} is not in the IBKR OpenAPI specification.",
+            "suggestions": await openapi_spec.suggest(path),
+        }, status_code=404)
+    refusal = _refusal(operation, path)
+    if refusal is not None:
+        return json_response({"error": "Forbidden", "detail": refusal}, status_code=403)
+
+    kwargs = {"params": list(request.query_params.multi_items()) + parse_qsl(inline_query), "timeout": gateway.timeout_for(path, PROXY_TIMEOUT)}
+    if body is not None:
+        kwargs["json"] = body
+    try:
+        response = await gateway.request(method, path, stream=True, **kwargs)
+    except httpx.RequestError as exc:
+        return json_response({"error": "Request Error", "detail": str(exc)}, status_code=502)
+    return stream_response(response)
+
+
+# --- Proxy Router Endpoints ---
+
+@router.get(
+    "/proxy/operations",
+    tags=["Proxy"],
+    summary="List Proxied Endpoints",
+    description="Searches the IBKR OpenAPI specification for the endpoints that can be called through /proxy, by path or summary text and by tag."
+)
+async def list_proxy_operations(
+    query: Optional[str] = Query(None, description="Text to look for in the endpoint path or summary, e.g. 'trades'."),
+    tag: Optional[str] = Query(None, description="Only endpoints with this OpenAPI tag, e.g. 'Portfolio'."),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of endpoints to return.")
+):
+    try:
+        return json_response(await openapi_spec.search(query, tag, limit))
+    except (httpx.HTTPError, ValueError, OSError) as exc:
+        return json_response({"error": "OpenAPI Spec Unavailable", "detail": str(exc)}, status_code=503)
+
+
+@router.get(
+    "/proxy/{path:path}",
+    tags=["Proxy"],
+    summary="Proxy GET Request",
+    description="Sends a GET request to any gateway endpoint of an enabled module in the IBKR OpenAPI specification (path relative to /v1/api, e.g. 'iserver/account/trades?days=7'). Query parameters are forwarded as given and the response is streamed back unchanged."
+)
+async def proxy_get(path: str, request: Request):
+    return await _forward("GET", path, request)
+
+
+# Write methods are only exposed (and turned into MCP tools) when explicitly enabled.
+if PROXY_WRITE_ENABLED:
+    @router.post(
+        "/proxy/{path:path}",
+        tags=["Proxy"],
+        summary="Proxy POST Request",
+        description="Sends a POST request with an optional JSON body to any gateway endpoint of an enabled module in the IBKR OpenAPI specification (path relative to /v1/api). Order placement, modification, cancellation and reply prompts are refused. The response is streamed back unchanged."
+    )
+    async def proxy_post(path: str, request: Request, body: Optional[Any] = Body(None, description="JSON body forwarded to the gateway.")):
+        return await _forward("POST", path, request, body)
+
+    @router.put(
+        "/proxy/{path:path}",
+        tags=["Proxy"],
+        summary="Proxy PUT Request",
+        description="Sends a PUT request with an optional JSON body to any gateway endpoint of an enabled module in the IBKR OpenAPI specification (path relative to /v1/api). Order placement, modification, cancellation and reply prompts are refused. The response is streamed back unchanged."
+    )
+    async def proxy_put(path: str, request: Request, body: Optional[Any] = Body(None, description="JSON body forwarded to the gateway.")):
+        return await _forward("PUT", path, request, body)
+
+    @router.delete(
+        "/proxy/{path:path}",
+        tags=["Proxy"],
+        summary="Proxy DELETE Request",
+        description="Sends a DELETE request to any gateway endpoint of an enabled module in the IBKR OpenAPI specification (path relative to /v1/api). Order placement, modification, cancellation and reply prompts are refused. The response is streamed back unchanged."
+    )
+    async def proxy_delete(path: str, request: Request):
+        return await _forward("DELETE", path, request)
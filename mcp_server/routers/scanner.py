@@ -1,10 +1,17 @@
 # scanner.py
-from fastapi import APIRouter, Body
+import logging
+from fastapi import APIRouter, Body, Query
 from fastapi.responses import Response
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any
 import httpx
 from pydantic import BaseModel, Field, ConfigDict
-from mcp_server.config import BASE_URL
+from mcp_server.config import SCANNER_VALIDATION_ENABLED
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
+from mcp_server.services.hmds_session import hmds_session
+from mcp_server.services.scanner_params import scanner_catalogue
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -71,22 +78,46 @@ class HmdsScannerRequest(BaseModel):
     "/iserver/scanner/params",
     tags=["Scanner"],
     summary="Get Scanner Parameters",
-    description="Returns an XML file containing all available scanner parameters for the iServer scanner."
+    description="Returns the complete, multi-megabyte scanner parameter document for the iServer scanner. Prefer `/iserver/scanner/params/search`, which returns only the relevant entries."
 )
 async def get_scanner_params():
     """
     Retrieves the iServer scanner parameters as an XML file. This information is needed to correctly configure an iServer scanner request.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/scanner/params", timeout=10)
-            response.raise_for_status()
-            # Return the raw XML content with the correct media type
-            return Response(content=response.text, media_type="application/xml")
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/scanner/params", timeout=10)
+        response.raise_for_status()
+        # Return the raw XML content with the correct media type
+        return Response(content=response.text, media_type="application/xml")
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+
+@router.get(
+    "/iserver/scanner/params/search",
+    tags=["Scanner"],
+    summary="Search Scanner Parameters",
+    description="Searches the cached scanner parameter catalogue. `section` selects instrument types, location codes, scan types or filters; results can be narrowed by text and by instrument type."
+)
+async def search_scanner_params(
+    section: Literal["instruments", "locations", "scan_types", "filters"] = Query(..., description="Which part of the catalogue to search."),
+    query: Optional[str] = Query(None, description="Case-insensitive text matched against codes and display names, e.g. 'gain'."),
+    instrument: Optional[str] = Query(None, description="Only entries valid for this instrument type, e.g. 'STK'."),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of entries to return.")
+):
+    """
+    Answers from a parsed copy of `/iserver/scanner/params` that is downloaded once and refreshed daily,
+    so finding a scan code or location costs no gateway call.
+    """
+    try:
+        return await scanner_catalogue.search(section, query, instrument, limit)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
+    except ValueError as exc:
+        return {"error": "Invalid Scanner Parameters", "detail": str(exc)}
 
 @router.post(
     "/iserver/scanner/run",
@@ -97,8 +128,22 @@ async def get_scanner_params():
 async def run_scanner(body: ScannerSubscription = Body(...)):
     """
     Submits an iServer scanner configuration and returns the results.
-    The JSON request body will be converted to the required XML format.
+    The JSON request body will be converted to the required XML format. The instrument, scan type,
+    location code and filters are first checked against the scanner parameter catalogue, so a typo
+    is reported with suggestions instead of costing a gateway call.
     """
+    if SCANNER_VALIDATION_ENABLED:
+        try:
+            problems = await scanner_catalogue.validate(
+                body.instrument, body.type, body.locationCode, [item.name for item in body.filter or []]
+            )
+        except (httpx.HTTPError, ValueError) as exc:
+            # Without a catalogue the gateway remains the judge of the request.
+            problems = []
+            logger.warning(f"Scanner request not validated, parameter catalogue unavailable: {exc}")
+        if problems:
+            return {"error": "Invalid Scanner Request", "detail": problems}
+
     # Build the XML string from the Pydantic model
     xml_string = f"<ScannerSubscription><instrument>{body.instrument}</instrument><type>{body.type}</type><locationCode>{body.locationCode}</locationCode>"
     if body.filter:
@@ -110,20 +155,19 @@ async def run_scanner(body: ScannerSubscription = Body(...)):
 
     headers = {"Content-Type": "application/xml"}
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/scanner/run",
-                content=xml_string,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            "/iserver/scanner/run",
+            content=xml_string,
+            headers=headers,
+            timeout=30
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/hmds/scanner",
@@ -134,27 +178,21 @@ async def run_scanner(body: ScannerSubscription = Body(...)):
 async def run_hmds_scanner(body: HmdsScannerRequest = Body(...)):
     """
     ### Run HMDS Scanner
-    Submits a scanner request to the HMDS. As per the documentation, this endpoint
-    first calls `/hmds/auth/init` to authenticate the session before running the scan.
+    Submits a scanner request to the HMDS. As per the documentation, `/hmds/auth/init` must
+    authenticate the session first; the shared HMDS session manager does this once and
+    re-initialises only when a request fails with an auth-related status.
 
     The request body should be a JSON object specifying the scanner parameters.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            # Initialize HMDS session to prevent 404 error on the first call
-            # This is a prerequisite for all /hmds endpoints.
-            init_response = await client.get(f"{BASE_URL}/hmds/auth/init", timeout=10)
-            init_response.raise_for_status() # Ensure the init call was successful
-
-            # Now, make the actual scanner request
-            scanner_response = await client.post(
-                f"{BASE_URL}/hmds/scanner",
-                json=body.dict(),
-                timeout=30
-            )
-            scanner_response.raise_for_status()
-            return scanner_response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        scanner_response = await hmds_session.post(
+            "/hmds/scanner",
+            json=body.dict(),
+            timeout=30
+        )
+        scanner_response.raise_for_status()
+        return passthrough(scanner_response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -0,0 +1,137 @@
+# server.py
+from fastapi import APIRouter, Query, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from typing import Any, Dict, Optional
+from mcp_server.services.circuit_breaker import circuit_breakers
+from mcp_server.services.contract_cache import contract_cache
+from mcp_server.services.hmds_session import hmds_session
+from mcp_server.services.latency_tracker import latency_tracker
+from mcp_server.services.metrics import gateway_metrics
+from mcp_server.services.order_feed import order_feed
+from mcp_server.services.rate_limiter import pacing_limiter
+from mcp_server.services.request_batcher import iserver_snapshot_batcher, md_snapshot_batcher
+from mcp_server.services.session_keeper import session_keeper
+from mcp_server.services.tool_manifest import tool_manifest
+
+router = APIRouter()
+
+# --- Server Router Endpoints ---
+
+@router.get(
+    "/server/pacing",
+    tags=["Server"],
+    summary="Gateway Pacing Status",
+    description="Returns the pacing limiter's queue depth and wait-time metrics for each endpoint family (orders, portfolio, market_data, history, scanner, other)."
+)
+async def get_pacing_status() -> Dict[str, Any]:
+    """
+    Reports how many requests are currently queued for gateway pacing and how long queued requests have waited.
+    """
+    return pacing_limiter.status()
+
+
+@router.get(
+    "/server/circuits",
+    tags=["Server"],
+    summary="Gateway Circuit Breaker Status",
+    description="Returns the circuit breaker state (closed, open or half_open) for each endpoint family. An open circuit means the gateway is failing for that family and requests fail fast until the next probe."
+)
+async def get_circuit_status() -> Dict[str, Any]:
+    """
+    Lets an agent check in one fast call whether the gateway is reachable before starting a long run.
+    """
+    return circuit_breakers.status()
+
+
+@router.get(
+    "/server/latency",
+    tags=["Server"],
+    summary="Gateway Latency and Adaptive Timeouts",
+    description="Returns p50/p95/p99 upstream latency per gateway route, the adaptive timeout derived from it, and hedged request counts."
+)
+async def get_latency_status() -> Dict[str, Any]:
+    return latency_tracker.status()
+
+
+@router.get(
+    "/server/contract-cache",
+    tags=["Server"],
+    summary="Contract Cache Status",
+    description="Returns hit/miss counts of the contract info, rules and algos cache and the state of the startup preload of held conids."
+)
+async def get_contract_cache_status() -> Dict[str, Any]:
+    return contract_cache.status()
+
+
+@router.post(
+    "/server/contract-cache/invalidate",
+    tags=["Server"],
+    summary="Invalidate Contract Cache",
+    description="Drops cached contract info, rules and algos for one conid, or for every conid when none is given."
+)
+async def invalidate_contract_cache(
+    conid: Optional[str] = Query(None, description="The contract ID to drop. Omit to clear the whole cache.")
+) -> Dict[str, Any]:
+    return {"removed": contract_cache.invalidate(conid)}
+
+
+@router.get(
+    "/server/snapshot-batching",
+    tags=["Server"],
+    summary="Snapshot Batching Status",
+    description="Returns, for each market data snapshot path, how many snapshot requests were received and how many upstream calls they were coalesced into."
+)
+async def get_snapshot_batching_status() -> Dict[str, Any]:
+    return {
+        "iserver": iserver_snapshot_batcher.status(),
+        "md": md_snapshot_batcher.status(),
+    }
+
+
+@router.get(
+    "/server/order-feed",
+    tags=["Server"],
+    summary="Order Feed Status",
+    description="Returns whether the live order poller behind /iserver/account/orders/changes is running, its current version and the outcome of its last poll."
+)
+async def get_order_feed_status() -> Dict[str, Any]:
+    return order_feed.status()
+
+
+@router.get(
+    "/server/session",
+    tags=["Server"],
+    summary="Session Keeper Status",
+    description="Returns the gateway session as last seen by the session keeper (authenticated, competing), whether a re-authentication is in flight, and how many requests were held while it ran."
+)
+async def get_session_keeper_status() -> Dict[str, Any]:
+    return session_keeper.status()
+
+
+@router.get(
+    "/server/hmds",
+    tags=["Server"],
+    summary="HMDS Session Status",
+    description="Returns the state of the shared HMDS session and how many /hmds/auth/init calls it has saved."
+)
+async def get_hmds_session_status() -> Dict[str, Any]:
+    """
+    Reports whether the HMDS session is currently considered valid, its age, and init/re-init counters.
+    """
+    return hmds_session.status()
+
+
+@router.get(
+    "/server/tool-manifest",
+    tags=["Server"],
+    summary="MCP Tool Manifest Status",
+    description="Reports whether the MCP tool manifest was loaded from the on-disk cache or generated at startup, and how long building the MCP server took."
+)
+async def get_tool_manifest_status() -> Dict[str, Any]:
+    return tool_manifest.status()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Prometheus exposition of the gateway metrics (services.metrics); kept out of the MCP tools."""
+    return Response(content=gateway_metrics.exposition(), media_type=CONTENT_TYPE_LATEST)
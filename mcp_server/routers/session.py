@@ -1,7 +1,11 @@
 # session.py
 from fastapi import APIRouter
+from fastapi.responses import Response
 import httpx
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
+from mcp_server.services.session_keeper import session_keeper
+from mcp_server.services.metrics import gateway_metrics
 
 router = APIRouter()
 
@@ -17,35 +21,38 @@ async def sso_validate():
     """
     Validates the session for a Single Sign-On (SSO) user.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/sso/validate", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/sso/validate", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/auth/status",
     tags=["Session"],
     summary="Authentication Status",
-    description="Returns the authentication status of the gateway."
+    description="Returns the authentication status of the gateway. Served from the session keeper's recent check when there is one (X-Cache: hit)."
 )
 async def get_auth_status():
     """
     Checks the current authentication status, including connection status, any competing sessions, and server info.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/auth/status", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    cached = session_keeper.cached_status()
+    gateway_metrics.record_cache("auth_status", hits=int(cached is not None), misses=int(cached is None))
+    if cached is not None:
+        return Response(content=cached, media_type="application/json", headers={"X-Cache": "hit"})
+    try:
+        response = await gateway.get("/iserver/auth/status", timeout=10)
+        response.raise_for_status()
+        session_keeper.store_status(response.content)
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/reauthenticate",
@@ -57,15 +64,14 @@ async def reauthenticate():
     """
     When the session has been idle for a long time, it may expire. This endpoint can be used to re-authenticate the session.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/iserver/reauthenticate", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/iserver/reauthenticate", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/logout",
@@ -77,15 +83,14 @@ async def logout():
     """
     Terminates the current brokerage session.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(f"{BASE_URL}/logout", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post("/logout", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/tickle",
@@ -97,12 +102,11 @@ async def tickle():
     """
     Pings the gateway to keep the session alive and check for connectivity.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/tickle", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/tickle", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -3,7 +3,8 @@ from fastapi import APIRouter, Body, Path
 from typing import List, Optional
 import httpx
 from pydantic import BaseModel, Field
-from mcp_server.config import BASE_URL
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import passthrough
 
 router = APIRouter()
 
@@ -31,15 +32,14 @@ async def get_watchlists():
     """
     Retrieves all watchlists associated with the current user's account.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/watchlists", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get("/iserver/account/watchlists", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.get(
     "/iserver/account/watchlist/{watchlistId}",
@@ -53,15 +53,14 @@ async def get_watchlist_contracts(
     """
     Retrieves all contracts within a specific watchlist.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/iserver/account/watchlist/{watchlistId}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.get(f"/iserver/account/watchlist/{watchlistId}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/account/{accountId}/watchlist",
@@ -76,19 +75,18 @@ async def create_watchlist(
     """
     Creates a new watchlist for the specified account with an optional list of initial contracts.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/{accountId}/watchlist",
-                json=body.dict(exclude_none=True),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/{accountId}/watchlist",
+            json=body.dict(exclude_none=True),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.post(
     "/iserver/account/watchlist/{watchlistId}/contract",
@@ -107,19 +105,18 @@ async def add_contracts_to_watchlist(
     # The API might expect a single `conid` key. If this call fails, adjust the model and this call accordingly.
     # For now, we assume a more flexible `conids` list can be handled or that the first element is used.
     # A safer single-conid implementation would be: `json={"conid": body.conids[0]}` if only one is allowed.
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/iserver/account/watchlist/{watchlistId}/contract",
-                json=body.dict(),
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.post(
+            f"/iserver/account/watchlist/{watchlistId}/contract",
+            json=body.dict(),
+            timeout=10
+        )
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.delete(
     "/iserver/account/watchlist/{watchlistId}",
@@ -133,15 +130,14 @@ async def delete_watchlist(
     """
     Deletes an entire watchlist by its ID.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.delete(f"{BASE_URL}/iserver/account/watchlist/{watchlistId}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.delete(f"/iserver/account/watchlist/{watchlistId}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
 
 @router.delete(
     "/iserver/account/watchlist/{watchlistId}/contract/{conid}",
@@ -156,12 +152,11 @@ async def delete_contract_from_watchlist(
     """
     Removes a single contract from a specified watchlist.
     """
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.delete(f"{BASE_URL}/iserver/account/watchlist/{watchlistId}/contract/{conid}", timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as exc:
-            return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
-        except httpx.RequestError as exc:
-            return {"error": "Request Error", "detail": str(exc)}
+    try:
+        response = await gateway.delete(f"/iserver/account/watchlist/{watchlistId}/contract/{conid}", timeout=10)
+        response.raise_for_status()
+        return passthrough(response)
+    except httpx.HTTPStatusError as exc:
+        return {"error": "IBKR API Error", "status_code": exc.response.status_code, "detail": exc.response.text}
+    except httpx.RequestError as exc:
+        return {"error": "Request Error", "detail": str(exc)}
@@ -0,0 +1,208 @@
+# bar_store.py
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from mcp_server.config import BAR_CACHE_DIR, BAR_CACHE_ENABLED
+from mcp_server.services.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+# One row per bar. `t` is the bar open time in epoch milliseconds, as returned by IBKR.
+BAR_DTYPE = np.dtype([("t", "i8"), ("o", "f8"), ("h", "f8"), ("l", "f8"), ("c", "f8"), ("v", "f8")])
+
+# Seconds per unit for both iServer ("30min", "2h", "1d", "1w", "1m", "1y") and HMDS ("60S", "5mins", "1hrs") notations.
+_UNIT_SECONDS = {
+    "s": 1, "sec": 1, "secs": 1,
+    "min": 60, "mins": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+    "w": 604800, "week": 604800, "weeks": 604800,
+    "m": 2592000, "mo": 2592000, "month": 2592000, "months": 2592000,
+    "y": 31536000, "year": 31536000, "years": 31536000,
+}
+
+# Response fields that describe the fetched range rather than the instrument. A tail fetch only covers the
+# last few bars, so these are dropped from cached responses and `timePeriod`/`points` are set from the served bars.
+RANGE_FIELDS = ("startTime", "high", "low", "timePeriod", "points", "travelTime")
+
+# Fetches `period` worth of bars from the gateway and returns the decoded JSON body.
+HistoryFetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+def parse_duration(value: str) -> Optional[int]:
+    """Converts an IBKR period or bar size (e.g. "30min", "1d", "3600S") to seconds, or None if unknown."""
+    match = re.fullmatch(r"\s*(\d+)\s*([A-Za-z]+)\s*", value or "")
+    if not match:
+        return None
+    amount, unit = int(match.group(1)), match.group(2)
+    # "S" is seconds for HMDS, "m" is months everywhere; everything else is case-insensitive.
+    seconds = _UNIT_SECONDS.get(unit) or _UNIT_SECONDS.get(unit.lower())
+    return amount * seconds if seconds else None
+
+
+def format_period(seconds: int, source: str) -> str:
+    """Smallest period string in the source's notation that covers `seconds`."""
+    if source == "hmds":
+        if seconds < 86400:
+            return f"{max(60, seconds)}S"
+        return f"{math.ceil(seconds / 86400)}d"
+    if seconds <= 1800:
+        return f"{max(1, math.ceil(seconds / 60))}min"
+    if seconds <= 8 * 3600:
+        return f"{math.ceil(seconds / 3600)}h"
+    return f"{math.ceil(seconds / 86400)}d"
+
+
+def bars_from_payload(payload: Dict[str, Any]) -> np.ndarray:
+    rows = payload.get("data") or []
+    bars = np.empty(len(rows), dtype=BAR_DTYPE)
+    for i, row in enumerate(rows):
+        bars[i] = (int(row.get("t", 0)), row.get("o", np.nan), row.get("h", np.nan),
+                   row.get("l", np.nan), row.get("c", np.nan), row.get("v", np.nan) or 0.0)
+    return bars
+
+
+def bars_to_rows(bars: np.ndarray) -> list:
+    return [
+        {"t": int(t), "o": float(open_), "h": float(high), "l": float(low), "c": float(close), "v": float(volume)}
+        for t, open_, high, low, close, volume in bars.tolist()
+    ]
+
+
+class BarStore:
+    """
+    On-disk cache of historical bars, one memory-mapped NumPy file per (source, conid, bar, barType, outsideRth, exchange).
+
+    Completed bars never change, so once a range is stored only the missing recent tail is requested from
+    the gateway: the tail always starts at the last stored bar so a bar that was still forming is replaced.
+    If the store does not cover the requested period, or the tail request fails, the full period is fetched
+    and merged in. Response metadata (symbol, priceFactor, ...) is kept in a small JSON sidecar so cached
+    responses have the same shape as the gateway's, less the RANGE_FIELDS that only held for the last fetch.
+    """
+
+    def __init__(self, root: str = BAR_CACHE_DIR, enabled: bool = BAR_CACHE_ENABLED):
+        self.root = root
+        self.enabled = enabled
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+
+    def _paths(self, key: Tuple) -> Tuple[str, str]:
+        source, conid, bar, bar_type, outside_rth, exchange = key
+        name = f"{conid}_{bar}_{bar_type or 'default'}_{'ext' if outside_rth else 'rth'}_{exchange or 'default'}"
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        directory = os.path.join(self.root, source)
+        return os.path.join(directory, f"{name}.npy"), os.path.join(directory, f"{name}.json")
+
+    def load(self, key: Tuple) -> Tuple[np.ndarray, Dict[str, Any]]:
+        bars_path, meta_path = self._paths(key)
+        if not os.path.exists(bars_path):
+            return np.empty(0, dtype=BAR_DTYPE), {}
+        bars = np.load(bars_path, mmap_mode="r")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        return bars, meta
+
+    def save(self, key: Tuple, bars: np.ndarray, meta: Dict[str, Any]) -> None:
+        bars_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+        # Write next to the target and rename so readers never see a half-written file.
+        tmp_path = f"{bars_path}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+        os.replace(tmp_path, bars_path)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @staticmethod
+    def merge(stored: np.ndarray, fresh: np.ndarray) -> np.ndarray:
+        """Union of both arrays sorted by time; on equal timestamps the fresh bar wins."""
+        if len(stored) == 0:
+            return np.sort(np.asarray(fresh), order="t")
+        if len(fresh) == 0:
+            return np.asarray(stored)
+        combined = np.concatenate([np.asarray(fresh), np.asarray(stored)])
+        _, first = np.unique(combined["t"], return_index=True)
+        return combined[first]
+
+    async def get_history(
+        self,
+        source: str,
+        conid: str,
+        period: str,
+        bar: Optional[str],
+        bar_type: Optional[str],
+        outside_rth: bool,
+        fetch: HistoryFetcher,
+        exchange: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Returns a gateway-shaped history payload for `period`, fetching only what the store is missing.
+        A `_cache` key reports how many bars came from disk and from the gateway.
+        """
+        period_seconds = parse_duration(period)
+        bar_seconds = parse_duration(bar) if bar else None
+        if not self.enabled or not period_seconds or not bar_seconds:
+            # Without an explicit bar size the gateway picks one, so the result cannot be keyed.
+            return await fetch(period)
+
+        key = (source, str(conid), bar, bar_type, bool(outside_rth), exchange)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now_ms = int(time.time() * 1000)
+            start_ms = now_ms - period_seconds * 1000
+            stored, meta = self.load(key)
+
+            payload = None
+            tail_period = None
+            # Coverage is tracked explicitly: the first bar can start well after the period start (weekends, holidays).
+            covered_from = meta.get("_covered_from_ms")
+            if len(stored) and covered_from is not None and covered_from <= start_ms:
+                gap_seconds = max(0, (now_ms - int(stored["t"][-1])) // 1000)
+                tail_period = format_period(gap_seconds + bar_seconds, source)
+                try:
+                    payload = await fetch(tail_period)
+                except Exception as exc:
+                    logger.warning(f"Tail fetch {tail_period} failed for {key}, fetching full period: {exc}")
+                    payload = None
+                if not isinstance(payload, dict) or "data" not in payload:
+                    payload, tail_period = None, None
+
+            if payload is None:
+                payload = await fetch(period)
+                if not isinstance(payload, dict) or "data" not in payload:
+                    return payload
+                covered_from = start_ms if covered_from is None else min(covered_from, start_ms)
+
+            fresh = bars_from_payload(payload)
+            merged = self.merge(stored, fresh)
+            meta = {k: v for k, v in payload.items() if k != "data" and k not in RANGE_FIELDS}
+            meta["_covered_from_ms"] = covered_from
+            self.save(key, merged, meta)
+            meta.pop("_covered_from_ms")
+
+        window = merged[merged["t"] >= start_ms]
+        from_gateway = int(np.isin(window["t"], fresh["t"]).sum())
+        gateway_metrics.record_cache("bars", hits=len(window) - from_gateway, misses=from_gateway)
+        return {
+            **meta,
+            "data": bars_to_rows(window),
+            "timePeriod": period,
+            "points": len(window),
+            "_cache": {
+                "cached_bars": len(window) - from_gateway,
+                "fetched_bars": len(fresh),
+                "fetched_period": tail_period or period,
+            },
+        }
+
+
+bar_store = BarStore()
@@ -0,0 +1,148 @@
+# circuit_breaker.py
+import logging
+import time
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from mcp_server.config import (
+    CIRCUIT_BREAKER_ENABLED, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, CIRCUIT_FAILURE_STATUS_CODES,
+)
+from mcp_server.services.rate_limiter import FAMILY_PRIORITY, classify
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Session endpoints are never blocked: they are how a dropped session gets noticed and restored.
+# The session keeper never holds them either.
+SESSION_PATHS: List[str] = ["/tickle", "/iserver/auth/*", "/iserver/reauthenticate", "/logout", "/sso/*"]
+
+
+class CircuitOpenError(httpx.RequestError):
+    """
+    Raised instead of sending a request while its family's circuit is open. It is an httpx.RequestError
+    so routers report it like any other unreachable-gateway error, only without waiting for a timeout.
+    """
+
+
+class Circuit:
+    """
+    Breaker for one endpoint family.
+
+    Closed: requests flow and consecutive failures are counted. After `failure_threshold` failures the
+    circuit opens and every request fails fast for `reset_timeout` seconds. The next request after that
+    is let through as a half-open probe (others keep failing fast): success closes the circuit, failure
+    opens it again for another `reset_timeout`.
+    """
+
+    def __init__(self, family: str, failure_threshold: int, reset_timeout: float):
+        self.family = family
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_failure: Optional[str] = None
+
+    def before_request(self, request: httpx.Request) -> bool:
+        """
+        Lets the request through or raises CircuitOpenError. Returns True when the request is the
+        half-open probe; the caller hands that back to record_failure / release so that only the probe
+        itself frees the probe slot.
+        """
+        if self.state == CLOSED:
+            return False
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            logger.info(f"Circuit '{self.family}' half-open: probing with {request.url.path}.")
+            return True
+        self.rejected += 1
+        retry_in = max(0.0, self.reset_timeout - (now - self.opened_at))
+        raise CircuitOpenError(
+            f"Gateway circuit for '{self.family}' endpoints is open after {self.consecutive_failures} consecutive "
+            f"failures ({self.last_failure}); failing fast, next probe in {retry_in:.1f}s.",
+            request=request,
+        )
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"Circuit '{self.family}' closed: gateway is responding again.")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def record_failure(self, reason: str, probe: bool = False) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = reason
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit '{self.family}' opened after {self.consecutive_failures} consecutive failures: {reason}")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        if probe:
+            self.probe_in_flight = False
+
+    def release(self, probe: bool) -> None:
+        """Ends a request that finished without an outcome (e.g. the caller was cancelled)."""
+        if probe:
+            self.probe_in_flight = False
+
+    def status(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 2)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+            "next_probe_in_seconds": retry_in,
+            "last_failure": self.last_failure,
+        }
+
+
+class CircuitBreakers:
+    """One circuit per endpoint family (the pacing families), consulted by the gateway client on every call."""
+
+    def __init__(self, enabled: bool = CIRCUIT_BREAKER_ENABLED, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, failure_status_codes: Optional[set] = None):
+        self.enabled = enabled
+        self.failure_status_codes = CIRCUIT_FAILURE_STATUS_CODES if failure_status_codes is None else failure_status_codes
+        self.circuits = {family: Circuit(family, failure_threshold, reset_timeout) for family in FAMILY_PRIORITY}
+
+    def for_path(self, path: str) -> Optional[Circuit]:
+        """The circuit guarding `path`, or None when the breaker is disabled or the path is exempt."""
+        if not self.enabled or any(fnmatch(path, pattern) for pattern in SESSION_PATHS):
+            return None
+        return self.circuits[classify(path)]
+
+    def is_failure(self, response: httpx.Response) -> bool:
+        return response.status_code in self.failure_status_codes
+
+    def reset(self) -> None:
+        for circuit in self.circuits.values():
+            circuit.record_success()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "families": {family: circuit.status() for family, circuit in self.circuits.items()},
+        }
+
+
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,236 @@
+# contract_cache.py
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+
+from mcp_server.config import (
+    CONTRACT_CACHE_DIR, CONTRACT_CACHE_ENABLED, CONTRACT_INFO_CACHE_TTL, CONTRACT_RULES_CACHE_TTL,
+    CONTRACT_CACHE_PRELOAD_ACCOUNT, CONTRACT_CACHE_PRELOAD_KINDS, CONTRACT_CACHE_PRELOAD_CONCURRENCY,
+    POSITIONS_PAGE_CONCURRENCY,
+)
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.metrics import background_task, gateway_metrics
+from mcp_server.services.positions import iter_position_pages
+
+logger = logging.getLogger(__name__)
+
+# Cached endpoints. Rules depend on the side of the order, contract details do not.
+KINDS = {
+    "info": "/iserver/contract/{conid}/info",
+    "info_and_rules": "/iserver/contract/{conid}/info-and-rules",
+    "rules": "/iserver/contract/rules",
+    "algos": "/iserver/contract/{conid}/algos",
+}
+SIDED_KINDS = {"info_and_rules", "rules"}
+
+# Calls the gateway expects before /portfolio and /iserver/contract requests; until they are made it
+# may answer 200 with an error body, which is never cached.
+PRELOAD_PREREQUISITES = ("/portfolio/accounts", "/iserver/accounts")
+
+# Sends the gateway request for a cache miss.
+ContractFetcher = Callable[[], Awaitable[httpx.Response]]
+
+
+class ContractCache:
+    """
+    Persistent cache of contract metadata: details, trading rules and supported algos.
+
+    Entries are keyed by kind, conid and side ("buy"/"sell" for rules, "any" otherwise, plus the query
+    options for algos). The gateway's JSON body is kept as-is, in memory and in one file per entry under
+    CONTRACT_CACHE_DIR, so a hit is served without decoding it and survives restarts. The file's
+    modification time is the entry's age. Contract details live for CONTRACT_INFO_CACHE_TTL and rules
+    and algos for CONTRACT_RULES_CACHE_TTL.
+
+    At startup the entries for every conid held in CONTRACT_CACHE_PRELOAD_ACCOUNT are fetched in the
+    background, so order placement for held positions never waits on contract metadata.
+    """
+
+    def __init__(self, root: str = CONTRACT_CACHE_DIR, enabled: bool = CONTRACT_CACHE_ENABLED,
+                 info_ttl: float = CONTRACT_INFO_CACHE_TTL, rules_ttl: float = CONTRACT_RULES_CACHE_TTL):
+        self.root = root
+        self.enabled = enabled
+        self.ttls = {"info": info_ttl, "info_and_rules": rules_ttl, "rules": rules_ttl, "algos": rules_ttl}
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, bytes]] = {}
+        self._locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+        self._preload_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.preload_status: Dict[str, Any] = {"state": "not started"}
+
+    @staticmethod
+    def side(is_buy: Optional[bool]) -> str:
+        return "any" if is_buy is None else ("buy" if is_buy else "sell")
+
+    def _path(self, key: Tuple[str, str, str]) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", "_".join(key))
+        return os.path.join(self.root, f"{name}.json")
+
+    def _lookup(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        ttl = self.ttls[key[0]]
+        entry = self._entries.get(key)
+        if entry is None:
+            path = self._path(key)
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as f:
+                entry = self._entries[key] = (os.path.getmtime(path), f.read())
+        stored_at, content = entry
+        return content if time.time() - stored_at < ttl else None
+
+    def _store(self, key: Tuple[str, str, str], content: bytes) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+        self._entries[key] = (time.time(), content)
+
+    @staticmethod
+    def _cacheable(content: bytes) -> bool:
+        # The gateway sometimes answers 200 with an error object (e.g. before /iserver/accounts was called).
+        try:
+            payload = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return False
+        return bool(payload) and not (isinstance(payload, dict) and "error" in payload)
+
+    async def get(self, kind: str, conid: Any, side: str, fetch: ContractFetcher, variant: str = "") -> Tuple[bytes, bool]:
+        """
+        Returns (body, from_cache) for an entry, calling `fetch` on a miss. Gateway errors raise
+        httpx.HTTPStatusError as usual; only successful, non-error bodies are stored.
+        """
+        if not self.enabled:
+            response = await fetch()
+            response.raise_for_status()
+            return response.content, False
+        key = (kind, str(conid), side + variant)
+        content = self._lookup(key)
+        if content is not None:
+            self.hits += 1
+            gateway_metrics.record_cache("contract", hits=1)
+            return content, True
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            content = self._lookup(key)
+            if content is not None:
+                self.hits += 1
+                gateway_metrics.record_cache("contract", hits=1)
+                return content, True
+            self.misses += 1
+            gateway_metrics.record_cache("contract", misses=1)
+            response = await fetch()
+            response.raise_for_status()
+            if self._cacheable(response.content):
+                self._store(key, response.content)
+            return response.content, False
+
+    def invalidate(self, conid: Optional[Any] = None) -> int:
+        """Drops every entry for `conid` (all entries when None) from memory and disk."""
+        for key in [k for k in self._entries if conid is None or k[1] == str(conid)]:
+            self._entries.pop(key, None)
+        removed = 0
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if conid is None or any(name.startswith(f"{kind}_{conid}_") for kind in KINDS):
+                    os.remove(os.path.join(self.root, name))
+                    removed += 1
+        return removed
+
+    # --- Startup preload ---
+
+    def _fetcher(self, kind: str, conid: str, is_buy: Optional[bool]) -> ContractFetcher:
+        path = KINDS[kind].format(conid=conid)
+        if kind == "rules":
+            return lambda: gateway.post(path, json={"conid": int(conid), "isBuy": is_buy}, timeout=10)
+        if kind == "info_and_rules":
+            return lambda: gateway.get(path, params={"isBuy": is_buy}, timeout=10)
+        return lambda: gateway.get(path, timeout=10)
+
+    async def _held_conids(self, account_id: str) -> List[str]:
+        conids: List[str] = []
+        async for page in iter_position_pages(account_id, {}, POSITIONS_PAGE_CONCURRENCY):
+            conids.extend(str(p["conid"]) for p in page if p.get("conid"))
+        return list(dict.fromkeys(conids))
+
+    async def preload(self, account_id: str, kinds: List[str] = CONTRACT_CACHE_PRELOAD_KINDS,
+                      concurrency: int = CONTRACT_CACHE_PRELOAD_CONCURRENCY) -> Dict[str, Any]:
+        """Fills the cache for every conid held in `account_id`. Entries that are still fresh are not refetched."""
+        started = time.monotonic()
+        self.preload_status = {"state": "running", "account": account_id}
+        for path in PRELOAD_PREREQUISITES:
+            response = await gateway.get(path, timeout=10)
+            response.raise_for_status()
+        conids = await self._held_conids(account_id)
+        semaphore = asyncio.Semaphore(concurrency)
+        failures = 0
+
+        async def load(kind: str, conid: str, is_buy: Optional[bool]) -> None:
+            nonlocal failures
+            async with semaphore:
+                try:
+                    await self.get(kind, conid, self.side(is_buy), self._fetcher(kind, conid, is_buy))
+                except httpx.HTTPError as exc:
+                    failures += 1
+                    logger.debug(f"Contract cache preload of {kind} for {conid} failed: {exc}")
+
+        jobs = [
+            load(kind, conid, is_buy)
+            for conid in conids
+            for kind in kinds
+            for is_buy in ((True, False) if kind in SIDED_KINDS else (None,))
+        ]
+        await asyncio.gather(*jobs)
+        self.preload_status = {
+            "state": "done",
+            "account": account_id,
+            "conids": len(conids),
+            "entries": len(jobs),
+            "failures": failures,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        logger.info(f"Contract cache preloaded for {len(conids)} held conids ({len(jobs)} entries, {failures} failures).")
+        return self.preload_status
+
+    async def _run_preload(self, account_id: str) -> None:
+        try:
+            await self.preload(account_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.preload_status = {"state": "failed", "account": account_id, "detail": str(exc)}
+            logger.warning(f"Contract cache preload for {account_id} failed: {exc}")
+
+    def start_preload(self, account_id: Optional[str] = CONTRACT_CACHE_PRELOAD_ACCOUNT) -> None:
+        """Starts the preload in the background so it never delays server startup."""
+        if not self.enabled or not account_id or self._preload_task is not None:
+            return
+        self._preload_task = background_task(self._run_preload(account_id))
+
+    async def stop(self) -> None:
+        if self._preload_task is not None and not self._preload_task.done():
+            self._preload_task.cancel()
+            try:
+                await self._preload_task
+            except asyncio.CancelledError:
+                pass
+        self._preload_task = None
+
+    def status(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries_in_memory": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "preload": self.preload_status,
+        }
+
+
+contract_cache = ContractCache()
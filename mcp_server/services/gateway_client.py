@@ -0,0 +1,217 @@
+# gateway_client.py
+import asyncio
+import logging
+import time
+from fnmatch import fnmatch
+from typing import Any, Optional
+
+import httpx
+
+from mcp_server.config import (
+    BASE_URL,
+    GATEWAY_HTTP2,
+    GATEWAY_MAX_CONNECTIONS,
+    GATEWAY_MAX_KEEPALIVE_CONNECTIONS,
+    GATEWAY_KEEPALIVE_EXPIRY,
+    GATEWAY_CONNECT_TIMEOUT,
+    GATEWAY_TIMEOUTS,
+)
+from mcp_server.services.circuit_breaker import circuit_breakers
+from mcp_server.services.latency_tracker import latency_tracker
+from mcp_server.services.metrics import gateway_metrics
+from mcp_server.services.rate_limiter import pacing_limiter
+from mcp_server.services.session_keeper import session_keeper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+
+
+class GatewayClientManager:
+    """
+    Owns the single, application-scoped httpx.AsyncClient used to talk to the IBKR gateway.
+
+    The client keeps connections alive between tool calls so that routers no longer pay a new
+    TCP connection and TLS handshake per request. It is opened and closed by the FastAPI lifespan,
+    and created lazily on first use when the lifespan has not run (scripts, tests).
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        http2: bool = GATEWAY_HTTP2,
+        max_connections: int = GATEWAY_MAX_CONNECTIONS,
+        max_keepalive_connections: int = GATEWAY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = GATEWAY_KEEPALIVE_EXPIRY,
+        connect_timeout: float = GATEWAY_CONNECT_TIMEOUT,
+        timeouts: Optional[dict] = None,
+    ):
+        self.base_url = base_url
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.connect_timeout = connect_timeout
+        self.timeouts = GATEWAY_TIMEOUTS if timeouts is None else timeouts
+        self.http2_active = False
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("GATEWAY_HTTP2 is enabled but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+                http2 = False
+        self.http2_active = http2
+        return httpx.AsyncClient(
+            verify=False,
+            http2=http2,
+            limits=self.limits,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=self.connect_timeout),
+        )
+
+    async def start(self) -> None:
+        """Opens the pooled client. Safe to call more than once."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+            logger.info(f"Gateway client started (http2={self.http2_active}, limits={self.limits}).")
+
+    async def close(self) -> None:
+        """Closes the pooled client and every kept-alive connection."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Gateway client closed.")
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def timeout_for(self, path: str, default: Optional[float] = None) -> float:
+        """Resolves the timeout for a gateway path: configured override first, then the router default."""
+        for pattern, seconds in self.timeouts.items():
+            if fnmatch(path, pattern):
+                return float(seconds)
+        return float(default) if default is not None else DEFAULT_TIMEOUT
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    async def request(self, method: str, path: str, *, timeout: Optional[float] = None, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        """
+        Sends a request to the gateway over the pooled client.
+
+        `path` is relative to BASE_URL (e.g. "/portfolio/accounts"). Extra keyword arguments
+        (params, json, content, headers) are forwarded to httpx unchanged. Every call is checked against
+        its endpoint family's circuit breaker (raising CircuitOpenError while it is open) and then waits
+        for the family's pacing budget. GET timeouts adapt to the route's observed latency, and eligible
+        GETs are hedged when the first attempt is slower than the route's p95. While the session keeper
+        is re-authenticating, session-bound requests wait for it briefly before any of this.
+
+        With `stream=True` the call returns as soon as the response headers arrive and the body is left
+        unread: the caller iterates it (e.g. `aiter_raw()`) and must close the response. Streamed
+        requests are never hedged.
+
+        Every call, including those refused by an open circuit, is recorded in the Prometheus metrics.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self._guarded_request(method, path, timeout, stream, **kwargs)
+        except httpx.HTTPError as exc:
+            gateway_metrics.record_error(method, path, exc, time.perf_counter() - started)
+            raise
+        gateway_metrics.record_response(method, path, response, time.perf_counter() - started, streamed=stream)
+        return response
+
+    async def _guarded_request(self, method: str, path: str, timeout: Optional[float], stream: bool, **kwargs: Any) -> httpx.Response:
+        await session_keeper.wait_ready(path)
+        circuit = circuit_breakers.for_path(path)
+        probe = circuit is not None and circuit.before_request(httpx.Request(method, self.url(path)))
+        timeout = latency_tracker.timeout_for(method, path, self.timeout_for(path, timeout))
+        hedge_delay = latency_tracker.hedge_delay(method, path)
+        try:
+            if hedge_delay is None or stream:
+                response = await self._send(method, path, timeout, stream=stream, **kwargs)
+            else:
+                response = await self._send_hedged(method, path, timeout, hedge_delay, **kwargs)
+        except httpx.TransportError as exc:
+            if circuit is not None:
+                circuit.record_failure(f"{type(exc).__name__} on {path}", probe)
+            raise
+        except BaseException:
+            if circuit is not None:
+                circuit.release(probe)
+            raise
+        session_keeper.observe(path, response.status_code)
+        if circuit is not None:
+            if circuit_breakers.is_failure(response):
+                circuit.record_failure(f"HTTP {response.status_code} on {path}", probe)
+            else:
+                circuit.record_success()
+        return response
+
+    async def _send(self, method: str, path: str, timeout: float, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        queued = time.perf_counter()
+        await pacing_limiter.acquire(path)
+        started = time.perf_counter()
+        gateway_metrics.record_pacing_wait(path, started - queued)
+        # A bare float would replace the client's Timeout for every phase, connect included.
+        phases = httpx.Timeout(timeout, connect=self.connect_timeout)
+        try:
+            if stream:
+                request = self.client.build_request(method, self.url(path), timeout=phases, **kwargs)
+                response = await self.client.send(request, stream=True)
+            else:
+                response = await self.client.request(method, self.url(path), timeout=phases, **kwargs)
+        except httpx.TimeoutException:
+            latency_tracker.record_timeout(path, timeout)
+            raise
+        latency_tracker.record(path, time.perf_counter() - started)
+        return response
+
+    async def _send_hedged(self, method: str, path: str, timeout: float, delay: float, **kwargs: Any) -> httpx.Response:
+        """Sends the request and, if it has not answered after `delay`, a duplicate; the first success wins."""
+        primary = asyncio.create_task(self._send(method, path, timeout, **kwargs))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            latency_tracker.record_hedge(path)
+            gateway_metrics.record_retry(path, "hedge")
+            hedge = asyncio.create_task(self._send(method, path, timeout, **kwargs))
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            latency_tracker.record_hedge_win(path)
+                        return task.result()
+            # Both attempts failed: report the original request's error.
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+
+# Application-wide instance shared by every router.
+gateway = GatewayClientManager()
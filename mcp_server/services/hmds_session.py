@@ -0,0 +1,90 @@
+# hmds_session.py
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from mcp_server.config import HMDS_SESSION_TTL, HMDS_REAUTH_STATUS_CODES
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HmdsSessionManager:
+    """
+    Keeps the HMDS session initialised instead of calling /hmds/auth/init before every /hmds request.
+
+    The session is initialised on first use and then considered valid until a request comes back with
+    an auth-related status (HMDS_REAUTH_STATUS_CODES), at which point it is re-initialised once and the
+    request retried. HMDS_SESSION_TTL optionally forces a re-init after a fixed age (0 disables it).
+    """
+
+    def __init__(self, ttl: float = HMDS_SESSION_TTL, reauth_status_codes: Optional[set] = None):
+        self.ttl = ttl
+        self.reauth_status_codes = HMDS_REAUTH_STATUS_CODES if reauth_status_codes is None else reauth_status_codes
+        self._initialised_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.init_calls = 0
+        self.init_calls_saved = 0
+        self.reinits_after_auth_failure = 0
+
+    @property
+    def is_valid(self) -> bool:
+        if self._initialised_at is None:
+            return False
+        return not self.ttl or time.monotonic() - self._initialised_at < self.ttl
+
+    def invalidate(self) -> None:
+        self._initialised_at = None
+
+    async def _init(self) -> None:
+        self.init_calls += 1
+        response = await gateway.get("/hmds/auth/init", timeout=10)
+        response.raise_for_status()
+        self._initialised_at = time.monotonic()
+        logger.info("HMDS session initialised.")
+
+    async def ensure(self) -> None:
+        """Initialises the session if needed. Concurrent callers share a single init call."""
+        if self.is_valid:
+            self.init_calls_saved += 1
+            return
+        async with self._lock:
+            if self.is_valid:
+                self.init_calls_saved += 1
+                return
+            await self._init()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Sends an /hmds request on an initialised session, re-initialising and retrying once on an auth failure."""
+        await self.ensure()
+        response = await gateway.request(method, path, **kwargs)
+        if response.status_code in self.reauth_status_codes:
+            logger.warning(f"HMDS request {path} returned {response.status_code}; re-initialising the HMDS session.")
+            self.reinits_after_auth_failure += 1
+            gateway_metrics.record_retry(path, "hmds_reinit")
+            self.invalidate()
+            await self.ensure()
+            response = await gateway.request(method, path, **kwargs)
+        return response
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "valid": self.is_valid,
+            "session_age_seconds": round(time.monotonic() - self._initialised_at, 1) if self._initialised_at else None,
+            "init_calls": self.init_calls,
+            "init_calls_saved": self.init_calls_saved,
+            "reinits_after_auth_failure": self.reinits_after_auth_failure,
+        }
+
+
+hmds_session = HmdsSessionManager()
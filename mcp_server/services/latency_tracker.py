@@ -0,0 +1,152 @@
+# latency_tracker.py
+import re
+from collections import deque
+from fnmatch import fnmatch
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from mcp_server.config import (
+    ADAPTIVE_TIMEOUTS_ENABLED, ADAPTIVE_TIMEOUT_MULTIPLIER, ADAPTIVE_TIMEOUT_MIN, ADAPTIVE_TIMEOUT_EXEMPT_FAMILIES,
+    LATENCY_WINDOW_SIZE, LATENCY_MIN_SAMPLES,
+    HEDGING_ENABLED, HEDGE_PATHS, HEDGE_MAX_RATIO, HEDGE_MIN_DELAY,
+)
+from mcp_server.services.rate_limiter import classify
+
+# Percentiles are recomputed after this many new samples rather than on every request.
+_RECOMPUTE_EVERY = 10
+
+# Conids, order and page numbers are all digits; account ids are a short uppercase prefix and digits
+# (U1234567, DU1234567, F1234567). Route names that merely contain a digit ("subaccounts2") are kept.
+_ID_SEGMENT = re.compile(r"\d+|[A-Z]{1,3}\d+")
+
+
+def route_template(path: str) -> str:
+    """Collapses path segments that carry ids (account ids, conids, page numbers) so that
+    "/portfolio/U1234567/positions/0" and "/portfolio/U7654321/positions/3" share one route."""
+    return "/".join("{id}" if _ID_SEGMENT.fullmatch(segment) else segment for segment in path.split("/"))
+
+
+class RouteLatency:
+    """Sliding window of the most recent upstream latencies (seconds) for one route."""
+
+    def __init__(self, window_size: int):
+        self.samples: Deque[float] = deque(maxlen=window_size)
+        self.pending = 0
+        self.p50 = self.p95 = self.p99 = None
+        self.requests = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.pending += 1
+        if self.pending >= _RECOMPUTE_EVERY or self.p95 is None:
+            self.p50, self.p95, self.p99 = (float(v) for v in np.percentile(np.fromiter(self.samples, float), [50, 95, 99]))
+            self.pending = 0
+
+
+class LatencyTracker:
+    """
+    Tracks upstream latency percentiles per gateway route and derives timeouts and hedging delays from them.
+
+    Once a route has `min_samples` observations, GET requests use `multiplier` x p99 as their timeout
+    (never below `timeout_min` and never above the router's static timeout), so a hung gateway is noticed
+    in seconds on routes that normally answer in milliseconds. Write requests always keep their static
+    timeout: timing out an order that may still be placed is worse than waiting. So do the families in
+    `exempt_families` (history and scanners by default): their stats are keyed by path only, and a
+    p99 learnt from short tail fetches would cut off a full-period request.
+
+    Hedging (optional) applies to idempotent GETs matching HEDGE_PATHS: when the first attempt has not
+    answered after the route's p95, a duplicate is sent and whichever answers first wins. At most
+    `hedge_max_ratio` of a route's requests are hedged, which bounds the extra load on the gateway.
+    """
+
+    def __init__(self, adaptive: bool = ADAPTIVE_TIMEOUTS_ENABLED, multiplier: float = ADAPTIVE_TIMEOUT_MULTIPLIER,
+                 timeout_min: float = ADAPTIVE_TIMEOUT_MIN, exempt_families: Optional[set] = None, window_size: int = LATENCY_WINDOW_SIZE,
+                 min_samples: int = LATENCY_MIN_SAMPLES, hedging: bool = HEDGING_ENABLED,
+                 hedge_paths: Optional[List[str]] = None, hedge_max_ratio: float = HEDGE_MAX_RATIO,
+                 hedge_min_delay: float = HEDGE_MIN_DELAY):
+        self.adaptive = adaptive
+        self.multiplier = multiplier
+        self.timeout_min = timeout_min
+        self.exempt_families = ADAPTIVE_TIMEOUT_EXEMPT_FAMILIES if exempt_families is None else exempt_families
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.hedging = hedging
+        self.hedge_paths = HEDGE_PATHS if hedge_paths is None else hedge_paths
+        self.hedge_max_ratio = hedge_max_ratio
+        self.hedge_min_delay = hedge_min_delay
+        self.routes: Dict[str, RouteLatency] = {}
+
+    def _route(self, path: str) -> RouteLatency:
+        route = route_template(path)
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteLatency(self.window_size)
+        return stats
+
+    def _ready(self, stats: RouteLatency) -> bool:
+        return len(stats.samples) >= self.min_samples and stats.p99 is not None
+
+    def record(self, path: str, seconds: float) -> None:
+        stats = self._route(path)
+        stats.requests += 1
+        stats.record(seconds)
+
+    def record_timeout(self, path: str, timeout: float) -> None:
+        # Counted as a sample at the timeout so a slowing gateway pushes the adaptive timeout back up.
+        stats = self._route(path)
+        stats.timeouts += 1
+        self.record(path, timeout)
+
+    def timeout_for(self, method: str, path: str, static_timeout: float) -> float:
+        stats = self.routes.get(route_template(path))
+        if not self.adaptive or method != "GET" or stats is None or not self._ready(stats):
+            return static_timeout
+        if classify(path) in self.exempt_families:
+            return static_timeout
+        return min(static_timeout, max(self.timeout_min, stats.p99 * self.multiplier))
+
+    def hedge_delay(self, method: str, path: str) -> Optional[float]:
+        """Seconds to wait before sending a hedged duplicate, or None when the request must not be hedged."""
+        if not self.hedging or method != "GET" or not any(fnmatch(path, pattern) for pattern in self.hedge_paths):
+            return None
+        stats = self.routes.get(route_template(path))
+        if stats is None or not self._ready(stats) or stats.hedges >= self.hedge_max_ratio * stats.requests:
+            return None
+        return max(self.hedge_min_delay, stats.p95)
+
+    def record_hedge(self, path: str) -> None:
+        self._route(path).hedges += 1
+
+    def record_hedge_win(self, path: str) -> None:
+        self._route(path).hedge_wins += 1
+
+    def status(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "adaptive_timeouts": self.adaptive,
+            "adaptive_timeout_exempt_families": sorted(self.exempt_families),
+            "hedging": self.hedging,
+            "routes": {
+                route: {
+                    "samples": len(stats.samples),
+                    "requests": stats.requests,
+                    "p50_ms": ms(stats.p50),
+                    "p95_ms": ms(stats.p95),
+                    "p99_ms": ms(stats.p99),
+                    "adaptive_timeout_ms": ms(max(self.timeout_min, stats.p99 * self.multiplier)) if self._ready(stats) else None,
+                    "timeouts": stats.timeouts,
+                    "hedges": stats.hedges,
+                    "hedge_wins": stats.hedge_wins,
+                }
+                for route, stats in sorted(self.routes.items())
+            },
+        }
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,177 @@
+# market_stream.py
+import asyncio
+import json
+import logging
+import ssl
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from websockets.asyncio.client import ClientConnection, connect
+
+from mcp_server.config import (
+    STREAMING_ENABLED, STREAMING_WS_URL, STREAMING_CONIDS, STREAMING_FIELDS,
+    STREAMING_HEARTBEAT_INTERVAL, STREAMING_RECONNECT_MAX_DELAY,
+)
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.tick_store import tick_store
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataStream:
+    """
+    Persistent WebSocket subscription to the gateway's streaming market data (smd) topic.
+
+    On connect the client authenticates with the session id returned by /tickle, subscribes every
+    configured conid and then feeds each update into the tick store. A "tic" heartbeat keeps the
+    socket open. When the connection drops all conids are marked stale, so snapshots fall back to
+    the REST endpoints, and the client reconnects with exponential backoff.
+    """
+
+    def __init__(self, url: str = STREAMING_WS_URL, conids: Iterable[str] = STREAMING_CONIDS, fields: List[str] = STREAMING_FIELDS,
+                 enabled: bool = STREAMING_ENABLED, heartbeat_interval: float = STREAMING_HEARTBEAT_INTERVAL,
+                 reconnect_max_delay: float = STREAMING_RECONNECT_MAX_DELAY):
+        self.url = url
+        self.enabled = enabled
+        self.default_fields = list(fields)
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_max_delay = reconnect_max_delay
+        # conid -> fields subscribed on the stream
+        self.subscriptions: Dict[str, List[str]] = {str(conid): list(fields) for conid in conids}
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.last_error: Optional[str] = None
+        self._ws: Optional[ClientConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Market data stream started for {len(self.subscriptions)} conids ({self.url}).")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.url.startswith("wss://"):
+            return None
+        # The gateway serves a self-signed certificate, as for the REST client (verify=False).
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+
+    async def _authenticate(self, ws: ClientConnection) -> None:
+        try:
+            response = await gateway.post("/tickle", timeout=10)
+            response.raise_for_status()
+            session = response.json().get("session")
+        except Exception as exc:
+            logger.warning(f"Could not read the gateway session from /tickle, streaming without it: {exc}")
+            return
+        if session:
+            await ws.send(json.dumps({"session": session}))
+
+    @staticmethod
+    def _subscribe_message(conid: str, fields: List[str]) -> str:
+        return f"smd+{conid}+{json.dumps({'fields': fields})}"
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with connect(self.url, ssl=self._ssl_context(), open_timeout=10, ping_interval=None, max_size=None) as ws:
+                    await self._authenticate(ws)
+                    for conid, fields in list(self.subscriptions.items()):
+                        await ws.send(self._subscribe_message(conid, fields))
+                    self._ws = ws
+                    self.connected = True
+                    self.connects += 1
+                    self.last_error = None
+                    delay = 1.0
+                    logger.info(f"Market data stream connected to {self.url}.")
+                    heartbeat = asyncio.create_task(self._heartbeat(ws))
+                    try:
+                        async for message in ws:
+                            self._handle(message)
+                    finally:
+                        heartbeat.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = str(exc)
+                logger.warning(f"Market data stream error, reconnecting in {delay:.0f}s: {exc}")
+            finally:
+                self._ws = None
+                self.connected = False
+                tick_store.mark_stale()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max_delay)
+
+    async def _heartbeat(self, ws: ClientConnection) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await ws.send("tic")
+
+    def _handle(self, message: Any) -> None:
+        try:
+            payload = orjson.loads(message)
+        except orjson.JSONDecodeError:
+            return
+        if not isinstance(payload, dict):
+            return
+        topic = payload.get("topic") or ""
+        if not topic.startswith("smd+"):
+            return
+        conid = topic[4:]
+        if conid not in self.subscriptions:
+            return
+        self.messages += 1
+        if "error" in payload:
+            logger.warning(f"Streaming error for conid {conid}: {payload['error']}")
+            return
+        fields = {key: value for key, value in payload.items() if key[:1].isdigit()}
+        if fields:
+            tick_store.update(conid, fields, payload.get("_updated"))
+
+    async def subscribe(self, conids: Iterable[str], fields: Optional[List[str]] = None) -> List[str]:
+        """Adds conids to the stream (or changes their fields) and returns the subscribed conids."""
+        fields = fields or self.default_fields
+        for conid in conids:
+            conid = str(conid)
+            self.subscriptions[conid] = list(fields)
+            if self._ws is not None:
+                await self._ws.send(self._subscribe_message(conid, fields))
+        return sorted(self.subscriptions)
+
+    async def unsubscribe(self, conids: Iterable[str]) -> List[str]:
+        for conid in conids:
+            conid = str(conid)
+            if self.subscriptions.pop(conid, None) is not None and self._ws is not None:
+                await self._ws.send(f"umd+{conid}+{{}}")
+            tick_store.forget(conid)
+        return sorted(self.subscriptions)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "url": self.url,
+            "connected": self.connected,
+            "connects": self.connects,
+            "messages": self.messages,
+            "last_error": self.last_error,
+            "subscriptions": self.subscriptions,
+            "store": tick_store.stats(),
+        }
+
+
+market_stream = MarketDataStream()
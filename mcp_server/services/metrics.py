@@ -0,0 +1,162 @@
+# metrics.py
+import asyncio
+import contextvars
+import functools
+from typing import Any, Coroutine, Iterable, List, Pattern, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import Request
+from fastapi.routing import APIRoute
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+
+from mcp_server.config import BASE_URL, METRICS_ENABLED
+from mcp_server.services.latency_tracker import route_template
+from mcp_server.services.rate_limiter import classify
+
+# Router tag (an ALL_MODULES key) of the inbound request being served. Gateway calls made outside a
+# request (contract preload, order feed, session keeper) are labelled "background".
+current_tag: contextvars.ContextVar[str] = contextvars.ContextVar("current_tag", default="background")
+
+# Route label of gateway paths that match none of the app's routes (e.g. forwarded by the proxy).
+OTHER_ROUTE = "other"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_BASE_PATH = urlparse(BASE_URL).path.rstrip("/")
+
+
+async def track_route(request: Request) -> None:
+    """
+    App-wide dependency that records the matched route's tag for the gateway calls the handler makes.
+    It runs in the handler's context, so the value is visible to everything the handler awaits.
+    """
+    route = request.scope.get("route")
+    tags = getattr(route, "tags", None)
+    current_tag.set(str(tags[0]) if tags else "untagged")
+
+
+def background_task(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    asyncio.create_task for long-lived service loops. A task copies the context it is created in, so
+    a poller started from a handler would label its gateway calls with that request's tag forever;
+    this one runs with the tag reset to "background".
+    """
+    context = contextvars.copy_context()
+    context.run(current_tag.set, "background")
+    return asyncio.create_task(coro, context=context)
+
+
+class GatewayMetrics:
+    """
+    Prometheus instrumentation of the gateway client, exposed on /metrics.
+
+    Every outbound call is counted by router tag, method, route and status, with its latency as seen
+    by the caller (pacing wait and hedging included), the bytes sent and received, and the error type
+    when it raised. The route label is the path template of the app route that mirrors the gateway
+    path (e.g. "/portfolio/{accountId}/summary", see register_routes), or "other" when none does, so
+    ids and arbitrary proxied paths never become label values. Retries (hedges, HMDS
+    re-initialisations, re-authentications) and cache lookups of the server's own caches have their
+    own counters, from which hit ratios follow.
+    """
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.registry = registry
+        self.requests = Counter(
+            "ibkr_gateway_requests_total", "Gateway requests by router tag, route and HTTP status.",
+            ["tag", "method", "route", "status"], registry=registry)
+        self.duration = Histogram(
+            "ibkr_gateway_request_duration_seconds", "Gateway request latency including pacing wait and hedging.",
+            ["tag", "method", "route"], buckets=LATENCY_BUCKETS, registry=registry)
+        self.bytes_sent = Counter(
+            "ibkr_gateway_request_bytes_total", "Request body bytes sent to the gateway.", ["tag", "route"], registry=registry)
+        self.bytes_received = Counter(
+            "ibkr_gateway_response_bytes_total", "Response body bytes received from the gateway.", ["tag", "route"], registry=registry)
+        self.errors = Counter(
+            "ibkr_gateway_errors_total", "Gateway requests that raised (timeouts, connection errors, open circuits).",
+            ["tag", "method", "route", "error"], registry=registry)
+        self.retries = Counter(
+            "ibkr_gateway_retries_total", "Repeated gateway requests: hedges, HMDS re-initialisations, re-authentications.",
+            ["tag", "route", "kind"], registry=registry)
+        self.pacing_wait = Histogram(
+            "ibkr_gateway_pacing_wait_seconds", "Time spent waiting for the pacing budget.",
+            ["family"], buckets=LATENCY_BUCKETS, registry=registry)
+        self.cache_lookups = Counter(
+            "ibkr_cache_lookups_total", "Lookups in the MCP server's caches by result (hit or miss).",
+            ["cache", "result"], registry=registry)
+        self._templates: List[Tuple[int, Pattern, str]] = []
+        self._route = functools.lru_cache(maxsize=4096)(self._match_route)
+
+    def register_routes(self, routes: Iterable[Any]) -> None:
+        """
+        Takes the app's routes as the templates for route labels. The routers mirror the gateway's
+        paths, so "/portfolio/U1234567/positions/0" is labelled "/portfolio/{accountId}/positions/{pageId}".
+        Until this is called, ids are collapsed by the latency tracker's route_template.
+        """
+        templates = [
+            (sum(1 for segment in route.path.split("/") if segment and "{" not in segment), route.path_regex, route.path)
+            for route in routes
+            if isinstance(route, APIRoute)
+        ]
+        # The most literal template wins: "/portfolio/accounts" over "/portfolio/{accountId}".
+        self._templates = sorted(templates, key=lambda template: -template[0])
+        self._route.cache_clear()
+
+    def _match_route(self, path: str) -> str:
+        if not self._templates:
+            return route_template(path)
+        for _, pattern, template in self._templates:
+            if pattern.match(path):
+                return template
+        return OTHER_ROUTE
+
+    def record_response(self, method: str, path: str, response: httpx.Response, seconds: float, streamed: bool = False) -> None:
+        if not self.enabled:
+            return
+        tag = current_tag.get()
+        route = self._route(path)
+        self.requests.labels(tag, method, route, str(response.status_code)).inc()
+        self.duration.labels(tag, method, route).observe(seconds)
+        self.bytes_sent.labels(tag, route).inc(int(response.request.headers.get("content-length") or 0))
+        if not streamed:
+            self.bytes_received.labels(tag, route).inc(response.num_bytes_downloaded or len(response.content))
+
+    def record_stream_end(self, response: httpx.Response) -> None:
+        """Counts the body of a streamed response once it has been relayed."""
+        if not self.enabled:
+            return
+        path = response.request.url.path
+        if _BASE_PATH and path.startswith(_BASE_PATH):
+            path = path[len(_BASE_PATH):]
+        self.bytes_received.labels(current_tag.get(), self._route(path)).inc(response.num_bytes_downloaded)
+
+    def record_error(self, method: str, path: str, exc: BaseException, seconds: float) -> None:
+        if not self.enabled:
+            return
+        tag = current_tag.get()
+        route = self._route(path)
+        self.errors.labels(tag, method, route, type(exc).__name__).inc()
+        self.duration.labels(tag, method, route).observe(seconds)
+
+    def record_retry(self, path: str, kind: str) -> None:
+        if self.enabled:
+            self.retries.labels(current_tag.get(), self._route(path), kind).inc()
+
+    def record_pacing_wait(self, path: str, seconds: float) -> None:
+        if self.enabled:
+            self.pacing_wait.labels(classify(path)).observe(seconds)
+
+    def record_cache(self, cache: str, hits: int = 0, misses: int = 0) -> None:
+        if not self.enabled:
+            return
+        if hits:
+            self.cache_lookups.labels(cache, "hit").inc(hits)
+        if misses:
+            self.cache_lookups.labels(cache, "miss").inc(misses)
+
+    def exposition(self) -> bytes:
+        return generate_latest(self.registry)
+
+
+gateway_metrics = GatewayMetrics()
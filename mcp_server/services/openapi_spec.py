@@ -0,0 +1,146 @@
+# openapi_spec.py
+import asyncio
+import difflib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from mcp_server.config import OPEN_API_SPEC_URL, OPENAPI_FILE_PATH, OPENAPI_SPEC_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch")
+
+_PARAM = re.compile(r"\{[^/{}]+\}")
+
+
+class Operation:
+    """One method + path template of the specification."""
+
+    __slots__ = ("method", "template", "summary", "tags", "literals", "pattern")
+
+    def __init__(self, method: str, template: str, summary: str, tags: List[str]):
+        self.method = method
+        self.template = template
+        self.summary = summary
+        self.tags = tags
+        # More literal segments means a more specific template: "/iserver/account/orders" must win
+        # over "/iserver/account/{accountId}".
+        self.literals = sum(1 for segment in template.split("/") if segment and not _PARAM.search(segment))
+        parts = _PARAM.split(template)
+        self.pattern = re.compile("^" + "[^/]+".join(re.escape(part) for part in parts) + "$")
+
+    def describe(self) -> Dict[str, Any]:
+        return {"method": self.method, "path": self.template, "summary": self.summary, "tags": self.tags}
+
+
+def parse_spec(spec: Dict[str, Any]) -> List[Operation]:
+    """Operations of an OpenAPI document, with paths relative to the gateway base URL (/v1/api)."""
+    prefix = ""
+    for server in spec.get("servers") or []:
+        server_path = urlparse(server.get("url", "")).path.rstrip("/")
+        if server_path and all(path.startswith(server_path + "/") for path in spec.get("paths", {})):
+            prefix = server_path
+            break
+    operations = []
+    for path, item in (spec.get("paths") or {}).items():
+        template = path[len(prefix):] if prefix else path
+        for method in HTTP_METHODS:
+            operation = item.get(method)
+            if operation is not None:
+                operations.append(Operation(method.upper(), template, operation.get("summary") or "", operation.get("tags") or []))
+    return operations
+
+
+class OpenApiSpec:
+    """
+    Route table of the IBKR Web API built from its OpenAPI specification.
+
+    Used by the proxy router as an allow-list: only method + path combinations declared in the
+    specification are forwarded to the gateway. The document is read from `file_path` when it exists,
+    otherwise downloaded from `url` once and kept at `cache_path`. Operations are indexed by their
+    first path segment so matching a request only tests the templates of one endpoint family.
+    """
+
+    def __init__(self, url: str = OPEN_API_SPEC_URL, file_path: str = OPENAPI_FILE_PATH, cache_path: str = OPENAPI_SPEC_CACHE_PATH):
+        self.url = url
+        self.file_path = file_path
+        self.cache_path = cache_path
+        self.source: Optional[str] = None
+        self._operations: Optional[List[Operation]] = None
+        self._by_segment: Dict[str, List[Operation]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _first_segment(path: str) -> str:
+        return path.lstrip("/").split("/", 1)[0]
+
+    def _index(self, operations: List[Operation], source: str) -> None:
+        by_segment: Dict[str, List[Operation]] = {}
+        for operation in operations:
+            by_segment.setdefault(self._first_segment(operation.template), []).append(operation)
+        for candidates in by_segment.values():
+            candidates.sort(key=lambda op: op.literals, reverse=True)
+        self._by_segment = by_segment
+        self._operations = operations
+        self.source = source
+        logger.info(f"OpenAPI spec loaded from {source}: {len(operations)} operations.")
+
+    async def _read(self) -> Tuple[Dict[str, Any], str]:
+        for path in (self.file_path, self.cache_path):
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    return json.load(f), path
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(f"{self.cache_path}.tmp", "wb") as f:
+            f.write(response.content)
+        os.replace(f"{self.cache_path}.tmp", self.cache_path)
+        return response.json(), self.url
+
+    async def operations(self) -> List[Operation]:
+        """Loads the specification on first use. Raises httpx.HTTPError or ValueError when it cannot be read."""
+        if self._operations is not None:
+            return self._operations
+        async with self._lock:
+            if self._operations is None:
+                spec, source = await self._read()
+                self._index(parse_spec(spec), source)
+        return self._operations
+
+    async def match(self, method: str, path: str) -> Tuple[Optional[Operation], List[str]]:
+        """
+        The operation serving `method path`, or (None, allowed methods) when the path exists with other
+        methods only. (None, []) means the path is not in the specification.
+        """
+        await self.operations()
+        allowed = []
+        for operation in self._by_segment.get(self._first_segment(path), []):
+            if operation.pattern.match(path):
+                if operation.method == method:
+                    return operation, []
+                allowed.append(operation.method)
+        return None, sorted(set(allowed))
+
+    async def suggest(self, path: str, limit: int = 5) -> List[str]:
+        templates = sorted({operation.template for operation in await self.operations()})
+        return difflib.get_close_matches(path, templates, n=limit, cutoff=0.5)
+
+    async def search(self, query: Optional[str] = None, tag: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        operations = await self.operations()
+        if tag:
+            operations = [op for op in operations if any(tag.lower() == t.lower() for t in op.tags)]
+        if query:
+            needle = query.lower()
+            operations = [op for op in operations if needle in op.template.lower() or needle in op.summary.lower()]
+        return {"source": self.source, "total": len(operations), "results": [op.describe() for op in operations[:limit]]}
+
+
+openapi_spec = OpenApiSpec()
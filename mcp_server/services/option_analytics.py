@@ -0,0 +1,168 @@
+# option_analytics.py
+from datetime import date, datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+# Contracts expiring on the valuation date are priced with half a day left.
+MIN_TIME_TO_EXPIRY = 0.5 / 365
+
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+
+
+# Chebyshev coefficients for erfc (Numerical Recipes, 3rd ed., 6.2.2); relative error ~1e-14.
+# NumPy has no erf and SciPy is not a dependency.
+_ERFC_COF = np.array([
+    -1.3026537197817094, 6.4196979235649026e-1, 1.9476473204185836e-2, -9.561514786808631e-3,
+    -9.46595344482036e-4, 3.66839497852761e-4, 4.2523324806907e-5, -2.0278578112534e-5,
+    -1.624290004647e-6, 1.303655835580e-6, 1.5626441722e-8, -8.5238095915e-8,
+    6.529054439e-9, 5.059343495e-9, -9.91364156e-10, -2.27365122e-10,
+    9.6467911e-11, 2.394038e-12, -6.886027e-12, 8.94487e-13,
+    3.13092e-13, -1.12708e-13, 3.81e-16, 7.106e-15,
+    -1.523e-15, -9.4e-17, 1.21e-16, -2.8e-17,
+])
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    z = np.abs(x)
+    t = 2.0 / (2.0 + z)
+    ty = 4.0 * t - 2.0
+    d = np.zeros_like(z)
+    dd = np.zeros_like(z)
+    for coefficient in _ERFC_COF[:0:-1]:
+        d, dd = ty * d - dd + coefficient, d
+    result = t * np.exp(-z * z + 0.5 * (_ERFC_COF[0] + ty * d) - dd)
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / np.sqrt(2.0))
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def year_fractions(expiries: np.ndarray, valuation_date: Optional[date] = None) -> np.ndarray:
+    """ACT/365 time to expiry for YYYYMMDD strings."""
+    valuation = np.datetime64(valuation_date or date.today(), "D")
+    # A chain has few distinct expiries: parse each once.
+    unique, inverse = np.unique(np.asarray(expiries, dtype=str), return_inverse=True)
+    expiry_days = np.array([datetime.strptime(e, "%Y%m%d").date() for e in unique], dtype="datetime64[D]")
+    return np.maximum((expiry_days[inverse] - valuation).astype(float) / 365.0, MIN_TIME_TO_EXPIRY)
+
+
+def _d1_d2(S, K, T, r, q, sigma):
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t
+
+
+def bs_price(S, K, T, r, q, sigma, is_call) -> np.ndarray:
+    """Black-Scholes-Merton price with continuous dividend yield; every argument broadcasts."""
+    d1, d2 = _d1_d2(S, K, T, r, q, sigma)
+    discounted_spot = S * np.exp(-q * T)
+    discounted_strike = K * np.exp(-r * T)
+    sign = np.where(is_call, 1.0, -1.0)
+    return sign * (discounted_spot * norm_cdf(sign * d1) - discounted_strike * norm_cdf(sign * d2))
+
+
+def bs_vega(S, K, T, r, q, sigma) -> np.ndarray:
+    """dPrice/dSigma per 1.00 of volatility."""
+    d1, _ = _d1_d2(S, K, T, r, q, sigma)
+    return S * np.exp(-q * T) * norm_pdf(d1) * np.sqrt(T)
+
+
+def bs_greeks(S, K, T, r, q, sigma, is_call) -> Dict[str, np.ndarray]:
+    """
+    Delta, gamma, vega (per 1 vol point), theta (per calendar day) and rho (per 1% rate move).
+    """
+    d1, d2 = _d1_d2(S, K, T, r, q, sigma)
+    sqrt_t = np.sqrt(T)
+    div = np.exp(-q * T)
+    disc = np.exp(-r * T)
+    pdf_d1 = norm_pdf(d1)
+    # N(-x) = 1 - N(x): two CDF evaluations cover calls and puts.
+    cdf_d1 = norm_cdf(d1)
+    cdf_d2 = norm_cdf(d2)
+
+    delta = np.where(is_call, div * cdf_d1, div * (cdf_d1 - 1.0))
+    gamma = div * pdf_d1 / (S * sigma * sqrt_t)
+    vega = S * div * pdf_d1 * sqrt_t
+    decay = -S * div * pdf_d1 * sigma / (2.0 * sqrt_t)
+    theta_call = decay - r * K * disc * cdf_d2 + q * S * div * cdf_d1
+    theta_put = decay + r * K * disc * (1.0 - cdf_d2) - q * S * div * (1.0 - cdf_d1)
+    rho = np.where(is_call, K * T * disc * cdf_d2, -K * T * disc * (1.0 - cdf_d2))
+    return {
+        "delta": delta,
+        "gamma": gamma,
+        "vega": vega / 100.0,
+        "theta": np.where(is_call, theta_call, theta_put) / 365.0,
+        "rho": rho / 100.0,
+    }
+
+
+def implied_volatility(price, S, K, T, r, q, is_call, tol: float = 1e-6, max_iter: int = 50) -> np.ndarray:
+    """
+    Implied volatility for every contract at once.
+
+    Each contract keeps a bracket [lo, hi] that always contains the root. A Newton step is taken
+    where it stays inside the bracket and vega is usable, otherwise the bracket is bisected, so the
+    solver converges quadratically near the root and never diverges on deep ITM/OTM options.
+    Prices outside the no-arbitrage bounds return NaN.
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, S, K, T, is_call)))
+    is_call = is_call.astype(bool)
+    div = np.exp(-q * T)
+    disc = np.exp(-r * T)
+    lower_bound = np.where(is_call, np.maximum(S * div - K * disc, 0.0), np.maximum(K * disc - S * div, 0.0))
+    upper_bound = np.where(is_call, S * div, K * disc)
+    valid = np.isfinite(price) & (price > lower_bound) & (price < upper_bound)
+
+    lo = np.full(price.shape, IV_LOWER)
+    hi = np.full(price.shape, IV_UPPER)
+    sigma = np.full(price.shape, 0.3)
+    active = valid.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        s = sigma[active]
+        diff = bs_price(S[active], K[active], T[active], r, q, s, is_call[active]) - price[active]
+        vega = bs_vega(S[active], K[active], T[active], r, q, s)
+
+        converged = np.abs(diff) < tol
+        too_high = diff > 0
+        lo_a = np.where(too_high, lo[active], s)
+        hi_a = np.where(too_high, s, hi[active])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = s - diff / vega
+        use_newton = (vega > 1e-8) & (newton > lo_a) & (newton < hi_a)
+        step = np.where(use_newton, newton, 0.5 * (lo_a + hi_a))
+
+        lo[active], hi[active] = lo_a, hi_a
+        sigma[active] = np.where(converged, s, step)
+        idx = np.flatnonzero(active)
+        active[idx[converged | (hi_a - lo_a < tol * 1e-2)]] = False
+
+    return np.where(valid, sigma, np.nan)
+
+
+def analyse_chain(S: float, strikes, expiries, rights, market_prices=None, volatility: Optional[float] = None,
+                  rate: float = 0.0, dividend_yield: float = 0.0, valuation_date: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    Implied volatility (where a market price is given), theoretical price and Greeks for a whole chain.
+    Contracts without a usable market price are valued at `volatility`; with neither, they come back NaN.
+    """
+    K = np.asarray(strikes, dtype=float)
+    T = year_fractions(np.asarray(expiries), valuation_date)
+    is_call = np.array([str(right).upper().startswith("C") for right in rights])
+    prices = np.full(K.shape, np.nan) if market_prices is None else np.asarray(
+        [np.nan if p is None else p for p in market_prices], dtype=float)
+
+    iv = implied_volatility(prices, S, K, T, rate, dividend_yield, is_call)
+    sigma = np.where(np.isfinite(iv), iv, np.nan if volatility is None else volatility)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theoretical = bs_price(S, K, T, rate, dividend_yield, sigma, is_call)
+        greeks = bs_greeks(S, K, T, rate, dividend_yield, sigma, is_call)
+    return {"time_to_expiry": T, "implied_volatility": iv, "volatility_used": sigma, "theoretical_price": theoretical, **greeks}
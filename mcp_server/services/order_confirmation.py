@@ -0,0 +1,86 @@
+# order_confirmation.py
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+from mcp_server.config import ORDER_AUTO_CONFIRM_MESSAGE_IDS, ORDER_AUTO_CONFIRM_MAX_REPLIES
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import decode
+
+logger = logging.getLogger(__name__)
+
+
+def _items(payload: Any) -> List[Dict[str, Any]]:
+    if isinstance(payload, list):
+        return [item for item in payload if isinstance(item, dict)]
+    return [payload] if isinstance(payload, dict) else []
+
+
+def pending_prompt(payload: Any) -> Optional[Dict[str, Any]]:
+    """The confirmation prompt in an order response ({"id", "message", "messageIds"}), if there is one."""
+    for item in _items(payload):
+        if item.get("id") and "message" in item and "order_id" not in item:
+            return item
+    return None
+
+
+async def resolve_replies(payload: Any, allowed_message_ids: Optional[Set[str]] = None,
+                          max_replies: int = ORDER_AUTO_CONFIRM_MAX_REPLIES) -> Dict[str, Any]:
+    """
+    Answers the confirmation prompts of an order submission until the gateway returns the order.
+
+    `payload` is the decoded answer of the place/modify order call. Each prompt is confirmed through
+    /iserver/reply/{id} only when every one of its messageIds is in the allow-list; a prompt with an
+    unlisted (or no) message id stops the chain and is returned with status "confirmation_required"
+    for the caller to decide, as is a chain longer than `max_replies`. The result always lists the
+    prompts that were confirmed automatically; when a reply call fails (status "error"), the last
+    entry is the reply whose outcome is unknown.
+    """
+    allowed = ORDER_AUTO_CONFIRM_MESSAGE_IDS if allowed_message_ids is None else allowed_message_ids
+    confirmed: List[Dict[str, Any]] = []
+    while True:
+        if isinstance(payload, dict) and "error" in payload:
+            return {"status": "rejected", "error": payload["error"], "confirmed": confirmed, "response": payload}
+        prompt = pending_prompt(payload)
+        if prompt is None:
+            break
+        message_ids = [str(message_id) for message_id in prompt.get("messageIds") or []]
+        unlisted = [message_id for message_id in message_ids if message_id not in allowed]
+        reason = None
+        if unlisted or not message_ids:
+            reason = "message ids not in the auto-confirm allow-list: " + ", ".join(unlisted or ["(none given)"])
+        elif len(confirmed) >= max_replies:
+            reason = f"more than {max_replies} confirmations"
+        if reason:
+            return {
+                "status": "confirmation_required",
+                "reply_id": prompt["id"],
+                "message": prompt.get("message"),
+                "message_ids": message_ids,
+                "reason": reason,
+                "confirmed": confirmed,
+            }
+        logger.info(f"Auto-confirming order reply {prompt['id']} ({', '.join(message_ids)}).")
+        confirmed.append({"reply_id": prompt["id"], "message_ids": message_ids, "message": prompt.get("message")})
+        try:
+            response = await gateway.post(f"/iserver/reply/{prompt['id']}", json={"confirmed": True}, timeout=10)
+            response.raise_for_status()
+            payload = decode(response)
+        except httpx.HTTPStatusError as exc:
+            return {"status": "error", "error": "IBKR API Error", "status_code": exc.response.status_code,
+                    "detail": exc.response.text, "confirmed": confirmed}
+        except httpx.RequestError as exc:
+            return {"status": "error", "error": "Request Error", "detail": str(exc), "confirmed": confirmed}
+        except ValueError as exc:
+            return {"status": "error", "error": "Invalid Response",
+                    "detail": f"Reply {prompt['id']} returned a non-JSON body: {exc}", "confirmed": confirmed}
+
+    orders = [item for item in _items(payload) if "order_id" in item]
+    return {
+        "status": "submitted" if orders else "unknown",
+        "order_id": orders[0]["order_id"] if orders else None,
+        "orders": orders,
+        "confirmed": confirmed,
+        "response": payload,
+    }
@@ -0,0 +1,175 @@
+# order_feed.py
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from mcp_server.config import ORDER_FEED_ENABLED, ORDER_FEED_INTERVAL, ORDER_FEED_IDLE_TIMEOUT
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.metrics import background_task
+from mcp_server.services.responses import decode
+
+logger = logging.getLogger(__name__)
+
+
+class OrderFeed:
+    """
+    Server-side copy of the live order book with a version number that increases on every change.
+
+    A background task polls /iserver/account/orders every `interval` seconds and compares each order
+    with the previous copy. Orders that are new or differ in any field are stamped with the next
+    version; orders that leave a complete (snapshot) list are reported as removed. Callers ask for
+    the changes since the version they last saw and, when there are none yet, wait until the next
+    change or their timeout, so tracking fills costs one small call instead of repeated downloads
+    of the whole list.
+
+    The poller starts on the first request and stops after `idle_timeout` seconds without one, so
+    the gateway is not polled while nobody follows the feed. With ORDER_FEED_ENABLED it runs from
+    startup and never idles out.
+    """
+
+    def __init__(self, interval: float = ORDER_FEED_INTERVAL, idle_timeout: float = ORDER_FEED_IDLE_TIMEOUT,
+                 always_on: bool = ORDER_FEED_ENABLED):
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.always_on = always_on
+        self.version = 0
+        # orderId -> (version of the last change, order)
+        self._orders: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # orderId -> version at which it left the list
+        self._removed: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_demand = 0.0
+        self.polls = 0
+        self.last_poll_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        if self.always_on:
+            self._ensure_running()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _ensure_running(self) -> None:
+        self._last_demand = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = background_task(self._run())
+            logger.info(f"Order feed poller started (every {self.interval}s).")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except (httpx.HTTPError, ValueError) as exc:
+                self.last_error = str(exc) or type(exc).__name__
+                logger.debug(f"Order feed poll failed: {self.last_error}")
+            if not self.always_on and time.monotonic() - self._last_demand > self.idle_timeout:
+                logger.info("Order feed poller stopped: no readers.")
+                return
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> None:
+        response = await gateway.get("/iserver/account/orders", timeout=10)
+        response.raise_for_status()
+        payload = decode(response)
+        if not isinstance(payload, dict) or "error" in payload:
+            raise ValueError(f"Unexpected live orders response: {str(payload)[:200]}")
+        changed = self.apply(payload.get("orders") or [], complete=payload.get("snapshot", True))
+        self.polls += 1
+        self.last_poll_at = time.time()
+        self.last_error = None
+        if self.polls == 1 and not changed:
+            # Readers waiting for the initial (empty) book.
+            self._notify()
+
+    def _notify(self) -> None:
+        # Wake every waiter, then arm a fresh event for the next change.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def apply(self, orders: List[Dict[str, Any]], complete: bool = True) -> bool:
+        """
+        Merges one order list into the book and returns whether anything changed. Removals are only
+        detected from complete lists: the gateway's first answer after login can be partial.
+        """
+        version = self.version + 1
+        changed = False
+        seen = set()
+        for order in orders:
+            order_id = order.get("orderId")
+            if order_id is None:
+                continue
+            order_id = str(order_id)
+            seen.add(order_id)
+            current = self._orders.get(order_id)
+            if current is None or current[1] != order:
+                self._orders[order_id] = (version, order)
+                self._removed.pop(order_id, None)
+                changed = True
+        if complete:
+            for order_id in [order_id for order_id in self._orders if order_id not in seen]:
+                del self._orders[order_id]
+                self._removed[order_id] = version
+                changed = True
+        if changed:
+            self.version = version
+            self._notify()
+        return changed
+
+    async def changes(self, since: int, wait: float) -> Dict[str, Any]:
+        """
+        Orders changed after version `since`, waiting up to `wait` seconds for a change when there is
+        none yet. A `since` ahead of the current version (the server restarted) returns the whole book
+        with `reset` set, as does since=0.
+        """
+        self._ensure_running()
+        reset = since > self.version
+        if reset:
+            since = 0
+        deadline = time.monotonic() + wait
+        # since=0 asks for the current book: it only waits for the first poll.
+        while self.version <= since and not (since == 0 and self.polls > 0):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return {
+            "version": self.version,
+            "since": since,
+            "reset": reset,
+            "orders": [order for version, order in self._orders.values() if version > since],
+            "removed": [order_id for order_id, version in self._removed.items() if version > since],
+            "last_poll_at": self.last_poll_at,
+            "error": self.last_error,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "always_on": self.always_on,
+            "interval": self.interval,
+            "version": self.version,
+            "orders": len(self._orders),
+            "polls": self.polls,
+            "last_poll_at": self.last_poll_at,
+            "last_error": self.last_error,
+        }
+
+
+order_feed = OrderFeed()
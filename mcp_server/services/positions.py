@@ -0,0 +1,38 @@
+# positions.py
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+from mcp_server.services.gateway_client import gateway
+from mcp_server.services.responses import decode
+
+# IBKR returns at most this many positions per page.
+POSITIONS_PAGE_SIZE = 100
+
+
+async def fetch_positions_page(accountId: str, pageId: int, params: Dict[str, str]) -> List[Dict[str, Any]]:
+    response = await gateway.get(f"/portfolio/{accountId}/positions/{pageId}", params=params, timeout=10)
+    response.raise_for_status()
+    page = decode(response)
+    if not isinstance(page, list):
+        raise ValueError(f"Unexpected positions page {pageId} payload: {page}")
+    return page
+
+
+async def iter_position_pages(accountId: str, params: Dict[str, str], concurrency: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yields position pages in order, fetching `concurrency` pages at a time until an empty or short page.
+    Only one window of pages is held in memory at any time.
+    """
+    first_page = 0
+    while True:
+        pages = await asyncio.gather(*[
+            fetch_positions_page(accountId, page_id, params)
+            for page_id in range(first_page, first_page + concurrency)
+        ])
+        for page in pages:
+            if not page:
+                return
+            yield page
+            if len(page) < POSITIONS_PAGE_SIZE:
+                return
+        first_page += concurrency
@@ -0,0 +1,73 @@
+# projection.py
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from mcp_server.config import DEFAULT_PROJECTIONS, PROJECTION_DEFAULTS_ENABLED
+from mcp_server.services.responses import decode, json_response, passthrough
+
+# Passing this as the projection returns the full upstream response.
+FULL_RESPONSE = "*"
+
+
+def build_tree(paths: Iterable[str]) -> Dict[str, Dict]:
+    """Turns dotted field paths ("orders.conid", "orders.side") into a nested key tree."""
+    tree: Dict[str, Dict] = {}
+    for path in paths:
+        node = tree
+        for part in path.strip().split("."):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def project(payload: Any, tree: Dict[str, Dict]) -> Any:
+    """
+    Keeps only the keys in `tree`. Lists are projected item by item, so "orders.conid" applies to every
+    order; a key whose subtree is empty is kept whole. Scalars are returned unchanged.
+    """
+    if not tree:
+        return payload
+    if isinstance(payload, list):
+        return [project(item, tree) for item in payload]
+    if isinstance(payload, dict):
+        return {key: project(payload[key], subtree) for key, subtree in tree.items() if key in payload}
+    return payload
+
+
+def apply_projection(payload: Any, projection: Optional[str], route: str) -> Any:
+    """
+    Trims a gateway response before it is returned to the agent.
+
+    `projection` is the caller's comma-separated field list. When it is omitted, the route's default
+    projection from DEFAULT_PROJECTIONS applies; "*" always returns the full response. Error payloads
+    are never trimmed.
+    """
+    if isinstance(payload, dict) and "error" in payload:
+        return payload
+    if projection:
+        if projection.strip() == FULL_RESPONSE:
+            return payload
+        return project(payload, build_tree(projection.split(",")))
+    if PROJECTION_DEFAULTS_ENABLED and route in DEFAULT_PROJECTIONS:
+        return project(payload, build_tree(DEFAULT_PROJECTIONS[route]))
+    return payload
+
+
+def project_response(response: httpx.Response, projection: Optional[str], route: str) -> Any:
+    """
+    Like apply_projection, but starts from the gateway response: when no projection applies the raw
+    body is forwarded without being decoded, otherwise the trimmed payload is encoded with orjson.
+    """
+    if (projection and projection.strip() == FULL_RESPONSE) or (
+        not projection and not (PROJECTION_DEFAULTS_ENABLED and route in DEFAULT_PROJECTIONS)
+    ):
+        return passthrough(response)
+    return json_response(apply_projection(decode(response), projection, route))
+
+
+PROJECTION_DESCRIPTION = (
+    "Comma-separated list of fields to keep in the response, using dots for nested fields (e.g. 'orders.conid,orders.status'). "
+    "Omit to use the server's default projection for this endpoint (the full response unless default projections are enabled), "
+    "or pass '*' for the full response."
+)
@@ -0,0 +1,186 @@
+# rate_limiter.py
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+from mcp_server.config import PACING_ENABLED, PACING_GLOBAL_BUDGET, PACING_BUDGETS
+
+logger = logging.getLogger(__name__)
+
+# (family, glob) in match order; the first match wins and anything else falls into "other".
+ENDPOINT_FAMILIES: List[Tuple[str, str]] = [
+    ("orders", "/iserver/account/*/orders*"),
+    ("orders", "/iserver/account/*/order/*"),
+    ("orders", "/iserver/reply/*"),
+    ("history", "/iserver/marketdata/history*"),
+    ("history", "/hmds/history*"),
+    ("scanner", "/iserver/scanner/*"),
+    ("scanner", "/hmds/scanner*"),
+    ("market_data", "/iserver/marketdata/*"),
+    ("market_data", "/md/*"),
+    ("portfolio", "/portfolio/*"),
+    ("portfolio", "/pa/*"),
+]
+
+# Lower value is served first when several families compete for the global budget.
+FAMILY_PRIORITY: Dict[str, int] = {
+    "orders": 0,
+    "portfolio": 1,
+    "other": 1,
+    "market_data": 2,
+    "history": 3,
+    "scanner": 3,
+}
+
+
+def classify(path: str) -> str:
+    for family, pattern in ENDPOINT_FAMILIES:
+        if fnmatch(path, pattern):
+            return family
+    return "other"
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def time_until_token(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class FamilyStats:
+    def __init__(self):
+        self.queue_depth = 0
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        if wait > 0:
+            self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "queued_requests": self.waited,
+            "avg_wait_ms": round(self.total_wait / self.waited * 1000, 2) if self.waited else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class PacingLimiter:
+    """
+    Coordinates every outbound gateway call against IBKR pacing limits.
+
+    Each endpoint family has its own token bucket and all of them share a global bucket. Requests that
+    cannot go immediately wait in a priority queue; whenever a global token frees up it goes to the
+    highest-priority waiter whose family still has budget, so order placement and replies are never
+    stuck behind a burst of scanner or history calls.
+    """
+
+    def __init__(self, global_budget: Tuple[float, float] = PACING_GLOBAL_BUDGET, budgets: Optional[Dict[str, Tuple[float, float]]] = None, enabled: bool = PACING_ENABLED):
+        self.enabled = enabled
+        self.global_bucket = TokenBucket(*global_budget)
+        budgets = PACING_BUDGETS if budgets is None else budgets
+        self.buckets = {family: TokenBucket(*budgets.get(family, global_budget)) for family in FAMILY_PRIORITY}
+        self.stats = {family: FamilyStats() for family in FAMILY_PRIORITY}
+        self._queue: List[tuple] = []  # heap of (priority, seq, family, future)
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    async def acquire(self, path: str) -> float:
+        """Waits until `path` may be sent and returns the time spent waiting, in seconds."""
+        if not self.enabled:
+            return 0.0
+        family = classify(path)
+        now = time.monotonic()
+        if not self._queue and self.buckets[family].available(now) and self.global_bucket.available(now):
+            self.buckets[family].take()
+            self.global_bucket.take()
+            self.stats[family].record(0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (FAMILY_PRIORITY[family], next(self._seq), family, future))
+        self.stats[family].queue_depth += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            self._wakeup.set()
+        # If the caller is cancelled while queued the future is cancelled too and the dispatcher drops it.
+        await future
+        wait = time.monotonic() - now
+        self.stats[family].record(wait)
+        return wait
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            now = time.monotonic()
+            released = False
+            if self.global_bucket.available(now):
+                for entry in sorted(self._queue):
+                    _, _, family, future = entry
+                    if future.done():
+                        self._remove(entry)
+                        continue
+                    if self.buckets[family].available(now):
+                        self.buckets[family].take()
+                        self.global_bucket.take()
+                        self._remove(entry)
+                        future.set_result(None)
+                        released = True
+                        break
+            if released:
+                continue
+            if not self._queue:
+                break
+            global_wait = self.global_bucket.time_until_token(now)
+            family_wait = min(self.buckets[family].time_until_token(now) for _, _, family, _ in self._queue)
+            # Sleep until a token is due, or until a new request is queued (it may belong to a family with budget).
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.001, global_wait, family_wait))
+            except asyncio.TimeoutError:
+                pass
+
+    def _remove(self, entry: tuple) -> None:
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        self.stats[entry[2]].queue_depth -= 1
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            "enabled": self.enabled,
+            "queue_depth": len(self._queue),
+            "families": {family: stats.as_dict() for family, stats in self.stats.items()},
+        }
+
+
+pacing_limiter = PacingLimiter()
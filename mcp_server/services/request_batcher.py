@@ -0,0 +1,118 @@
+# request_batcher.py
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from mcp_server.config import SNAPSHOT_BATCH_WINDOW_MS, SNAPSHOT_BATCH_MAX_CONIDS
+from mcp_server.services.gateway_client import gateway
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.conids: Dict[str, None] = {}  # insertion-ordered set
+        self.fields: Dict[str, None] = {}
+        self.waiters: List[tuple] = []  # (conids, fields, future)
+        self.flush_task: Optional[asyncio.Task] = None
+
+
+class SnapshotBatcher:
+    """
+    Coalesces concurrent snapshot requests for one gateway path into a single upstream call.
+
+    Requests arriving within `window_ms` of the first one are merged: their conids and fields are
+    unioned, one GET is sent, and each caller receives only the items for its own conids with only
+    the fields it asked for. A batch is flushed early once it reaches `max_conids`. A window of 0
+    disables batching and forwards each request as-is.
+    """
+
+    def __init__(self, path: str, window_ms: float = SNAPSHOT_BATCH_WINDOW_MS, max_conids: int = SNAPSHOT_BATCH_MAX_CONIDS):
+        self.path = path
+        self.window = window_ms / 1000
+        self.max_conids = max_conids
+        # Requests without an explicit field list cannot be merged with ones that have one.
+        self._pending: Dict[bool, _PendingBatch] = {}
+        self.upstream_calls = 0
+        self.requests = 0
+
+    async def _call(self, conids: List[str], fields: Optional[List[str]]) -> Any:
+        params = {"conids": ",".join(conids)}
+        if fields:
+            params["fields"] = ",".join(fields)
+        self.upstream_calls += 1
+        response = await gateway.get(self.path, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch(self, conids: List[str], fields: Optional[List[str]] = None) -> Any:
+        """Returns the gateway payload restricted to `conids` and `fields`."""
+        self.requests += 1
+        if self.window <= 0:
+            return await self._call(conids, fields)
+
+        key = bool(fields)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            batch.flush_task = asyncio.create_task(self._flush_later(key, batch))
+
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.append((conids, fields, future))
+        batch.conids.update(dict.fromkeys(conids))
+        if fields:
+            batch.fields.update(dict.fromkeys(fields))
+
+        if len(batch.conids) >= self.max_conids:
+            batch.flush_task.cancel()
+            self._pending.pop(key, None)
+            batch.flush_task = asyncio.create_task(self._flush(batch))
+        return await future
+
+    async def _flush_later(self, key: bool, batch: _PendingBatch) -> None:
+        await asyncio.sleep(self.window)
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        await self._flush(batch)
+
+    async def _flush(self, batch: _PendingBatch) -> None:
+        merged_fields = list(batch.fields) or None
+        if len(batch.waiters) > 1:
+            logger.debug(f"Coalesced {len(batch.waiters)} requests into one {self.path} call for {len(batch.conids)} conids")
+        try:
+            payload = await self._call(list(batch.conids), merged_fields)
+        except Exception as exc:
+            for _, _, future in batch.waiters:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for conids, fields, future in batch.waiters:
+            if not future.done():
+                future.set_result(self._slice(payload, conids, fields, merged_fields))
+
+    @staticmethod
+    def _slice(payload: Any, conids: List[str], fields: Optional[List[str]], merged_fields: Optional[List[str]]) -> Any:
+        # Anything other than a list of per-conid items (e.g. an error body) is shared as-is.
+        if not isinstance(payload, list):
+            return payload
+        wanted = set(conids)
+        foreign_fields = set(merged_fields or ()) - set(fields or ())
+        return [
+            {key: value for key, value in item.items() if key not in foreign_fields}
+            for item in payload
+            if isinstance(item, dict) and str(item.get("conid")) in wanted
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "window_ms": self.window * 1000,
+            "max_conids": self.max_conids,
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+        }
+
+
+iserver_snapshot_batcher = SnapshotBatcher("/iserver/marketdata/snapshot")
+md_snapshot_batcher = SnapshotBatcher("/md/snapshot")
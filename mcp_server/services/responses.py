@@ -0,0 +1,67 @@
+# responses.py
+from typing import Any
+
+import httpx
+import orjson
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from mcp_server.services.metrics import gateway_metrics
+
+# Upstream headers that describe the body and stay valid when it is forwarded byte for byte.
+_STREAMED_HEADERS = ("content-type", "content-encoding", "content-length", "content-disposition")
+
+
+def passthrough(response: httpx.Response) -> Response:
+    """
+    Forwards a gateway response body to the caller as raw bytes.
+
+    For endpoints that return the upstream JSON unchanged this skips decoding it into Python objects
+    and re-encoding it, which is most of the per-request CPU on large payloads (positions, trades).
+    """
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json"),
+    )
+
+
+def stream_response(response: httpx.Response) -> StreamingResponse:
+    """
+    Forwards a gateway response opened with `stream=True` chunk by chunk as it arrives.
+
+    The body is never held in memory as a whole, so large results (trades, history, account lists)
+    are relayed at constant memory. Chunks are the raw bytes on the wire: a compressed body stays
+    compressed and keeps its content-encoding. The upstream response is closed when the body has
+    been sent or the caller disconnects.
+    """
+
+    async def body():
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+            gateway_metrics.record_stream_end(response)
+
+    return StreamingResponse(
+        body(),
+        status_code=response.status_code,
+        headers={name: response.headers[name] for name in _STREAMED_HEADERS if name in response.headers},
+        background=BackgroundTask(response.aclose),
+    )
+
+
+def decode(response: httpx.Response) -> Any:
+    """Decodes a gateway JSON body with orjson."""
+    return orjson.loads(response.content)
+
+
+def json_response(payload: Any, status_code: int = 200) -> ORJSONResponse:
+    """
+    Encodes a payload that is already plain JSON data (dicts, lists, scalars) with orjson.
+
+    Returning the response object directly skips FastAPI's jsonable_encoder pass, which walks every
+    value of the payload and costs far more than the encoding itself on large lists.
+    """
+    return ORJSONResponse(payload, status_code=status_code)
@@ -0,0 +1,238 @@
+# scanner_params.py
+import asyncio
+import difflib
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from mcp_server.config import SCANNER_PARAMS_CACHE_PATH, SCANNER_PARAMS_REFRESH
+from mcp_server.services.gateway_client import gateway
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("instruments", "locations", "scan_types", "filters")
+
+
+def _split(text: Optional[str]) -> List[str]:
+    return [item.strip() for item in (text or "").split(",") if item.strip()]
+
+
+def parse_json_params(payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Indexes the Client Portal JSON form of /iserver/scanner/params."""
+    locations = []
+
+    def walk(nodes: List[Dict[str, Any]], instrument: str) -> None:
+        for node in nodes or []:
+            locations.append({"code": node.get("type"), "name": node.get("display_name"), "instrument": instrument})
+            walk(node.get("locations"), instrument)
+
+    for root in payload.get("location_tree") or []:
+        walk(root.get("locations"), root.get("type"))
+
+    return {
+        "instruments": [
+            {"type": item.get("type"), "name": item.get("display_name"), "filters": item.get("filters") or []}
+            for item in payload.get("instrument_list") or []
+        ],
+        "locations": locations,
+        "scan_types": [
+            {"code": item.get("code"), "name": item.get("display_name"), "instruments": item.get("instruments") or []}
+            for item in payload.get("scan_type_list") or []
+        ],
+        "filters": [
+            {"code": item.get("code"), "name": item.get("display_name"), "group": item.get("group"), "type": item.get("type")}
+            for item in payload.get("filter_list") or []
+        ],
+    }
+
+
+def parse_xml_params(xml_text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Indexes the TWS-style ScanParameterResponse XML form of the scanner parameters."""
+    root = ET.fromstring(xml_text)
+    locations = []
+
+    def walk(tree: Optional[ET.Element]) -> None:
+        if tree is None:
+            return
+        for location in tree.findall("Location"):
+            code = location.findtext("locationCode")
+            instruments = _split(location.findtext("instruments"))
+            if code:
+                locations.append({"code": code, "name": location.findtext("displayName"), "instrument": instruments[0] if instruments else None})
+            walk(location.find("LocationTree"))
+
+    walk(root.find("LocationTree"))
+
+    filters = []
+    filter_list = root.find("FilterList")
+    for group in (filter_list if filter_list is not None else []):
+        for field in group.findall("AbstractField"):
+            code = field.findtext("code")
+            if code:
+                filters.append({"code": code, "name": field.findtext("displayName"), "group": group.findtext("id"), "type": group.tag})
+
+    return {
+        "instruments": [
+            {"type": item.findtext("type"), "name": item.findtext("name"), "filters": _split(item.findtext("filters"))}
+            for item in root.iter("Instrument")
+        ],
+        "locations": locations,
+        "scan_types": [
+            {"code": item.findtext("scanCode"), "name": item.findtext("displayName"), "instruments": _split(item.findtext("instruments"))}
+            for item in root.iter("ScanType")
+        ],
+        "filters": filters,
+    }
+
+
+class ScannerCatalogue:
+    """
+    Parsed, indexed copy of the iServer scanner parameters.
+
+    The multi-megabyte parameter document is downloaded once, reduced to four flat lists (instrument
+    types, location codes, scan codes, filters) and written to disk, so restarts do not download it
+    again. The index records which form (JSON or XML) it was parsed from, as the instruments' filter
+    lists refer to filter codes in the former and to filter groups (RangeFilter ids) in the latter. It is refreshed after `refresh_interval` seconds; if a refresh fails the previous copy keeps
+    being served.
+    """
+
+    def __init__(self, cache_path: str = SCANNER_PARAMS_CACHE_PATH, refresh_interval: float = SCANNER_PARAMS_REFRESH):
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self._index: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, index: Optional[Dict[str, Any]]) -> bool:
+        return index is not None and time.time() - index.get("fetched_at", 0) < self.refresh_interval
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path) as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning(f"Ignoring unreadable scanner parameter cache {self.cache_path}: {exc}")
+            return None
+        # Copies written before the form was recorded cannot tell how to read the instrument filter lists.
+        return index if "format" in index else None
+
+    def _save(self, index: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(f"{self.cache_path}.tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(f"{self.cache_path}.tmp", self.cache_path)
+
+    async def _download(self) -> Dict[str, Any]:
+        response = await gateway.get("/iserver/scanner/params", timeout=30)
+        response.raise_for_status()
+        text = response.text.lstrip()
+        form = "xml" if text.startswith("<") else "json"
+        try:
+            sections = parse_xml_params(text) if form == "xml" else parse_json_params(json.loads(text))
+        except ET.ParseError as exc:
+            raise ValueError(f"Unreadable scanner parameter XML: {exc}") from exc
+        index = {"fetched_at": time.time(), "format": form, **sections}
+        self._save(index)
+        logger.info("Scanner parameters indexed: " + ", ".join(f"{len(index[s])} {s}" for s in SECTIONS))
+        return index
+
+    async def get(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Returns the index, downloading it when there is no fresh copy in memory or on disk."""
+        if not force_refresh and self._is_fresh(self._index):
+            return self._index
+        async with self._lock:
+            if not force_refresh and self._is_fresh(self._index):
+                return self._index
+            if self._index is None:
+                self._index = self._load()
+            if force_refresh or not self._is_fresh(self._index):
+                try:
+                    self._index = await self._download()
+                except (httpx.HTTPError, ValueError) as exc:
+                    if self._index is None:
+                        raise
+                    logger.warning(f"Scanner parameter refresh failed, serving the cached copy: {exc}")
+            return self._index
+
+    async def search(self, section: str, query: Optional[str] = None, instrument: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """Entries of one section whose code or name contains `query`, restricted to `instrument` where it applies."""
+        index = await self.get()
+        entries = index[section]
+        if instrument:
+            if section == "locations":
+                entries = [e for e in entries if e["instrument"] == instrument]
+            elif section == "scan_types":
+                entries = [e for e in entries if not e["instruments"] or instrument in e["instruments"]]
+            elif section == "filters":
+                allowed = self._instrument_filters(index, instrument)
+                key = self._filter_key(index)
+                entries = [e for e in entries if allowed is None or e[key] in allowed]
+            elif section == "instruments":
+                entries = [e for e in entries if e["type"] == instrument]
+        if query:
+            needle = query.lower()
+            entries = [e for e in entries if needle in str(e.get("code") or e.get("type") or "").lower() or needle in str(e.get("name") or "").lower()]
+        if section == "instruments":
+            # The per-instrument filter lists are what makes the document large; use section=filters for them.
+            entries = [{"type": e["type"], "name": e["name"], "filter_count": len(e["filters"])} for e in entries]
+        return {"section": section, "total": len(entries), "results": entries[:limit]}
+
+    @staticmethod
+    def _filter_key(index: Dict[str, Any]) -> str:
+        """The filter entry field that the instruments' filter lists refer to."""
+        return "group" if index.get("format") == "xml" else "code"
+
+    @staticmethod
+    def _instrument_filters(index: Dict[str, Any], instrument: str) -> Optional[set]:
+        for item in index["instruments"]:
+            if item["type"] == instrument and item["filters"]:
+                return set(item["filters"])
+        return None
+
+    async def validate(self, instrument: str, scan_code: str, location_code: str, filter_codes: List[str]) -> List[str]:
+        """Problems with a scanner request, each with close matches from the catalogue. Empty when it is valid."""
+        index = await self.get()
+
+        def problem(kind: str, value: str, candidates: List[str]) -> str:
+            suggestions = difflib.get_close_matches(value, candidates, n=3, cutoff=0.5)
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            return f"Unknown {kind} '{value}'.{hint}"
+
+        errors = []
+        instruments = {item["type"] for item in index["instruments"]}
+        if instrument not in instruments:
+            errors.append(problem("instrument", instrument, sorted(instruments)))
+
+        scan_types = {item["code"]: item for item in index["scan_types"]}
+        scan_type = scan_types.get(scan_code)
+        if scan_type is None:
+            errors.append(problem("scan type", scan_code, list(scan_types)))
+        elif instrument in instruments and scan_type["instruments"] and instrument not in scan_type["instruments"]:
+            errors.append(f"Scan type '{scan_code}' does not support instrument '{instrument}'.")
+
+        locations = {item["code"]: item for item in index["locations"]}
+        location = locations.get(location_code)
+        if location is None:
+            errors.append(problem("location code", location_code, [code for code, entry in locations.items() if entry["instrument"] == instrument] or list(locations)))
+        elif location["instrument"] and location["instrument"] != instrument:
+            errors.append(f"Location code '{location_code}' belongs to instrument '{location['instrument']}', not '{instrument}'.")
+
+        known_filters = {item["code"]: item for item in index["filters"]}
+        allowed = self._instrument_filters(index, instrument)
+        key = self._filter_key(index)
+        available = [c for c, item in known_filters.items() if allowed is None or item[key] in allowed]
+        for code in filter_codes:
+            if code not in known_filters:
+                errors.append(problem("filter", code, sorted(available or known_filters)))
+            elif allowed is not None and known_filters[code][key] not in allowed:
+                errors.append(f"Filter '{code}' is not available for instrument '{instrument}'.")
+        return errors
+
+
+scanner_catalogue = ScannerCatalogue()
@@ -0,0 +1,206 @@
+# session_keeper.py
+import asyncio
+import logging
+import time
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional
+
+import httpx
+import orjson
+
+from mcp_server.config import (
+    SESSION_KEEPER_ENABLED, SESSION_TICKLE_INTERVAL, SESSION_STATUS_CACHE_TTL, SESSION_HOLD_PATHS,
+    SESSION_HOLD_TIMEOUT, SESSION_REAUTH_BACKOFF_INITIAL, SESSION_REAUTH_BACKOFF_MAX,
+)
+from mcp_server.services.circuit_breaker import SESSION_PATHS
+from mcp_server.services.metrics import background_task, gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SessionKeeper:
+    """
+    Keeps the gateway's brokerage session alive from inside the MCP server (in place of tickler.sh).
+
+    Every `interval` seconds it POSTs /tickle and reads /iserver/auth/status, keeping the last status
+    body for the Session router. When the session is not authenticated it calls /iserver/reauthenticate
+    and waits for the status to recover, retrying with exponential backoff. While a re-authentication
+    is in flight, requests to SESSION_HOLD_PATHS wait for it (for at most `hold_timeout` seconds
+    after it started) instead of each failing against a dead session. A 401 from such a path
+    triggers an immediate status check rather than waiting for the next tick.
+
+    The keeper does not import the gateway client (which consults it on every request); the client
+    is handed over in start().
+    """
+
+    def __init__(self, enabled: bool = SESSION_KEEPER_ENABLED, interval: float = SESSION_TICKLE_INTERVAL,
+                 status_ttl: float = SESSION_STATUS_CACHE_TTL, hold_paths: Optional[List[str]] = None,
+                 hold_timeout: float = SESSION_HOLD_TIMEOUT, backoff_initial: float = SESSION_REAUTH_BACKOFF_INITIAL,
+                 backoff_max: float = SESSION_REAUTH_BACKOFF_MAX):
+        self.enabled = enabled
+        self.interval = interval
+        self.status_ttl = status_ttl
+        self.hold_paths = SESSION_HOLD_PATHS if hold_paths is None else hold_paths
+        self.hold_timeout = hold_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._gateway = None
+        self._task: Optional[asyncio.Task] = None
+        self._reauth_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._hold_until = 0.0
+        self._status_body: Optional[bytes] = None
+        self._status_at = 0.0
+        self.authenticated: Optional[bool] = None
+        self.competing: Optional[bool] = None
+        self.last_tickle_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reauth_attempts = 0
+        self.reauths = 0
+        self.held_requests = 0
+        self.held_seconds = 0.0
+
+    async def start(self, gateway: Any) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._gateway = gateway
+        self._task = background_task(self._run())
+        logger.info(f"Session keeper started (tickle every {self.interval}s).")
+
+    async def stop(self) -> None:
+        for task in (self._reauth_task, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._reauth_task = None
+        self._ready.set()
+
+    # --- Gateway client hooks ---
+
+    def _holds(self, path: str) -> bool:
+        return (any(fnmatch(path, pattern) for pattern in self.hold_paths)
+                and not any(fnmatch(path, pattern) for pattern in SESSION_PATHS))
+
+    async def wait_ready(self, path: str) -> None:
+        """Holds a request while a re-authentication is in flight, up to the hold deadline."""
+        if self._ready.is_set() or not self._holds(path):
+            return
+        remaining = self._hold_until - time.monotonic()
+        if remaining <= 0:
+            return
+        started = time.monotonic()
+        self.held_requests += 1
+        try:
+            await asyncio.wait_for(self._ready.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+        self.held_seconds += time.monotonic() - started
+
+    def observe(self, path: str, status_code: int) -> None:
+        """Called with every gateway response: a 401 on a session-bound path prompts an immediate check."""
+        if status_code == 401 and self._task is not None and self._holds(path):
+            self._wake.set()
+
+    # --- Cached status ---
+
+    def store_status(self, content: bytes) -> None:
+        self._status_body = content
+        self._status_at = time.monotonic()
+        try:
+            status = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return
+        if isinstance(status, dict):
+            self.authenticated = bool(status.get("authenticated"))
+            self.competing = bool(status.get("competing"))
+
+    def cached_status(self) -> Optional[bytes]:
+        """The last /iserver/auth/status body while it is younger than the cache TTL."""
+        if self._status_body is not None and time.monotonic() - self._status_at < self.status_ttl:
+            return self._status_body
+        return None
+
+    # --- Background loop ---
+
+    async def _check(self) -> None:
+        response = await self._gateway.post("/tickle", timeout=10)
+        self.last_tickle_at = time.time()
+        response = await self._gateway.get("/iserver/auth/status", timeout=10)
+        response.raise_for_status()
+        self.store_status(response.content)
+        self.last_error = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._check()
+            except asyncio.CancelledError:
+                raise
+            except httpx.HTTPError as exc:
+                self.last_error = str(exc) or type(exc).__name__
+                logger.warning(f"Session keeper check failed: {self.last_error}")
+            if self.authenticated is False and (self._reauth_task is None or self._reauth_task.done()):
+                self._reauth_task = background_task(self._reauthenticate())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _reauthenticate(self) -> None:
+        self._ready.clear()
+        self._hold_until = time.monotonic() + self.hold_timeout
+        delay = self.backoff_initial
+        logger.warning("Brokerage session is not authenticated: re-authenticating.")
+        try:
+            while True:
+                self.reauth_attempts += 1
+                gateway_metrics.record_retry("/iserver/reauthenticate", "reauthenticate")
+                try:
+                    await self._gateway.post("/iserver/reauthenticate", timeout=10)
+                    if await self._wait_authenticated(max(delay, 2.0)):
+                        self.reauths += 1
+                        logger.info("Brokerage session re-authenticated.")
+                        return
+                except httpx.HTTPError as exc:
+                    self.last_error = str(exc) or type(exc).__name__
+                logger.warning(f"Re-authentication attempt {self.reauth_attempts} failed, retrying in {delay:.1f}s.")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.backoff_max)
+        finally:
+            self._ready.set()
+
+    async def _wait_authenticated(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            response = await self._gateway.get("/iserver/auth/status", timeout=10)
+            if response.status_code == 200:
+                self.store_status(response.content)
+                if self.authenticated:
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.5)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "authenticated": self.authenticated,
+            "competing": self.competing,
+            "reauthenticating": not self._ready.is_set(),
+            "last_tickle_at": self.last_tickle_at,
+            "last_error": self.last_error,
+            "reauth_attempts": self.reauth_attempts,
+            "reauths": self.reauths,
+            "held_requests": self.held_requests,
+            "held_seconds": round(self.held_seconds, 3),
+        }
+
+
+session_keeper = SessionKeeper()
@@ -0,0 +1,115 @@
+# snapshot_cache.py
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from mcp_server.config import SNAPSHOT_CACHE_TTL, SNAPSHOT_SUBSCRIPTION_TTL
+from mcp_server.services.metrics import gateway_metrics
+from mcp_server.services.request_batcher import iserver_snapshot_batcher
+from mcp_server.services.tick_store import tick_store
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotService:
+    """
+    Subscription-aware front for /iserver/marketdata/snapshot.
+
+    IBKR only returns values for a conid once a snapshot request has opened its subscription, which
+    is why the router used to call the endpoint twice. This service remembers which conid/field sets
+    are already subscribed so that the priming call is only made for new conids, and keeps the last
+    values of each conid in memory for `cache_ttl` seconds so that repeat requests skip the gateway.
+    Conids on the WebSocket market data stream are answered straight from the tick store.
+    """
+
+    def __init__(self, cache_ttl: float = SNAPSHOT_CACHE_TTL, subscription_ttl: float = SNAPSHOT_SUBSCRIPTION_TTL):
+        self.cache_ttl = cache_ttl
+        self.subscription_ttl = subscription_ttl
+        # conid -> (fields subscribed, last time the gateway was asked for this conid)
+        self._subscriptions: Dict[str, tuple] = {}
+        # conid -> (time the values were received, {field: value})
+        self._quotes: Dict[str, tuple] = {}
+
+    def _is_subscribed(self, conid: str, fields: Set[str], now: float) -> bool:
+        entry = self._subscriptions.get(conid)
+        if entry is None:
+            return False
+        subscribed_fields, last_seen = entry
+        return fields <= subscribed_fields and now - last_seen < self.subscription_ttl
+
+    def _cached_quote(self, conid: str, fields: Set[str], now: float) -> Optional[Dict[str, Any]]:
+        entry = self._quotes.get(conid)
+        if entry is None:
+            return None
+        received_at, values = entry
+        if now - received_at > self.cache_ttl or not fields <= values.keys():
+            return None
+        return values
+
+    def _remember(self, conids: List[str], fields: Set[str], items: List[Dict[str, Any]], now: float) -> None:
+        for conid in conids:
+            subscribed_fields, _ = self._subscriptions.get(conid, (set(), now))
+            self._subscriptions[conid] = (subscribed_fields | fields, now)
+        for item in items:
+            conid = str(item.get("conid", ""))
+            if not conid:
+                continue
+            values = {key: value for key, value in item.items() if key in fields}
+            self._quotes[conid] = (now, values)
+
+    async def _fetch(self, conids: List[str], fields: List[str]) -> List[Dict[str, Any]]:
+        # Goes through the batcher so concurrent callers share one upstream request.
+        return await iserver_snapshot_batcher.fetch(conids, fields)
+
+    async def get_snapshot(self, conids: List[str], fields: List[str]) -> List[Dict[str, Any]]:
+        """
+        Returns one item per requested conid, in request order. Each item carries a `_source` key set to
+        "stream" when it came from the streaming tick store, "cache" when it was served from memory or
+        "gateway" when it was fetched for this call.
+        """
+        conids = [c.strip() for c in conids if c.strip()]
+        fields = [f.strip() for f in fields if f.strip()]
+        field_set = set(fields)
+        now = time.monotonic()
+
+        results: Dict[str, Dict[str, Any]] = {}
+        to_fetch: List[str] = []
+        for conid in conids:
+            streamed = tick_store.quote(conid, field_set)
+            if streamed is not None:
+                results[conid] = streamed
+                continue
+            cached = self._cached_quote(conid, field_set, now)
+            if cached is not None:
+                results[conid] = {"conid": int(conid) if conid.isdigit() else conid, **cached, "_source": "cache"}
+            else:
+                to_fetch.append(conid)
+
+        gateway_metrics.record_cache("snapshot", hits=len(results), misses=len(to_fetch))
+        if to_fetch:
+            to_prime = [c for c in to_fetch if not self._is_subscribed(c, field_set, now)]
+            if to_prime:
+                logger.debug(f"Priming snapshot subscription for conids {to_prime}")
+                await self._fetch(to_prime, fields)
+            items = await self._fetch(to_fetch, fields)
+            if not isinstance(items, list):
+                # Not a list of quotes (e.g. a gateway error body): hand it back untouched.
+                return items
+            self._remember(to_fetch, field_set, items, time.monotonic())
+            for item in items:
+                results[str(item.get("conid", ""))] = {**item, "_source": "gateway"}
+
+        return [results[conid] for conid in conids if conid in results]
+
+    def forget(self, conid: str) -> None:
+        """Drops subscription and cached values for a conid (after an unsubscribe)."""
+        self._subscriptions.pop(str(conid), None)
+        self._quotes.pop(str(conid), None)
+
+    def reset(self) -> None:
+        """Drops every subscription and cached value (after unsubscribing from everything)."""
+        self._subscriptions.clear()
+        self._quotes.clear()
+
+
+snapshot_service = SnapshotService()
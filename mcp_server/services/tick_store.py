@@ -0,0 +1,156 @@
+# tick_store.py
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from mcp_server.config import STREAMING_BUFFER_SIZE
+
+# One row per numeric field update. `t` is the gateway's `_updated` time in epoch milliseconds.
+TICK_DTYPE = np.dtype([("t", "i8"), ("field", "i4"), ("value", "f8")])
+
+# Streamed values are strings that may carry a status prefix ("C" = prior close, "H" = halted)
+# and a magnitude suffix on sizes and volumes ("1.2K", "3.4M").
+_VALUE_PATTERN = re.compile(r"^[A-Za-z]?\s*(-?[\d,]*\.?\d+)\s*([KMB]?)$")
+_MAGNITUDE = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9}
+
+
+def parse_value(value: Any) -> Optional[float]:
+    """Numeric value of a streamed field, or None when it is not a number (symbols, descriptions)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _VALUE_PATTERN.match(str(value).strip())
+    if not match:
+        return None
+    return float(match.group(1).replace(",", "")) * _MAGNITUDE[match.group(2)]
+
+
+class TickRing:
+    """Fixed-size ring buffer of numeric ticks for one conid; the oldest rows are overwritten."""
+
+    def __init__(self, capacity: int):
+        self.rows = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.next = 0
+        self.count = 0
+
+    def append(self, t: int, updates: List[Tuple[int, float]]) -> None:
+        capacity = len(self.rows)
+        for field, value in updates:
+            self.rows[self.next] = (t, field, value)
+            self.next = (self.next + 1) % capacity
+        self.count = min(capacity, self.count + len(updates))
+
+    def ordered(self) -> np.ndarray:
+        """Rows oldest first."""
+        if self.count < len(self.rows):
+            return self.rows[:self.count]
+        return np.concatenate([self.rows[self.next:], self.rows[:self.next]])
+
+
+class _ConidState:
+    def __init__(self, capacity: int):
+        self.latest: Dict[str, Any] = {}
+        self.updated_ms = 0
+        self.received_at = 0.0
+        self.live = False
+        self.ring = TickRing(capacity)
+
+
+class TickStore:
+    """
+    In-memory store for streamed market data.
+
+    For each conid it keeps the latest raw value of every field (what a snapshot returns) and a ring
+    buffer of recent numeric updates. A conid is `live` while its stream subscription is active; the
+    gateway only sends fields that changed, so the latest values stay valid until the stream drops.
+    """
+
+    def __init__(self, capacity: int = STREAMING_BUFFER_SIZE):
+        self.capacity = capacity
+        self._conids: Dict[str, _ConidState] = {}
+        self.ticks = 0
+        self.snapshot_hits = 0
+
+    def update(self, conid: str, fields: Dict[str, Any], updated_ms: Optional[int] = None) -> None:
+        """Applies one streamed message: `fields` maps field codes to raw values."""
+        state = self._conids.get(conid)
+        if state is None:
+            state = self._conids[conid] = _ConidState(self.capacity)
+        t = int(updated_ms or time.time() * 1000)
+        numeric = []
+        for field, value in fields.items():
+            state.latest[field] = value
+            number = parse_value(value)
+            if number is not None and field.isdigit():
+                numeric.append((int(field), number))
+        if numeric:
+            state.ring.append(t, numeric)
+        state.updated_ms = max(state.updated_ms, t)
+        state.received_at = time.monotonic()
+        state.live = True
+        self.ticks += 1
+
+    def mark_stale(self, conids: Optional[Iterable[str]] = None) -> None:
+        """Stops serving snapshots for `conids` (all conids by default) until they stream again."""
+        for conid in (self._conids if conids is None else conids):
+            state = self._conids.get(str(conid))
+            if state is not None:
+                state.live = False
+
+    def forget(self, conid: str) -> None:
+        self._conids.pop(str(conid), None)
+
+    def quote(self, conid: str, fields: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Snapshot-shaped item for a live conid, restricted to `fields` (all known fields when None),
+        or None when the conid is not streaming or some requested field has not arrived yet.
+        """
+        state = self._conids.get(str(conid))
+        if state is None or not state.live:
+            return None
+        if fields is None:
+            values = dict(state.latest)
+        elif fields <= state.latest.keys():
+            values = {field: state.latest[field] for field in fields}
+        else:
+            return None
+        self.snapshot_hits += 1
+        return {
+            "conid": int(conid) if str(conid).isdigit() else conid,
+            "conidEx": str(conid),
+            "_updated": state.updated_ms,
+            **values,
+            "_source": "stream",
+        }
+
+    def ticks_for(self, conid: str, field: Optional[int] = None, since_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recent numeric ticks for a conid, oldest first."""
+        state = self._conids.get(str(conid))
+        if state is None:
+            return []
+        rows = state.ring.ordered()
+        if field is not None:
+            rows = rows[rows["field"] == field]
+        if since_ms is not None:
+            rows = rows[rows["t"] > since_ms]
+        return [{"t": int(t), "field": str(f), "value": float(v)} for t, f, v in rows.tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "ticks": self.ticks,
+            "snapshot_hits": self.snapshot_hits,
+            "conids": {
+                conid: {
+                    "live": state.live,
+                    "fields": sorted(state.latest),
+                    "buffered_ticks": state.ring.count,
+                    "seconds_since_last_tick": round(now - state.received_at, 3) if state.received_at else None,
+                }
+                for conid, state in self._conids.items()
+            },
+        }
+
+
+tick_store = TickStore()
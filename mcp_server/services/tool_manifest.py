@@ -0,0 +1,180 @@
+# tool_manifest.py
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, Iterable, List, Optional, get_args
+
+from fastapi import FastAPI
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from mcp_server.config import TOOL_MANIFEST_CACHE_ENABLED, TOOL_MANIFEST_PATH
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes so older files are rebuilt rather than misread.
+MANIFEST_FORMAT = 1
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def _collect_models(annotation: Any, models: Dict[str, type]) -> None:
+    """Adds the Pydantic models in `annotation` to `models`, with the models nested in their fields."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        name = f"{annotation.__module__}.{annotation.__qualname__}"
+        if name in models:
+            return
+        models[name] = annotation
+        for field in annotation.model_fields.values():
+            _collect_models(field.annotation, models)
+    for argument in get_args(annotation):
+        _collect_models(argument, models)
+
+
+def _field_inputs(name: str, info: Any) -> List[Any]:
+    # Defaults and descriptions are where config values (page sizes, limits, projections) reach the schemas.
+    return [name, info.alias, repr(info.default), info.description, repr(info.annotation)]
+
+
+def manifest_key(app: FastAPI, excluded_tags: Iterable[str]) -> str:
+    """
+    Fingerprint of the inputs the generated tool schemas are built from: every route's path, methods,
+    tags, summary, description and parameters (names, defaults and descriptions, so config values
+    they are taken from are covered), the fields of the request and response models, the source of
+    the modules that define the routes and models, the excluded tags (which also drive the FastMCP
+    route maps), the app description (which lists the included modules) and the versions of FastAPI,
+    Pydantic and FastMCP. Settings that do not reach a schema are left out, so one artifact serves
+    every environment whose schemas are the same.
+    """
+    routes = []
+    models: Dict[str, type] = {}
+    sources = set()
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        dependant = get_flat_dependant(route.dependant)
+        parameters = dependant.path_params + dependant.query_params + dependant.header_params + dependant.cookie_params + dependant.body_params
+        routes.append([
+            route.path, sorted(route.methods), route.name, sorted(map(str, route.tags)), route.operation_id,
+            route.summary, route.description, route.response_description,
+            [_field_inputs(field.name, field.field_info) for field in parameters],
+        ])
+        for field in dependant.body_params:
+            _collect_models(field.field_info.annotation, models)
+        _collect_models(route.response_model, models)
+        source = inspect.getsourcefile(route.endpoint)
+        if source:
+            sources.add(source)
+    for model in models.values():
+        source = inspect.getsourcefile(model)
+        if source:
+            sources.add(source)
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "format": MANIFEST_FORMAT,
+        "app": [app.title, app.version, app.description],
+        "routes": routes,
+        "models": {
+            name: [_field_inputs(field_name, info) for field_name, info in model.model_fields.items()]
+            for name, model in sorted(models.items())
+        },
+        "excluded_tags": sorted(excluded_tags),
+        "packages": {name: _package_version(name) for name in ("fastapi", "pydantic", "fastmcp")},
+    }, sort_keys=True).encode())
+    for source in sorted(sources):
+        with open(source, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ToolManifest:
+    """
+    On-disk copy of the OpenAPI document that FastMCP turns into the MCP tool list.
+
+    FastMCP.from_fastapi builds its tools from app.openapi(), and generating that document (a JSON
+    schema for every route and model) is the bulk of the server's own startup work. The document is
+    written to `path` together with a key from manifest_key(); a later start whose routes, models, tag
+    filters and library versions give the same key loads the file instead of regenerating it. Any
+    change to them produces a new key and the artifact is rebuilt. The Dockerfile builds the artifact
+    into the image, so container starts load it too.
+    """
+
+    def __init__(self, path: str = TOOL_MANIFEST_PATH, enabled: bool = TOOL_MANIFEST_CACHE_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self.stats: Dict[str, Any] = {"source": None}
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                artifact = json.load(f)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning(f"Ignoring unreadable tool manifest {self.path}: {exc}")
+            return None
+        if artifact.get("format") != MANIFEST_FORMAT or artifact.get("key") != key:
+            return None
+        return artifact["openapi"]
+
+    def _save(self, key: str, spec: Dict[str, Any], tools: List[str]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        artifact = {"format": MANIFEST_FORMAT, "key": key, "created_at": time.time(), "tools": tools, "openapi": spec}
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(artifact, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    @staticmethod
+    def _tools(spec: Dict[str, Any], excluded_tags: Iterable[str]) -> List[str]:
+        excluded = set(excluded_tags)
+        return sorted(
+            operation.get("operationId", f"{method} {path}")
+            for path, item in spec.get("paths", {}).items()
+            for method, operation in item.items()
+            if isinstance(operation, dict) and not excluded & set(operation.get("tags", []))
+        )
+
+    def openapi(self, app: FastAPI, excluded_tags: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        The app's OpenAPI document, from the artifact when it is current, otherwise generated and saved.
+        Assign the result to app.openapi_schema so FastMCP and /openapi.json both reuse it.
+        """
+        started = time.perf_counter()
+        if not self.enabled:
+            spec = app.openapi()
+            self.stats = {"source": "generated", "manifest_seconds": round(time.perf_counter() - started, 4)}
+            return spec
+        key = manifest_key(app, excluded_tags)
+        spec = self._load(key)
+        source = "cache"
+        if spec is None:
+            source = "generated"
+            app.openapi_schema = None
+            spec = app.openapi()
+            try:
+                self._save(key, spec, self._tools(spec, excluded_tags))
+            except OSError as exc:
+                logger.warning(f"Could not write tool manifest {self.path}: {exc}")
+        self.stats = {"source": source, "key": key[:12], "path": self.path, "manifest_seconds": round(time.perf_counter() - started, 4)}
+        return spec
+
+    def record_startup(self, seconds: float) -> None:
+        """Records how long building the MCP server took, manifest included."""
+        self.stats["mcp_build_seconds"] = round(seconds, 4)
+        logger.info(f"MCP server built in {seconds * 1000:.0f} ms (tool manifest: {self.stats['source']}, {self.stats['manifest_seconds'] * 1000:.0f} ms).")
+
+    def status(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **self.stats}
+
+
+tool_manifest = ToolManifest()
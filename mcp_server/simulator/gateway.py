@@ -0,0 +1,921 @@
+# gateway.py
+"""
+Local stand-in for the IBKR Client Portal gateway, for load and latency testing without IBKR.
+
+It serves the /v1/api endpoints the MCP server's routers call, with synthetic data that is
+repeatable for a given seed. Covered are accounts, portfolio (summary, ledger, allocation and paged
+positions), snapshots (including the priming call), /iserver and /hmds history, secdef search and
+contract details, and orders. Orders go through reply prompts (o354, o163, o10331), fill against the
+simulated price, and show up in live orders, order status and trades. The session can be logged out
+and re-authenticated. Endpoints outside this set answer 404.
+
+Faults are injected on every /v1/api request:
+  --latency / --jitter     base delay plus an exponentially distributed tail with mean `jitter`, in seconds
+  --latency-overrides      JSON object mapping a path glob to its own base delay, e.g. '{"/hmds/*": 0.4}'
+  --error-rate             fraction of requests answered with HTTP 500
+  --pacing                 answer 429 when IBKR's documented pacing limits are exceeded (--pacing-scale
+                           multiplies every limit)
+  --session-expiry         seconds without a request after which the brokerage session is lost
+GET /simulator/stats reports the request, 429 and error counts.
+
+Usage (from the repository root):
+    python -m mcp_server.simulator.gateway --port 5055 --latency 0.03 --jitter 0.02 --pacing
+
+then point the MCP server at it with GATEWAY_INTERNAL_BASE_URL=http://127.0.0.1, GATEWAY_PORT=5055 and
+GATEWAY_ENDPOINT=/v1/api; the agent pipeline reaches it through the MCP server as usual. With
+--ws-port the market data WebSocket simulator (market_data_ws.py) is started alongside.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import APIRouter, Body, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from mcp_server.simulator.market import Instrument, Market
+
+GATEWAY_ENDPOINT = "/v1/api"
+
+# IBKR's documented per-endpoint pacing limits as (path glob, requests per second); the first match
+# applies on top of the global limit.
+GLOBAL_RATE = 10.0
+PACING_LIMITS: List[Tuple[str, float]] = [
+    ("/iserver/marketdata/snapshot", 10.0),
+    ("/iserver/marketdata/history", 5.0),
+    ("/hmds/history", 5.0),
+    ("/iserver/scanner/params", 1 / 900),
+    ("/iserver/scanner/run", 1.0),
+    ("/iserver/account/orders", 1 / 5),
+    ("/iserver/account/trades", 1 / 5),
+    ("/iserver/account/pnl/partitioned", 1 / 5),
+    ("/portfolio/accounts", 1 / 5),
+    ("/portfolio/subaccounts", 1 / 5),
+    ("/pa/*", 1 / 900),
+    ("/fyi/*", 1.0),
+    ("/sso/validate", 1 / 60),
+    ("/tickle", 1.0),
+]
+
+# Paths that work without a brokerage session.
+SESSION_FREE_PATHS = ["/tickle", "/iserver/auth/*", "/iserver/reauthenticate", "/logout", "/sso/*", "/portfolio/*", "/trsrv/*"]
+
+PROMPTS = {
+    "o354": "You are submitting an order without market data. We strongly recommend against this as it may result in suboptimal fills. Are you sure you want to submit this order?",
+    "o163": "The following order exceeds the price percentage limit of 3%. Are you sure you want to submit this order?",
+    "o10331": "You are about to submit a stop order. Please be aware of the various stop order types available and the risks associated with each one. Are you sure you want to submit this order?",
+}
+
+WORKING = ("PreSubmitted", "Submitted")
+
+
+class _Bucket:
+    """Token bucket holding at most max(1, rate) tokens."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class FaultInjector:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, latency_overrides: Optional[Dict[str, float]] = None,
+                 error_rate: float = 0.0, pacing: bool = False, pacing_scale: float = 1.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_overrides = latency_overrides or {}
+        self.error_rate = error_rate
+        self.pacing = pacing
+        self.rng = random.Random(seed)
+        self._global = _Bucket(GLOBAL_RATE * pacing_scale)
+        self._buckets = {pattern: _Bucket(rate * pacing_scale) for pattern, rate in PACING_LIMITS}
+        self.requests = 0
+        self.paced = 0
+        self.errors = 0
+        self.by_status: Dict[str, int] = {}
+
+    def delay(self, path: str) -> float:
+        base = next((seconds for pattern, seconds in self.latency_overrides.items() if fnmatch(path, pattern)), self.latency)
+        return base + (self.rng.expovariate(1 / self.jitter) if self.jitter > 0 else 0.0)
+
+    def over_pacing(self, path: str) -> bool:
+        if not self.pacing:
+            return False
+        bucket = next((bucket for pattern, bucket in self._buckets.items() if fnmatch(path, pattern)), None)
+        # The global budget is only spent by requests the endpoint limit lets through.
+        return (bucket is not None and not bucket.take()) or not self._global.take()
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def record(self, status_code: int) -> None:
+        self.requests += 1
+        self.by_status[str(status_code)] = self.by_status.get(str(status_code), 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "paced": self.paced,
+            "errors": self.errors,
+            "by_status": self.by_status,
+            "config": {
+                "latency": self.latency,
+                "jitter": self.jitter,
+                "latency_overrides": self.latency_overrides,
+                "error_rate": self.error_rate,
+                "pacing": self.pacing,
+            },
+        }
+
+
+class SimulatedGateway:
+    """Accounts, positions, subscriptions, orders and the session of the simulated gateway."""
+
+    def __init__(self, accounts: int = 2, positions: int = 25, instruments: int = 200, seed: int = 42,
+                 fill_delay: float = 1.0, prompts: bool = True, session_expiry: float = 0.0):
+        self.market = Market(max(instruments, positions), seed)
+        self.rng = random.Random(seed)
+        self.fill_delay = fill_delay
+        self.prompts = prompts
+        self.session_expiry = session_expiry
+        self.authenticated = True
+        self.last_request = time.monotonic()
+        self._reauth_at: Optional[float] = None
+        self.account_ids = [f"DU{1000001 + i}" for i in range(accounts)]
+        conids = list(self.market.instruments)
+        now = time.time()
+        # account -> conid -> [quantity, average cost]
+        self.positions: Dict[str, Dict[int, List[float]]] = {}
+        self.cash: Dict[str, float] = {}
+        for account in self.account_ids:
+            held = self.rng.sample(conids, positions)
+            self.positions[account] = {
+                conid: [float(self.rng.choice([10, 25, 50, 100, 200, 500])),
+                        self.market.instruments[conid].price(now - self.rng.uniform(30, 400) * 86400)]
+                for conid in held
+            }
+            self.cash[account] = round(self.rng.uniform(20_000, 250_000), 2)
+        self.subscribed: set = set()
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.trades: List[Dict[str, Any]] = []
+        self.replies: Dict[str, Dict[str, Any]] = {}
+        self._next_order_id = 1_200_000_000 + self.rng.randrange(1_000_000)
+
+    # --- Session ---
+
+    def session_ok(self, path: str) -> bool:
+        now = time.monotonic()
+        if self.session_expiry and now - self.last_request > self.session_expiry:
+            self.authenticated = False
+        self.last_request = now
+        if not self.authenticated and self._reauth_at is not None and now >= self._reauth_at:
+            self.authenticated, self._reauth_at = True, None
+        return self.authenticated or any(fnmatch(path, pattern) for pattern in SESSION_FREE_PATHS)
+
+    def reauthenticate(self, delay: float = 1.0) -> None:
+        """The session comes back `delay` seconds after the first /iserver/reauthenticate."""
+        if not self.authenticated and self._reauth_at is None:
+            self._reauth_at = time.monotonic() + delay
+
+    def auth_status(self) -> Dict[str, Any]:
+        return {
+            "authenticated": self.authenticated,
+            "competing": False,
+            "connected": True,
+            "message": "",
+            "MAC": "00:00:5E:00:53:00",
+            "serverInfo": {"serverName": "SimServer", "serverVersion": "Build 10.30.0, Oct 1, 2026"},
+            "fail": "",
+        }
+
+    # --- Portfolio ---
+
+    def account(self, account_id: str) -> Dict[str, Any]:
+        return {
+            "id": account_id, "accountId": account_id, "accountVan": account_id, "accountTitle": f"Simulated {account_id}",
+            "displayName": account_id, "accountAlias": None, "accountStatus": 1_700_000_000_000, "currency": "USD",
+            "type": "DEMO", "tradingType": "PMRGN", "businessType": "IB_PROSERVE", "ibEntity": "IBLLC-US",
+            "faclient": False, "clearingStatus": "O", "covestor": False, "noClientTrading": False,
+            "trackVirtualFXPortfolio": True, "parent": {"mmc": [], "accountId": "", "isMParent": False, "isMChild": False, "isMultiplex": False},
+            "desc": account_id,
+        }
+
+    def position(self, account_id: str, conid: int) -> Optional[Dict[str, Any]]:
+        held = self.positions.get(account_id, {}).get(conid)
+        instrument = self.market.get(conid)
+        if not held or not held[0] or instrument is None:
+            return None
+        quantity, avg_cost = held
+        price = instrument.price()
+        return {
+            "acctId": account_id, "conid": conid, "contractDesc": instrument.symbol, "position": quantity,
+            "mktPrice": price, "mktValue": round(quantity * price, 2), "currency": "USD",
+            "avgCost": round(avg_cost, 4), "avgPrice": round(avg_cost, 4), "realizedPnl": 0.0,
+            "unrealizedPnl": round(quantity * (price - avg_cost), 2), "exchs": None, "expiry": None,
+            "putOrCall": None, "multiplier": None, "strike": 0.0, "exerciseStyle": None, "conExchMap": [],
+            "assetClass": "STK", "undConid": 0, "model": "", "ticker": instrument.symbol, "name": instrument.name,
+            "sector": instrument.sector, "group": instrument.sector, "listingExchange": instrument.exchange,
+            "countryCode": "US", "isUS": True, "fullName": instrument.symbol, "type": "COMMON",
+        }
+
+    def position_list(self, account_id: str) -> List[Dict[str, Any]]:
+        self.advance_orders()
+        rows = (self.position(account_id, conid) for conid in self.positions.get(account_id, {}))
+        return sorted((row for row in rows if row), key=lambda row: -abs(row["mktValue"]))
+
+    def totals(self, account_id: str) -> Dict[str, float]:
+        positions = self.position_list(account_id)
+        stock = sum(row["mktValue"] for row in positions)
+        cash = self.cash.get(account_id, 0.0)
+        return {
+            "stock": round(stock, 2), "cash": round(cash, 2), "net": round(stock + cash, 2),
+            "gross": round(sum(abs(row["mktValue"]) for row in positions), 2),
+            "unrealized": round(sum(row["unrealizedPnl"] for row in positions), 2),
+        }
+
+    def summary(self, account_id: str) -> Dict[str, Any]:
+        totals = self.totals(account_id)
+        timestamp = int(time.time() * 1000)
+        margin = totals["gross"] * 0.25
+
+        def entry(amount: Optional[float], value: Optional[str] = None) -> Dict[str, Any]:
+            return {"amount": amount, "currency": "USD" if value is None else None, "isNull": False,
+                    "timestamp": timestamp, "value": value, "severity": 0}
+
+        return {
+            "accountcode": entry(0.0, account_id),
+            "accounttype": entry(0.0, "INDIVIDUAL"),
+            "netliquidation": entry(totals["net"]),
+            "totalcashvalue": entry(totals["cash"]),
+            "settledcash": entry(totals["cash"]),
+            "grosspositionvalue": entry(totals["gross"]),
+            "equitywithloanvalue": entry(totals["net"]),
+            "initmarginreq": entry(round(margin, 2)),
+            "maintmarginreq": entry(round(margin * 0.8, 2)),
+            "availablefunds": entry(round(totals["net"] - margin, 2)),
+            "excessliquidity": entry(round(totals["net"] - margin * 0.8, 2)),
+            "buyingpower": entry(round((totals["net"] - margin) * 4, 2)),
+            "cushion": entry(round((totals["net"] - margin * 0.8) / totals["net"], 4) if totals["net"] else 0.0),
+            "leverage-s": entry(round(totals["gross"] / totals["net"], 2) if totals["net"] else 0.0),
+        }
+
+    def ledger(self, account_id: str) -> Dict[str, Any]:
+        totals = self.totals(account_id)
+        row = {
+            "commoditymarketvalue": 0.0, "futuremarketvalue": 0.0, "settledcash": totals["cash"], "exchangerate": 1,
+            "sessionid": 1, "cashbalance": totals["cash"], "corporatebondsmarketvalue": 0.0, "warrantsmarketvalue": 0.0,
+            "netliquidationvalue": totals["net"], "interest": 0.0, "unrealizedpnl": totals["unrealized"],
+            "stockmarketvalue": totals["stock"], "moneyfunds": 0.0, "currency": "USD", "realizedpnl": 0.0, "funds": 0.0,
+            "acctcode": account_id, "issueroptionsmarketvalue": 0.0, "key": "LedgerList", "timestamp": int(time.time()),
+            "severity": 0, "stockoptionmarketvalue": 0.0, "futuresonlypnl": 0.0, "tbondsmarketvalue": 0.0,
+            "futureoptionmarketvalue": 0.0, "cashbalancefxsegment": 0.0, "secondkey": "USD", "tbillsmarketvalue": 0.0,
+            "dividends": 0.0,
+        }
+        return {"USD": row, "BASE": {**row, "secondkey": "BASE"}}
+
+    def allocation(self, account_id: str) -> Dict[str, Any]:
+        sectors: Dict[str, float] = {}
+        for row in self.position_list(account_id):
+            sectors[row["sector"]] = round(sectors.get(row["sector"], 0.0) + row["mktValue"], 2)
+        totals = self.totals(account_id)
+        return {
+            "assetClass": {"long": {"STK": totals["stock"], "CASH": totals["cash"]}, "short": {}},
+            "sector": {"long": sectors, "short": {}},
+            "group": {"long": sectors, "short": {}},
+        }
+
+    # --- Market data ---
+
+    def snapshot(self, conids: List[str], fields: List[str]) -> List[Dict[str, Any]]:
+        """Like the gateway, a conid's first request only opens its subscription and returns no fields."""
+        items = []
+        for conid in conids:
+            instrument = self.market.get(conid)
+            if instrument is None:
+                continue
+            item: Dict[str, Any] = {"conid": instrument.conid, "conidEx": str(instrument.conid),
+                                    "server_id": f"q{len(items)}", "_updated": int(time.time() * 1000), "6119": f"q{len(items)}"}
+            if instrument.conid in self.subscribed:
+                quote = instrument.quote()
+                item.update({field: quote[field] for field in fields if field in quote})
+                item["6509"] = "RpB"
+            else:
+                self.subscribed.add(instrument.conid)
+            items.append(item)
+        return items
+
+    # --- Orders ---
+
+    def _new_id(self) -> int:
+        self._next_order_id += 1
+        return self._next_order_id
+
+    def _prompts(self, order: Dict[str, Any], instrument: Instrument) -> List[str]:
+        if not self.prompts:
+            return []
+        prompts = []
+        order_type = str(order.get("orderType", "")).upper()
+        if order_type == "MKT" and instrument.conid not in self.subscribed:
+            prompts.append("o354")
+        price = order.get("price")
+        if order_type == "LMT" and price and abs(float(price) / instrument.price() - 1) > 0.03:
+            prompts.append("o163")
+        if order_type in ("STP", "STOP_LIMIT"):
+            prompts.append("o10331")
+        return prompts
+
+    def _validate(self, account_id: str, order: Dict[str, Any]) -> Tuple[Optional[Instrument], Optional[str]]:
+        if account_id not in self.positions:
+            return None, f"Account {account_id} is not available."
+        instrument = self.market.get(order.get("conid") or order.get("conidex") or "")
+        if instrument is None:
+            return None, f"Contract {order.get('conid') or order.get('conidex')} not found."
+        if str(order.get("side", "")).upper() not in ("BUY", "SELL"):
+            return None, "Order side must be BUY or SELL."
+        if not order.get("quantity") or float(order["quantity"]) <= 0:
+            return None, "Order quantity must be positive."
+        if str(order.get("orderType", "")).upper() in ("LMT", "STP", "STOP_LIMIT") and not order.get("price"):
+            return None, "Price is required for this order type."
+        return instrument, None
+
+    def _prompt_or_submit(self, account_id: str, orders: List[Dict[str, Any]], prompts: List[str], modify: Optional[int] = None) -> Any:
+        if prompts:
+            reply_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+            self.replies[reply_id] = {"account": account_id, "orders": orders, "prompts": prompts[1:], "modify": modify}
+            return [{"id": reply_id, "message": [PROMPTS[prompts[0]]], "isSuppressed": False, "messageIds": [prompts[0]]}]
+        return self._submit(account_id, orders, modify)
+
+    def place(self, account_id: str, orders: List[Dict[str, Any]]) -> Any:
+        prompts: List[str] = []
+        for order in orders:
+            instrument, error = self._validate(account_id, order)
+            if error:
+                return {"error": error}
+            prompts += [prompt for prompt in self._prompts(order, instrument) if prompt not in prompts]
+        return self._prompt_or_submit(account_id, orders, prompts)
+
+    def modify(self, account_id: str, order_id: int, changes: Dict[str, Any]) -> Any:
+        order = self.orders.get(order_id)
+        if order is None or order["acct"] != account_id:
+            return {"error": f"Order {order_id} not found."}
+        if order["status"] not in WORKING:
+            return {"error": f"Order {order_id} is {order['status']} and can no longer be modified."}
+        merged = {**order["request"], **{key: value for key, value in changes.items() if value is not None}}
+        instrument, error = self._validate(account_id, merged)
+        if error:
+            return {"error": error}
+        return self._prompt_or_submit(account_id, [merged], self._prompts(merged, instrument), modify=order_id)
+
+    def reply(self, reply_id: str, confirmed: bool) -> Any:
+        pending = self.replies.pop(reply_id, None)
+        if pending is None:
+            return {"error": f"Reply {reply_id} is not pending."}
+        if not confirmed:
+            return {"error": "Order was not confirmed and has not been submitted."}
+        return self._prompt_or_submit(pending["account"], pending["orders"], pending["prompts"], pending["modify"])
+
+    def _submit(self, account_id: str, orders: List[Dict[str, Any]], modify: Optional[int]) -> List[Dict[str, Any]]:
+        now = time.time()
+        answers = []
+        for request in orders:
+            instrument = self.market.get(request.get("conid") or request.get("conidex"))
+            order_type = str(request.get("orderType", "")).upper()
+            order_id = modify or self._new_id()
+            order = self.orders.get(order_id) or {"orderId": order_id, "acct": account_id, "filled": 0.0,
+                                                  "avgPrice": None, "created_at": now}
+            order.update({
+                "conid": instrument.conid, "ticker": instrument.symbol, "name": instrument.name,
+                "exchange": instrument.exchange, "side": str(request["side"]).upper(), "orderType": order_type,
+                "price": request.get("price"), "auxPrice": request.get("auxPrice"), "quantity": float(request["quantity"]),
+                "tif": request.get("tif") or "DAY", "cOID": request.get("cOID"), "request": dict(request),
+                "status": "PreSubmitted" if order_type in ("STP", "STOP_LIMIT") else "Submitted", "updated_at": now,
+            })
+            self.orders[order_id] = order
+            answers.append({"order_id": str(order_id), "order_status": order["status"], "encrypt_message": "1"})
+        return answers
+
+    def cancel(self, account_id: str, order_id: int) -> Dict[str, Any]:
+        order = self.orders.get(order_id)
+        if order is None or order["acct"] != account_id:
+            return {"error": f"Order {order_id} not found."}
+        if order["status"] in WORKING:
+            order.update(status="Cancelled", updated_at=time.time())
+        return {"msg": "Request was submitted", "order_id": order_id, "conid": -1, "account": account_id}
+
+    def advance_orders(self) -> None:
+        """Fills working orders that have been live for `fill_delay` seconds and are marketable at the current price."""
+        now = time.time()
+        for order in self.orders.values():
+            if order["status"] not in WORKING or now - order["updated_at"] < self.fill_delay:
+                continue
+            last = self.market.get(order["conid"]).price(now)
+            buy = order["side"] == "BUY"
+            limit = float(order["price"]) if order["price"] else None
+            if order["orderType"] == "LMT":
+                marketable = last <= limit if buy else last >= limit
+            elif order["orderType"] in ("STP", "STOP_LIMIT"):
+                marketable = last >= limit if buy else last <= limit
+            else:
+                marketable = True
+            if marketable:
+                self._fill(order, last, now)
+
+    def _fill(self, order: Dict[str, Any], price: float, now: float) -> None:
+        quantity = order["quantity"] - order["filled"]
+        signed = quantity if order["side"] == "BUY" else -quantity
+        held = self.positions[order["acct"]].setdefault(order["conid"], [0.0, price])
+        if held[0] + signed and (held[0] >= 0) == (signed > 0):
+            held[1] = (held[0] * held[1] + signed * price) / (held[0] + signed)
+        held[0] += signed
+        commission = round(max(1.0, 0.005 * quantity), 2)
+        self.cash[order["acct"]] -= signed * price + commission
+        order.update(status="Filled", filled=order["quantity"], avgPrice=price, updated_at=now)
+        self.trades.append({
+            "execution_id": f"0000e0d5.{len(self.trades) + 1:08x}.01.01", "symbol": order["ticker"],
+            "supports_tax_opt": "1", "side": "B" if order["side"] == "BUY" else "S",
+            "order_description": f"{'Bot' if order['side'] == 'BUY' else 'Sold'} {quantity:g} @ {price:.2f} on SIM",
+            "trade_time": time.strftime("%Y%m%d-%H:%M:%S", time.gmtime(now)), "trade_time_r": int(now * 1000),
+            "size": quantity, "price": f"{price:.2f}", "order_ref": order.get("cOID"), "submitter": "simulator",
+            "exchange": "SIM", "commission": f"{commission:.2f}", "net_amount": round(quantity * price, 2),
+            "account": order["acct"], "accountCode": order["acct"], "company_name": order["name"],
+            "contract_description_1": order["ticker"], "sec_type": "STK", "listing_exchange": order["exchange"],
+            "conid": order["conid"], "conidEx": str(order["conid"]), "clearing_id": "IB", "clearing_name": "IB",
+            "liquidation_trade": "0", "is_event_trading": "0", "order_id": order["orderId"],
+        })
+
+    def order_view(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        remaining = order["quantity"] - order["filled"]
+        price = f"{float(order['price']):.2f}" if order["price"] else ""
+        return {
+            "acct": order["acct"], "conidex": str(order["conid"]), "conid": order["conid"], "account": order["acct"],
+            "orderId": order["orderId"], "cashCcy": "USD", "sizeAndFills": f"{order['filled']:g}/{order['quantity']:g}",
+            "orderDesc": f"{order['side'].title()} {order['quantity']:g} {order['ticker']} {order['orderType']} {price} {order['tif']}".replace("  ", " "),
+            "description1": order["ticker"], "ticker": order["ticker"], "secType": "STK", "listingExchange": order["exchange"],
+            "remainingQuantity": remaining, "filledQuantity": order["filled"], "totalSize": order["quantity"],
+            "companyName": order["name"], "status": order["status"], "order_ccp_status": order["status"],
+            "avgPrice": f"{order['avgPrice']:.2f}" if order["avgPrice"] else None, "origOrderType": order["orderType"],
+            "supportsTaxOpt": "1", "lastExecutionTime": time.strftime("%y%m%d%H%M%S", time.gmtime(order["updated_at"])),
+            "orderType": order["orderType"], "bgColor": "#FFFFFF", "fgColor": "#000000", "order_ref": order.get("cOID"),
+            "timeInForce": order["tif"], "lastExecutionTime_r": int(order["updated_at"] * 1000), "side": order["side"],
+            "price": price or None, "auxPrice": order.get("auxPrice"),
+        }
+
+    def order_status(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        view = self.order_view(order)
+        return {
+            "sub_type": None, "request_id": str(order["orderId"]), "server_id": "0", "order_id": order["orderId"],
+            "conidex": view["conidex"], "conid": order["conid"], "symbol": order["ticker"], "side": order["side"][0],
+            "contract_description_1": order["ticker"], "listing_exchange": order["exchange"], "option_acct": "c",
+            "company_name": order["name"], "size": f"{view['remainingQuantity']:g}", "total_size": f"{order['quantity']:g}",
+            "currency": "USD", "account": order["acct"], "order_type": order["orderType"], "limit_price": view["price"],
+            "cum_fill": f"{order['filled']:g}", "order_status": order["status"], "order_ccp_status": order["status"],
+            "order_status_description": f"Order {order['status']}", "tif": order["tif"], "fg_color": "#000000",
+            "bg_color": "#FFFFFF", "order_not_editable": order["status"] not in WORKING, "editable_fields": "",
+            "cannot_cancel_order": order["status"] not in WORKING, "outside_rth": False, "deactivate_order": False,
+            "use_price_mgmt_algo": False, "sec_type": "STK", "available_chart_periods": "#R|1", "order_description": view["orderDesc"],
+            "order_description_with_contract": f"{view['orderDesc']} {order['ticker']}", "alert_active": 1,
+            "child_order_type": "0", "order_clearing_account": order["acct"], "size_and_fills": view["sizeAndFills"],
+            "exit_strategy_display_price": view["price"], "average_price": view["avgPrice"],
+            "order_time": time.strftime("%y%m%d%H%M%S", time.gmtime(order["created_at"])), "is_event_trading": "0",
+        }
+
+    def whatif(self, account_id: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        amount = commission = 0.0
+        for order in orders:
+            instrument, error = self._validate(account_id, order)
+            if error:
+                return {"error": error}
+            price = float(order.get("price") or instrument.price())
+            amount += price * float(order["quantity"]) * (1 if str(order["side"]).upper() == "BUY" else -1)
+            commission += max(1.0, 0.005 * float(order["quantity"]))
+        net = self.totals(account_id)["net"]
+        margin = abs(amount) * 0.25
+        return {
+            "amount": {"amount": f"{abs(amount):,.2f} USD", "commission": f"{commission:.2f} USD", "total": f"{abs(amount) + commission:,.2f} USD"},
+            "equity": {"current": f"{net:,.0f}", "change": f"{-commission:,.0f}", "after": f"{net - commission:,.0f}"},
+            "initial": {"current": "0", "change": f"{margin:,.0f}", "after": f"{margin:,.0f}"},
+            "maintenance": {"current": "0", "change": f"{margin * 0.8:,.0f}", "after": f"{margin * 0.8:,.0f}"},
+            "position": {"current": "0", "change": "0", "after": "0"},
+            "warn": None, "error": None,
+        }
+
+
+router = APIRouter(prefix=GATEWAY_ENDPOINT)
+
+
+def _sim(request: Request) -> SimulatedGateway:
+    return request.app.state.gateway
+
+
+def _not_found(message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=404)
+
+
+# --- Session ---
+
+@router.api_route("/tickle", methods=["GET", "POST"])
+async def tickle(request: Request):
+    sim = _sim(request)
+    return {"session": uuid.uuid4().hex, "ssoExpires": 540000, "collission": False, "userId": 1,
+            "hmds": {"error": "no bridge"}, "iserver": {"authStatus": sim.auth_status()}}
+
+
+@router.api_route("/iserver/auth/status", methods=["GET", "POST"])
+async def auth_status(request: Request):
+    return _sim(request).auth_status()
+
+
+@router.post("/iserver/reauthenticate")
+async def reauthenticate(request: Request):
+    _sim(request).reauthenticate()
+    return {"message": "triggered"}
+
+
+@router.api_route("/sso/validate", methods=["GET", "POST"])
+async def sso_validate(request: Request):
+    return {"USER_ID": 1, "USER_NAME": "simulator", "RESULT": True, "AUTH_TIME": int(time.time() * 1000), "SF_ENABLED": False,
+            "IS_FREE_TRIAL": False, "CREDENTIAL": "simulator", "IP": "127.0.0.1", "EXPIRES": 540000, "QUALIFIED_FOR_MOBILE_AUTH": None,
+            "LANDING_APP": "UNIVERSAL", "IS_MASTER": False, "lastAccessed": int(time.time() * 1000), "LOGIN_TYPE": 2, "PAPER_USER_NAME": "simulator"}
+
+
+@router.post("/logout")
+async def logout(request: Request):
+    _sim(request).authenticated = False
+    return {"status": True}
+
+
+@router.get("/hmds/auth/init")
+async def hmds_init():
+    return {"authenticated": True}
+
+
+@router.get("/iserver/accounts")
+async def iserver_accounts(request: Request):
+    accounts = _sim(request).account_ids
+    return {"accounts": accounts, "acctProps": {account: {"hasChildAccounts": False, "supportsCashQty": True} for account in accounts},
+            "aliases": {account: account for account in accounts}, "selectedAccount": accounts[0] if accounts else None}
+
+
+# --- Portfolio ---
+
+@router.get("/portfolio/accounts")
+@router.get("/portfolio/subaccounts")
+async def portfolio_accounts(request: Request):
+    sim = _sim(request)
+    return [sim.account(account) for account in sim.account_ids]
+
+
+@router.get("/portfolio/subaccounts2")
+async def portfolio_subaccounts2(request: Request, page: int = 0):
+    sim = _sim(request)
+    rows = [sim.account(account) for account in sim.account_ids[page * 100:(page + 1) * 100]]
+    return {"metadata": {"total": len(sim.account_ids), "pageSize": 100, "pageNume": page}, "subaccounts": rows}
+
+
+@router.get("/portfolio/positions/{conid}")
+async def positions_by_conid(request: Request, conid: int):
+    sim = _sim(request)
+    sim.advance_orders()
+    return {account: [row] for account in sim.account_ids if (row := sim.position(account, conid))}
+
+
+@router.get("/portfolio/{accountId}/meta")
+async def account_meta(request: Request, accountId: str):
+    sim = _sim(request)
+    return sim.account(accountId) if accountId in sim.positions else _not_found(f"Account {accountId} not found.")
+
+
+@router.get("/portfolio/{accountId}/summary")
+async def account_summary(request: Request, accountId: str):
+    sim = _sim(request)
+    return sim.summary(accountId) if accountId in sim.positions else _not_found(f"Account {accountId} not found.")
+
+
+@router.get("/portfolio/{accountId}/ledger")
+async def account_ledger(request: Request, accountId: str):
+    sim = _sim(request)
+    return sim.ledger(accountId) if accountId in sim.positions else _not_found(f"Account {accountId} not found.")
+
+
+@router.get("/portfolio/{accountId}/allocation")
+async def account_allocation(request: Request, accountId: str):
+    sim = _sim(request)
+    return sim.allocation(accountId) if accountId in sim.positions else _not_found(f"Account {accountId} not found.")
+
+
+@router.get("/portfolio/{accountId}/positions/{pageId}")
+async def account_positions(request: Request, accountId: str, pageId: int):
+    # 100 positions per page, as IBKR.
+    return _sim(request).position_list(accountId)[pageId * 100:(pageId + 1) * 100]
+
+
+@router.get("/portfolio/{accountId}/position/{conid}")
+async def account_position(request: Request, accountId: str, conid: int):
+    sim = _sim(request)
+    sim.advance_orders()
+    row = sim.position(accountId, conid)
+    return [row] if row else []
+
+
+@router.get("/portfolio/{accountId}/combo/positions")
+async def combo_positions():
+    return []
+
+
+@router.post("/portfolio/{accountId}/positions/invalidate")
+async def invalidate_positions():
+    return {"message": "success"}
+
+
+# --- Market data ---
+
+@router.get("/iserver/marketdata/snapshot")
+@router.get("/md/snapshot")
+async def snapshot(request: Request, conids: str = "", fields: str = "31,84,86"):
+    return _sim(request).snapshot([c for c in conids.split(",") if c], [f for f in fields.split(",") if f])
+
+
+@router.post("/iserver/marketdata/unsubscribe")
+async def unsubscribe(request: Request, body: Dict[str, Any] = Body(...)):
+    _sim(request).subscribed.discard(int(body.get("conid") or 0))
+    return {"success": True}
+
+
+@router.post("/iserver/marketdata/unsubscribeall")
+async def unsubscribe_all(request: Request):
+    _sim(request).subscribed.clear()
+    return {"unsubscribed": True}
+
+
+@router.get("/iserver/marketdata/history")
+@router.get("/hmds/history")
+async def history(request: Request, conid: str, period: str = "1d", bar: str = "5min", startTime: Optional[str] = None):
+    payload = _sim(request).market.history(conid, period, bar, startTime)
+    return payload if payload is not None else JSONResponse({"error": f"Contract {conid} not found."}, status_code=400)
+
+
+# --- Contracts ---
+
+@router.api_route("/iserver/secdef/search", methods=["GET", "POST"])
+async def secdef_search(request: Request, symbol: str = "", name: bool = False):
+    if request.method == "POST":
+        body = await request.json()
+        symbol, name = body.get("symbol", symbol), bool(body.get("name", name))
+    matches = _sim(request).market.search(symbol, by_name=name)
+    if not matches:
+        return {"error": f"No symbol found for {symbol}."}
+    return [{
+        "conid": str(instrument.conid), "companyHeader": f"{instrument.name} - {instrument.exchange}",
+        "companyName": instrument.name, "symbol": instrument.symbol, "description": instrument.exchange,
+        "restricted": None, "fop": None, "opt": "20261120;20261218;20270115", "war": None,
+        "sections": [{"secType": "STK"}, {"secType": "OPT", "months": "NOV26;DEC26;JAN27", "exchange": "SMART;CBOE"}],
+    } for instrument in matches]
+
+
+@router.get("/iserver/secdef/info")
+async def secdef_info(request: Request, conid: str, secType: str = "STK"):
+    instrument = _sim(request).market.get(conid)
+    if instrument is None:
+        return _not_found(f"Contract {conid} not found.")
+    return [{**instrument.contract(), "validExchanges": "SMART,NYSE,NASDAQ,ARCA,IEX", "maturityDate": None, "right": None, "strike": 0}]
+
+
+@router.get("/iserver/secdef/strikes")
+async def secdef_strikes(request: Request, conid: str, secType: str = "OPT", month: str = ""):
+    instrument = _sim(request).market.get(conid)
+    if instrument is None:
+        return _not_found(f"Contract {conid} not found.")
+    step = 1.0 if instrument.price() < 100 else 5.0
+    center = round(instrument.price() / step) * step
+    strikes = [round(center + i * step, 2) for i in range(-10, 11) if center + i * step > 0]
+    return {"call": strikes, "put": strikes}
+
+
+@router.get("/trsrv/secdef")
+async def trsrv_secdef(request: Request, conids: str = ""):
+    market = _sim(request).market
+    rows = []
+    for conid in conids.split(","):
+        instrument = market.get(conid)
+        if instrument is None:
+            continue
+        rows.append({
+            "conid": instrument.conid, "currency": "USD", "time": 0, "chineseName": None, "allExchanges": "SMART,NYSE,NASDAQ,ARCA",
+            "listingExchange": instrument.exchange, "countryCode": "US", "name": instrument.name, "assetClass": "STK",
+            "expiry": None, "lastTradingDay": None, "group": instrument.sector, "putOrCall": None, "sector": instrument.sector,
+            "sectorGroup": instrument.sector, "strike": "0", "ticker": instrument.symbol, "undConid": 0, "multiplier": 0.0,
+            "type": "COMMON", "hasOptions": True, "fullName": instrument.symbol, "isUS": True,
+            "incrementRules": [{"lowerEdge": 0.0, "increment": 0.01}], "displayRule": {"magnification": 0, "displayRuleStep": [{"decimalDigits": 2, "lowerEdge": 0.0, "wholeDigits": 4}]},
+        })
+    return {"secdef": rows}
+
+
+@router.get("/trsrv/stocks")
+async def trsrv_stocks(request: Request, symbols: str = ""):
+    market = _sim(request).market
+    result = {}
+    for symbol in symbols.split(","):
+        instrument = market.by_symbol(symbol)
+        if instrument is not None:
+            result[instrument.symbol] = [{"name": instrument.name, "chineseName": None, "assetClass": "STK",
+                                          "contracts": [{"conid": instrument.conid, "exchange": instrument.exchange, "isUS": True}]}]
+    return result
+
+
+def _rules(sim: SimulatedGateway, instrument: Instrument) -> Dict[str, Any]:
+    price = instrument.price()
+    return {
+        "algoEligible": True, "overnightEligible": False, "costReport": False, "canTradeAcctIds": sim.account_ids,
+        "error": None, "orderTypes": ["limit", "midprice", "market", "stop", "stop_limit", "trailing_stop", "relative"],
+        "orderTypesOutside": ["limit", "stop_limit"], "defaultSize": 100, "cashSize": 0.0, "sizeIncrement": 1,
+        "tifTypes": ["IOC/MARKET,LIMIT,RELATIVE,MIDPRICE/o,a", "GTC/o,a", "OPG/LIMIT,MARKET/a", "DAY/o,a"],
+        "tifDefaults": {"TIF": "DAY", "SIZE": "100.00"}, "limitPrice": price, "stopprice": round(price * 1.05, 2),
+        "orderOrigination": None, "preview": True, "displaySize": None, "fraqInt": 4, "cashCcy": "USD",
+        "cashQtyIncr": 500, "priceMagnifier": None, "negativeCapable": False, "incrementType": 1,
+        "incrementRules": [{"lowerEdge": 0.0, "increment": 0.01}], "hasSecondary": True, "increment": 0.01, "incrementDigits": 2,
+    }
+
+
+def _contract_info(instrument: Instrument) -> Dict[str, Any]:
+    return {
+        "cfi_code": "ESXXXX", "symbol": instrument.symbol, "cusip": None, "expiry_full": None, "con_id": instrument.conid,
+        "maturity_date": None, "industry": instrument.sector, "instrument_type": "STK", "trading_class": instrument.exchange,
+        "valid_exchanges": "SMART,NYSE,NASDAQ,ARCA,IEX", "allow_sell_long": False, "is_zero_commission_security": False,
+        "local_symbol": instrument.symbol, "contract_clarification_type": None, "classifier": None, "currency": "USD",
+        "text": None, "underlying_con_id": 0, "r_t_h": True, "multiplier": None, "underlying_issuer": None,
+        "contract_month": None, "company_name": instrument.name, "smart_available": True, "exchange": "SMART",
+        "category": instrument.sector,
+    }
+
+
+@router.get("/iserver/contract/{conid}/info")
+async def contract_info(request: Request, conid: str):
+    instrument = _sim(request).market.get(conid)
+    return _contract_info(instrument) if instrument else _not_found(f"Contract {conid} not found.")
+
+
+@router.get("/iserver/contract/{conid}/info-and-rules")
+async def contract_info_and_rules(request: Request, conid: str):
+    sim = _sim(request)
+    instrument = sim.market.get(conid)
+    return {**_contract_info(instrument), "rules": _rules(sim, instrument)} if instrument else _not_found(f"Contract {conid} not found.")
+
+
+@router.post("/iserver/contract/rules")
+async def contract_rules(request: Request, body: Dict[str, Any] = Body(...)):
+    sim = _sim(request)
+    instrument = sim.market.get(body.get("conid") or "")
+    return _rules(sim, instrument) if instrument else _not_found(f"Contract {body.get('conid')} not found.")
+
+
+@router.get("/iserver/contract/{conid}/algos")
+async def contract_algos(request: Request, conid: str):
+    return {"algos": [{"name": "Adaptive", "id": "Adaptive"}, {"name": "VWAP", "id": "Vwap"}, {"name": "TWAP", "id": "Twap"}]}
+
+
+# --- Orders ---
+
+@router.post("/iserver/account/{accountId}/orders")
+async def place_orders(request: Request, accountId: str, body: Dict[str, Any] = Body(...)):
+    return _sim(request).place(accountId, body.get("orders") or [])
+
+
+@router.post("/iserver/account/{accountId}/orders/whatif")
+async def whatif_orders(request: Request, accountId: str, body: Dict[str, Any] = Body(...)):
+    return _sim(request).whatif(accountId, body.get("orders") or [])
+
+
+@router.post("/iserver/account/{accountId}/order/{orderId}")
+async def modify_order(request: Request, accountId: str, orderId: int, body: Dict[str, Any] = Body(...)):
+    return _sim(request).modify(accountId, orderId, body)
+
+
+@router.delete("/iserver/account/{accountId}/order/{orderId}")
+async def cancel_order(request: Request, accountId: str, orderId: int):
+    return _sim(request).cancel(accountId, orderId)
+
+
+@router.post("/iserver/reply/{replyId}")
+async def reply(request: Request, replyId: str, body: Dict[str, Any] = Body(...)):
+    return _sim(request).reply(replyId, bool(body.get("confirmed")))
+
+
+@router.get("/iserver/account/orders")
+async def live_orders(request: Request, filters: Optional[str] = None, force: bool = False):
+    sim = _sim(request)
+    sim.advance_orders()
+    wanted = {status.strip().lower() for status in filters.split(",")} if filters else None
+    orders = [sim.order_view(order) for order in sim.orders.values() if wanted is None or order["status"].lower() in wanted]
+    return {"orders": orders, "snapshot": True}
+
+
+@router.get("/iserver/account/order/status/{orderId}")
+async def order_status(request: Request, orderId: int):
+    sim = _sim(request)
+    sim.advance_orders()
+    order = sim.orders.get(orderId)
+    return sim.order_status(order) if order else JSONResponse({"error": f"OrderID {orderId} doesn't exist"}, status_code=400)
+
+
+@router.get("/iserver/account/trades")
+async def trades(request: Request, days: int = 1):
+    sim = _sim(request)
+    sim.advance_orders()
+    since = (time.time() - days * 86400) * 1000
+    return [trade for trade in sim.trades if trade["trade_time_r"] >= since]
+
+
+def create_app(gateway: SimulatedGateway, faults: FaultInjector) -> FastAPI:
+    app = FastAPI(title="IBKR Gateway Simulator")
+    app.state.gateway = gateway
+    app.state.faults = faults
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        path = request.url.path
+        if not path.startswith(GATEWAY_ENDPOINT):
+            return await call_next(request)
+        path = path[len(GATEWAY_ENDPOINT):]
+        if faults.over_pacing(path):
+            # IBKR rejects over-limit requests straight away.
+            faults.paced += 1
+            faults.record(429)
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429)
+        delay = faults.delay(path)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if faults.fails():
+            faults.errors += 1
+            response = JSONResponse({"error": "Simulated gateway error"}, status_code=500)
+        elif not gateway.session_ok(path):
+            response = JSONResponse({"error": "not authenticated", "statusCode": 401}, status_code=401)
+        else:
+            response = await call_next(request)
+        faults.record(response.status_code)
+        return response
+
+    @app.get("/simulator/stats")
+    async def simulator_stats() -> Dict[str, Any]:
+        return {**faults.stats(), "authenticated": gateway.authenticated, "orders": len(gateway.orders),
+                "trades": len(gateway.trades), "subscribed": len(gateway.subscribed)}
+
+    app.include_router(router)
+    return app
+
+
+async def _main(args: argparse.Namespace) -> None:
+    gateway = SimulatedGateway(args.accounts, args.positions, args.instruments, args.seed, args.fill_delay,
+                               not args.no_prompts, args.session_expiry)
+    faults = FaultInjector(args.latency, args.jitter, json.loads(args.latency_overrides), args.error_rate,
+                           args.pacing, args.pacing_scale, args.seed)
+    server = uvicorn.Server(uvicorn.Config(create_app(gateway, faults), host=args.host, port=args.port,
+                                           log_level="warning", access_log=False))
+    ws_server = None
+    if args.ws_port:
+        from mcp_server.simulator.market_data_ws import start_server
+        ws_server = await start_server(args.host, args.ws_port, args.ws_interval)
+        print(f"Market data WebSocket simulator listening on ws://{args.host}:{args.ws_port}/v1/api/ws")
+    print(f"IBKR gateway simulator listening on http://{args.host}:{args.port}{GATEWAY_ENDPOINT} "
+          f"({len(gateway.account_ids)} accounts: {', '.join(gateway.account_ids)})")
+    try:
+        await server.serve()
+    finally:
+        if ws_server is not None:
+            ws_server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic data and the injected faults.")
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--positions", type=int, default=25, help="Positions per account.")
+    parser.add_argument("--instruments", type=int, default=200, help="Size of the simulated universe.")
+    parser.add_argument("--latency", type=float, default=0.03, help="Base response delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Mean of the exponential delay tail in seconds.")
+    parser.add_argument("--latency-overrides", default="{}", help="JSON object mapping a path glob to its base delay.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500.")
+    parser.add_argument("--pacing", action="store_true", help="Answer 429 above IBKR's pacing limits.")
+    parser.add_argument("--pacing-scale", type=float, default=1.0, help="Multiplier applied to every pacing limit.")
+    parser.add_argument("--fill-delay", type=float, default=1.0, help="Seconds before a marketable order fills.")
+    parser.add_argument("--no-prompts", action="store_true", help="Submit orders without reply prompts.")
+    parser.add_argument("--session-expiry", type=float, default=0.0, help="Seconds of inactivity that end the session (0: never).")
+    parser.add_argument("--ws-port", type=int, default=0, help="Also start the market data WebSocket simulator on this port.")
+    parser.add_argument("--ws-interval", type=float, default=0.25)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,194 @@
+# market.py
+"""
+Synthetic instruments and prices for the gateway simulator.
+
+Prices are a deterministic function of the conid, the seed and the time (a few superposed waves
+of different periods), so a snapshot, a bar and a later bar covering the same instant always agree
+and repeated benchmark runs see the same market.
+"""
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+# (conid, symbol, company name, listing exchange, sector) of familiar names; the universe is filled up
+# with generated SIMnnn instruments.
+KNOWN_STOCKS = [
+    (265598, "AAPL", "APPLE INC", "NASDAQ", "Technology"),
+    (272093, "MSFT", "MICROSOFT CORP", "NASDAQ", "Technology"),
+    (3691937, "AMZN", "AMAZON.COM INC", "NASDAQ", "Communications"),
+    (208813719, "GOOGL", "ALPHABET INC-CL A", "NASDAQ", "Communications"),
+    (4815747, "NVDA", "NVIDIA CORP", "NASDAQ", "Technology"),
+    (107113386, "META", "META PLATFORMS INC-CLASS A", "NASDAQ", "Communications"),
+    (76792991, "TSLA", "TESLA INC", "NASDAQ", "Consumer, Cyclical"),
+    (8314, "IBM", "INTL BUSINESS MACHINES CORP", "NYSE", "Technology"),
+    (1520593, "JPM", "JPMORGAN CHASE & CO", "NYSE", "Financial"),
+    (13977, "XOM", "EXXON MOBIL CORP", "NYSE", "Energy"),
+    (8719, "JNJ", "JOHNSON & JOHNSON", "NYSE", "Consumer, Non-cyclical"),
+    (8894, "KO", "COCA-COLA CO/THE", "NYSE", "Consumer, Non-cyclical"),
+    (10291, "PG", "PROCTER & GAMBLE CO/THE", "NYSE", "Consumer, Non-cyclical"),
+    (49462172, "V", "VISA INC-CLASS A SHARES", "NYSE", "Financial"),
+    (756733, "SPY", "SPDR S&P 500 ETF TRUST", "ARCA", "Funds"),
+    (320227571, "QQQ", "INVESCO QQQ TRUST SERIES 1", "NASDAQ", "Funds"),
+]
+
+SECTORS = ["Technology", "Financial", "Energy", "Industrial", "Consumer, Cyclical", "Consumer, Non-cyclical", "Utilities"]
+
+# (period in seconds, relative amplitude) of the waves that make up a price path.
+WAVES = [(120 * 86400, 0.18), (17 * 86400, 0.05), (2 * 86400, 0.015), (3600, 0.004), (300, 0.0015)]
+
+BAR_SECONDS = {"min": 60, "mins": 60, "h": 3600, "hrs": 3600, "d": 86400, "w": 7 * 86400, "m": 30 * 86400}
+PERIOD_SECONDS = {"min": 60, "mins": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "m": 30 * 86400, "y": 365 * 86400}
+
+# IBKR returns at most this many bars per history request.
+MAX_BARS = 1000
+
+
+def _duration(value: str, units: Dict[str, int], default: int) -> int:
+    """Parses IBKR durations such as "5min", "1h", "2w" or "1y" into seconds."""
+    value = (value or "").strip().lower()
+    digits = "".join(ch for ch in value if ch.isdigit())
+    unit = value[len(digits):]
+    return int(digits or 1) * units.get(unit, default)
+
+
+class Instrument:
+    def __init__(self, conid: int, symbol: str, name: str, exchange: str, sector: str, base: float, phases: List[float]):
+        self.conid = conid
+        self.symbol = symbol
+        self.name = name
+        self.exchange = exchange
+        self.sector = sector
+        self.base = base
+        self.phases = phases
+
+    def price(self, t: Optional[float] = None) -> float:
+        t = time.time() if t is None else t
+        swing = sum(amplitude * math.sin(2 * math.pi * t / period + phase)
+                    for (period, amplitude), phase in zip(WAVES, self.phases))
+        return round(self.base * math.exp(swing), 2)
+
+    def bar(self, start: int, seconds: int) -> Dict[str, float]:
+        """One OHLCV bar opening at `start` (epoch seconds)."""
+        noise = random.Random(f"{self.conid}:{start}:{seconds}")
+        open_, close = self.price(start), self.price(start + seconds)
+        spread = max(open_, close) * 0.002 * math.sqrt(seconds / 60)
+        return {
+            "o": open_,
+            "c": close,
+            "h": round(max(open_, close) + noise.random() * spread, 2),
+            "l": round(min(open_, close) - noise.random() * spread, 2),
+            "v": round(noise.uniform(0.2, 1.0) * seconds * 50, 0),
+            "t": start * 1000,
+        }
+
+    def quote(self) -> Dict[str, str]:
+        """Snapshot field values (IBKR field ids) at the current time."""
+        now = time.time()
+        last = self.price(now)
+        day_open = self.price(now - now % 86400)
+        spread = max(0.01, round(last * 0.0003, 2))
+        change = round(last - day_open, 2)
+        bar = self.bar(int(now - now % 86400), 86400)
+        return {
+            "31": f"{last:.2f}",
+            "84": f"{last - spread:.2f}",
+            "86": f"{last + spread:.2f}",
+            "85": "300",
+            "88": "500",
+            "82": f"{change:+.2f}",
+            "83": f"{change / day_open * 100:.2f}",
+            "70": f"{max(bar['h'], last):.2f}",
+            "71": f"{min(bar['l'], last):.2f}",
+            "87": f"{bar['v'] / 1e6:.2f}M",
+            "7295": f"{day_open:.2f}",
+            "7296": f"{self.price(now - now % 86400 - 1):.2f}",
+            "7762": str(int(bar["v"])),
+            "55": self.symbol,
+            "7051": self.name,
+            "6070": "STK",
+            "6004": self.exchange,
+        }
+
+    def contract(self) -> Dict[str, object]:
+        return {
+            "conid": self.conid,
+            "symbol": self.symbol,
+            "companyName": self.name,
+            "secType": "STK",
+            "listingExchange": self.exchange,
+            "exchange": "SMART",
+            "currency": "USD",
+            "sector": self.sector,
+        }
+
+
+class Market:
+    """The simulator's universe: the known stocks plus generated ones, `size` instruments in total."""
+
+    def __init__(self, size: int = 200, seed: int = 42):
+        rng = random.Random(seed)
+        rows = list(KNOWN_STOCKS[:size])
+        for i in range(len(rows), size):
+            rows.append((900000 + i, f"SIM{i:03d}", f"SIMULATED HOLDINGS {i:03d} INC", rng.choice(["NYSE", "NASDAQ"]), rng.choice(SECTORS)))
+        self.instruments: Dict[int, Instrument] = {}
+        for conid, symbol, name, exchange, sector in rows:
+            base = round(math.exp(rng.uniform(math.log(15), math.log(600))), 2)
+            phases = [rng.uniform(0, 2 * math.pi) for _ in WAVES]
+            self.instruments[conid] = Instrument(conid, symbol, name, exchange, sector, base, phases)
+        self._by_symbol = {instrument.symbol: instrument for instrument in self.instruments.values()}
+
+    def get(self, conid) -> Optional[Instrument]:
+        try:
+            return self.instruments.get(int(str(conid).split("@")[0]))
+        except ValueError:
+            return None
+
+    def by_symbol(self, symbol: str) -> Optional[Instrument]:
+        return self._by_symbol.get((symbol or "").upper())
+
+    def search(self, text: str, by_name: bool = False) -> List[Instrument]:
+        text = (text or "").upper()
+        if not text:
+            return []
+        if by_name:
+            return [instrument for instrument in self.instruments.values() if text in instrument.name][:20]
+        exact = self._by_symbol.get(text)
+        prefixed = [instrument for instrument in self.instruments.values() if instrument.symbol.startswith(text) and instrument is not exact]
+        return ([exact] if exact else []) + prefixed[:9]
+
+    def history(self, conid, period: str, bar: str, start_time: Optional[str] = None) -> Optional[Dict[str, object]]:
+        """Bars of `bar` size covering `period` and ending at `start_time` (IBKR's yyyymmdd-hh:mm:ss) or now."""
+        instrument = self.get(conid)
+        if instrument is None:
+            return None
+        bar_seconds = _duration(bar, BAR_SECONDS, 60)
+        period_seconds = _duration(period, PERIOD_SECONDS, 86400)
+        end = time.time()
+        if start_time:
+            end = time.mktime(time.strptime(start_time, "%Y%m%d-%H:%M:%S"))
+        last_start = int(end // bar_seconds * bar_seconds)
+        count = max(1, min(MAX_BARS, period_seconds // bar_seconds))
+        data = [instrument.bar(last_start - i * bar_seconds, bar_seconds) for i in range(count - 1, -1, -1)]
+        return {
+            "serverId": "sim",
+            "symbol": instrument.symbol,
+            "text": instrument.name,
+            "priceFactor": 100,
+            "startTime": time.strftime("%Y%m%d-%H:%M:%S", time.gmtime(data[0]["t"] / 1000)),
+            "high": f"{max(row['h'] for row in data) * 100:.0f}/{sum(row['v'] for row in data):.0f}/0",
+            "low": f"{min(row['l'] for row in data) * 100:.0f}/{sum(row['v'] for row in data):.0f}/0",
+            "timePeriod": period,
+            "barLength": bar_seconds,
+            "mdAvailability": "S",
+            "mktDataDelay": 0,
+            "outsideRth": False,
+            "volumeFactor": 1,
+            "priceDisplayRule": 1,
+            "priceDisplayValue": "2",
+            "negativeCapable": False,
+            "messageVersion": 2,
+            "data": data,
+            "points": len(data),
+            "travelTime": 0,
+        }
@@ -0,0 +1,122 @@
+# market_data_ws.py
+"""
+Stand-in for the gateway's streaming market data WebSocket (/v1/api/ws), for local testing without IBKR.
+
+It accepts the same messages as the gateway ({"session": ...}, "tic", "smd+<conid>+{"fields": [...]}"
+and "umd+<conid>+{}"), answers a subscription with a full set of field values and then pushes random-walk
+updates for the changed fields of every subscribed conid.
+
+Usage (from the repository root):
+    python -m mcp_server.simulator.market_data_ws --port 5056 --interval 0.25
+
+then point the MCP server at it with STREAMING_ENABLED=true and STREAMING_WS_URL=ws://127.0.0.1:5056/v1/api/ws.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+
+class _Instrument:
+    def __init__(self, conid: str):
+        self.conid = conid
+        self.last = round(random.uniform(20, 500), 2)
+        self.volume = random.randint(10_000, 1_000_000)
+        self.open = self.last
+
+    def values(self) -> Dict[str, str]:
+        spread = max(0.01, round(self.last * 0.0005, 2))
+        change = round(self.last - self.open, 2)
+        return {
+            "31": f"{self.last:.2f}",
+            "84": f"{self.last - spread:.2f}",
+            "86": f"{self.last + spread:.2f}",
+            "85": str(random.randint(1, 20) * 100),
+            "88": str(random.randint(1, 20) * 100),
+            "82": f"{change:+.2f}",
+            "83": f"{change / self.open * 100:.2f}%",
+            "87": f"{self.volume / 1e6:.2f}M",
+            "7295": f"{self.open:.2f}",
+            "7296": f"{self.open:.2f}",
+            "55": f"SIM{self.conid}",
+        }
+
+    def step(self) -> None:
+        self.last = max(0.01, round(self.last * (1 + random.gauss(0, 0.0008)), 2))
+        self.volume += random.randint(0, 5) * 100
+
+
+def _message(conid: str, fields: Dict[str, str]) -> str:
+    return json.dumps({
+        "server_id": "sim",
+        "conidEx": conid,
+        "conid": int(conid) if conid.isdigit() else conid,
+        "_updated": int(time.time() * 1000),
+        **fields,
+        "topic": f"smd+{conid}",
+    })
+
+
+async def _handle(ws: ServerConnection, interval: float) -> None:
+    subscriptions: Dict[str, List[str]] = {}
+    instruments: Dict[str, _Instrument] = {}
+
+    async def push_updates() -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for conid, fields in list(subscriptions.items()):
+                instrument = instruments[conid]
+                before = instrument.values()
+                instrument.step()
+                after = instrument.values()
+                # Like the gateway, only send fields whose value changed.
+                changed = {field: after[field] for field in fields if field in after and after[field] != before[field]}
+                if changed:
+                    await ws.send(_message(conid, changed))
+
+    pusher = asyncio.create_task(push_updates())
+    await ws.send(json.dumps({"topic": "system", "success": "simulator", "isFT": False, "isPaper": True}))
+    try:
+        async for raw in ws:
+            message = raw.decode() if isinstance(raw, bytes) else raw
+            if message == "tic":
+                await ws.send(json.dumps({"topic": "tic", "alive": True}))
+            elif message.startswith("smd+"):
+                _, conid, args = message.split("+", 2)
+                fields = json.loads(args or "{}").get("fields") or ["31", "84", "86"]
+                subscriptions[conid] = fields
+                instrument = instruments.setdefault(conid, _Instrument(conid))
+                values = instrument.values()
+                await ws.send(_message(conid, {field: values[field] for field in fields if field in values}))
+            elif message.startswith("umd+"):
+                subscriptions.pop(message.split("+", 2)[1], None)
+            # {"session": ...} and anything else needs no answer.
+    except ConnectionClosed:
+        pass
+    finally:
+        pusher.cancel()
+
+
+async def start_server(host: str = "127.0.0.1", port: int = 5056, interval: float = 0.25) -> Server:
+    """Starts the stand-in server in the running event loop; close it with `server.close()`."""
+    return await serve(lambda ws: _handle(ws, interval), host, port)
+
+
+async def _main(host: str, port: int, interval: float) -> None:
+    server = await start_server(host, port, interval)
+    print(f"Market data WebSocket simulator listening on ws://{host}:{port}/v1/api/ws")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between updates for each conid.")
+    args = parser.parse_args()
+    asyncio.run(_main(args.host, args.port, args.interval))